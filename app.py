@@ -1,9 +1,27 @@
-from flask import Flask, render_template, request, jsonify, redirect, url_for, make_response, send_from_directory, session
+from flask import Flask, render_template, request, jsonify, redirect, url_for, make_response, session, g
+import click
 import chess
 import chess.pgn
 from io import StringIO
 import config
+from repository import OpeningRepository
+from scores import ScoreStore
+from sync_queue import SyncQueue
+from github_status import LocalBlobHash, RemoteBlobStatus, git_blob_sha
+from backups import BackupStore
+from pgn_validator import validate_line
+from pgn_import import parse_games, merge_games
+from pgn_export import export_pgn, export_ndjson
+from page_cache import PageCache
+from assets import AssetManifest
+from vendor import VENDOR_LIBRARIES
+from trainer import sequence_key
+from logging_setup import configure_logging
+import hashlib
+import hmac
+import io
 import json
+import logging
 import re
 import os
 import time
@@ -11,13 +29,17 @@ from whitenoise import WhiteNoise
 import requests
 from github import Github
 import base64
-import hashlib
 from dotenv import load_dotenv
-from datetime import datetime
+from datetime import datetime, timezone
 
 # Charger les variables d'environnement depuis le fichier .env
 load_dotenv()
 
+# Journalisation par niveaux (config.LOG_LEVEL, INFO par défaut) : un logger par module,
+# écriture sur stdout dans un thread dédié pour ne pas bloquer les requêtes
+configure_logging(config.LOG_LEVEL, config.LOG_FORMAT, config.LOG_DEBUG_SAMPLE_RATE)
+logger = logging.getLogger(__name__)
+
 app = Flask(__name__, static_folder='static', static_url_path='/static')
 
 # Configuration de sécurité
@@ -25,9 +47,6 @@ ADMIN_PASSWORD = os.environ.get('ADMIN_PASSWORD', 'SacTheBook2024!')
 ADMIN_SESSION_KEY = 'admin_authenticated'
 app.secret_key = os.environ.get('SECRET_KEY', 'SacTheBookSecretKey2024!')
 
-# Configuration pour servir les fichiers statiques de manière plus robuste
-app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 0
-
 # Fonctions de sécurité
 def require_admin_auth(f):
     """Décorateur pour protéger les routes admin"""
@@ -38,36 +57,19 @@ def require_admin_auth(f):
     decorated_function.__name__ = f.__name__
     return decorated_function
 
+def openings_mutation(f):
+    """Décorateur pour les routes qui modifient openings.json : verrou inter-processus
+    et rechargement des dernières données avant la mutation"""
+    def decorated_function(*args, **kwargs):
+        with repository.mutation():
+            return f(*args, **kwargs)
+    decorated_function.__name__ = f.__name__
+    return decorated_function
+
 def is_admin_authenticated():
     """Vérifie si l'utilisateur est authentifié comme admin"""
     return session.get(ADMIN_SESSION_KEY, False)
 
-# Route spécifique pour les images des pièces d'échecs
-@app.route('/static/img/chesspieces/wikipedia/<filename>')
-def serve_chess_piece(filename):
-    """Sert les images des pièces d'échecs avec les bons headers"""
-    try:
-        # Vérifier si le fichier existe
-        piece_path = os.path.join('static', 'img', 'chesspieces', 'wikipedia', filename)
-        if not os.path.exists(piece_path):
-            print(f"Fichier non trouvé: {piece_path}")
-            return '', 404
-        
-        print(f"Serving chess piece: {filename}")
-        response = send_from_directory('static/img/chesspieces/wikipedia', filename, 
-                                     mimetype='image/png',
-                                     cache_timeout=0)
-        
-        # Ajouter des headers CORS pour éviter les problèmes
-        response.headers['Access-Control-Allow-Origin'] = '*'
-        response.headers['Access-Control-Allow-Methods'] = 'GET'
-        response.headers['Access-Control-Allow-Headers'] = 'Content-Type'
-        
-        return response
-    except Exception as e:
-        print(f"Erreur lors du service de l'image {filename}: {e}")
-        return '', 404
-
 @app.route('/test-chess-pieces')
 def test_chess_pieces():
     """Route de test pour vérifier l'accessibilité des pièces d'échecs"""
@@ -122,18 +124,25 @@ GITHUB_TOKEN = os.environ.get('GITHUB_TOKEN', '')
 GITHUB_REPO = os.environ.get('GITHUB_REPO', 'Noan-r/SacTheBook')
 GITHUB_BRANCH = os.environ.get('GITHUB_BRANCH', 'master')
 GITHUB_FILE_PATH = os.environ.get('GITHUB_FILE_PATH', 'data/openings.json')
+GITHUB_API_URL = os.environ.get('GITHUB_API_URL', 'https://api.github.com')  # Serveur local de substitution pour les tests (voir mock_github_server.py)
 
 # Initialiser l'API GitHub si le token est disponible
 github_client = None
 if GITHUB_TOKEN:
     try:
-        github_client = Github(GITHUB_TOKEN)
-        print(f"GitHub API initialisée pour le repo: {GITHUB_REPO}")
+        github_client = Github(GITHUB_TOKEN, base_url=GITHUB_API_URL)
+        logger.info("GitHub API initialisée pour le repo: %s", GITHUB_REPO)
     except Exception as e:
-        print(f"Erreur lors de l'initialisation de GitHub API: {e}")
+        logger.error("Erreur lors de l'initialisation de GitHub API: %s", e)
         github_client = None
 else:
-    print("Aucun token GitHub configuré - synchronisation désactivée")
+    logger.info("Aucun token GitHub configuré - synchronisation désactivée")
+
+# État de synchronisation mis en cache : SHA de blob local (par mtime/taille) et
+# distant (requêtes conditionnelles ETag sur le listing du dossier)
+local_openings_blob = LocalBlobHash(config.OPENINGS_FILE)
+github_remote_blob = RemoteBlobStatus(GITHUB_API_URL, GITHUB_TOKEN, GITHUB_REPO, GITHUB_BRANCH,
+                                      GITHUB_FILE_PATH, ttl=config.GITHUB_STATUS_TTL, metrics=config.METRICS)
 
 def sync_to_github():
     """Synchronise les données locales vers GitHub avec gestion des conflits"""
@@ -150,74 +159,75 @@ def sync_to_github():
         }}
     
     try:
-        # Recharger les données locales
-        config.load_openings_from_json()
+        # Recharger les données locales si elles ont changé
+        repository.refresh()
         
         # Lire le fichier JSON local
-        with open('data/openings.json', 'r', encoding='utf-8') as f:
-            local_content = f.read()
-        
-        # Calculer le hash du contenu local
-        local_hash = hashlib.sha256(local_content.encode()).hexdigest()
-        
-        # Récupérer le repo
-        repo = github_client.get_repo(GITHUB_REPO)
-        
-        try:
-            # Récupérer le fichier GitHub
-            file = repo.get_contents(GITHUB_FILE_PATH, ref=GITHUB_BRANCH)
-            github_content = base64.b64decode(file.content).decode('utf-8')
-            github_hash = hashlib.sha256(github_content.encode()).hexdigest()
-            
-            # Vérifier si le contenu a changé
-            if local_hash == github_hash:
-                return {'success': True, 'message': 'Aucun changement détecté', 'status': 'no_changes'}
-            
-            # Vérifier s'il y a des modifications locales non sauvegardées
-            if local_hash != github_hash:
-                # Créer une sauvegarde locale avant synchronisation
-                backup_path = f'data/openings_backup_{int(time.time())}.json'
-                with open(backup_path, 'w', encoding='utf-8') as f:
-                    f.write(local_content)
-                
-                # Mettre à jour le fichier GitHub
-                commit_message = f"Sync openings data - {local_hash[:8]} - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
-                repo.update_file(
+        with open(config.OPENINGS_FILE, 'rb') as f:
+            local_bytes = f.read()
+        local_content = local_bytes.decode('utf-8')
+        local_hash = git_blob_sha(local_bytes)
+        
+        # Comparer les SHA de blob : aucun téléchargement du fichier distant
+        github_hash, _ = github_remote_blob.get(force=True)
+        if local_hash == github_hash:
+            return {'success': True, 'message': 'Aucun changement détecté', 'status': 'no_changes'}
+        
+        # Récupérer le repo (sans requête : le SHA du blob suffit pour écrire)
+        repo = github_client.get_repo(GITHUB_REPO, lazy=True)
+        
+        if github_hash is None:
+            # Le fichier n'existe pas, le créer
+            commit_message = f"Initial sync openings data - {local_hash[:8]} - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+            with config.METRICS.span('github_push'):
+                repo.create_file(
                     GITHUB_FILE_PATH,
                     commit_message,
                     local_content,
-                    file.sha,
                     branch=GITHUB_BRANCH
                 )
-                
-                print(f"DEBUG: Synchronisation vers GitHub réussie. Backup créé: {backup_path}")
-                return {
-                    'success': True, 
-                    'message': 'Données synchronisées vers GitHub', 
-                    'status': 'synced',
-                    'backup_created': backup_path,
-                    'local_hash': local_hash[:8],
-                    'github_hash': github_hash[:8]
-                }
-            
-        except Exception as e:
-            if "Not Found" in str(e):
-                # Le fichier n'existe pas, le créer
-                commit_message = f"Initial sync openings data - {local_hash[:8]} - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
-                repo.create_file(
+            github_remote_blob.set(local_hash, len(local_bytes))
+            return {'success': True, 'message': 'Fichier créé sur GitHub', 'status': 'created'}
+        
+        # Créer une sauvegarde locale avant synchronisation (dédupliquée par contenu)
+        backup_path = backup_store.add(local_bytes, 'before_sync_to_github')['id']
+        
+        # Mettre à jour le fichier GitHub
+        commit_message = f"Sync openings data - {local_hash[:8]} - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+        try:
+            with config.METRICS.span('github_push'):
+                repo.update_file(
                     GITHUB_FILE_PATH,
                     commit_message,
                     local_content,
+                    github_hash,
                     branch=GITHUB_BRANCH
                 )
-                return {'success': True, 'message': 'Fichier créé sur GitHub', 'status': 'created'}
-            else:
-                raise e
+        except Exception:
+            # SHA distant périmé ou fichier supprimé entre-temps
+            github_remote_blob.invalidate()
+            raise
+        github_remote_blob.set(local_hash, len(local_bytes))
+        
+        logger.info("Synchronisation vers GitHub réussie. Backup créé: %s", backup_path)
+        return {
+            'success': True, 
+            'message': 'Données synchronisées vers GitHub', 
+            'status': 'synced',
+            'backup_created': backup_path,
+            'local_hash': local_hash[:8],
+            'github_hash': github_hash[:8]
+        }
                 
     except Exception as e:
-        print(f"Erreur lors de la synchronisation GitHub: {e}")
+        logger.exception("Erreur lors de la synchronisation GitHub: %s", e)
         return {'success': False, 'error': str(e), 'status': 'error'}
 
+# Les éditions admin ne synchronisent plus dans la requête : elles programment un
+# envoi groupé, exécuté en arrière-plan après config.GITHUB_SYNC_DEBOUNCE secondes
+github_sync_queue = SyncQueue(sync_to_github, debounce=config.GITHUB_SYNC_DEBOUNCE,
+                              max_delay=config.GITHUB_SYNC_MAX_DELAY)
+
 def sync_from_github():
     """Synchronise les données depuis GitHub vers local avec gestion des conflits"""
     if not github_client:
@@ -235,42 +245,50 @@ def sync_from_github():
     try:
         # Lire le contenu local actuel
         try:
-            with open('data/openings.json', 'r', encoding='utf-8') as f:
-                local_content = f.read()
-            local_hash = hashlib.sha256(local_content.encode()).hexdigest()
+            with open(config.OPENINGS_FILE, 'rb') as f:
+                local_bytes = f.read()
+            local_hash = git_blob_sha(local_bytes)
         except FileNotFoundError:
-            local_content = ""
+            local_bytes = b""
             local_hash = ""
         
-        # Récupérer le repo
-        repo = github_client.get_repo(GITHUB_REPO)
+        # Déjà identique (SHA de blob) : rien à télécharger
+        remote_hash, _ = github_remote_blob.get(force=True)
+        if local_hash and local_hash == remote_hash:
+            return {
+                'success': True,
+                'message': 'Données locales déjà identiques à GitHub',
+                'status': 'no_changes',
+                'local_hash': local_hash[:8],
+                'github_hash': remote_hash[:8]
+            }
+        
+        # Récupérer le repo (sans requête supplémentaire)
+        repo = github_client.get_repo(GITHUB_REPO, lazy=True)
         
         # Récupérer le fichier depuis GitHub
-        file = repo.get_contents(GITHUB_FILE_PATH, ref=GITHUB_BRANCH)
-        github_content = base64.b64decode(file.content).decode('utf-8')
-        github_hash = hashlib.sha256(github_content.encode()).hexdigest()
+        with config.METRICS.span('github_pull'):
+            file = repo.get_contents(GITHUB_FILE_PATH, ref=GITHUB_BRANCH)
+        github_bytes = base64.b64decode(file.content)
+        github_content = github_bytes.decode('utf-8')
+        github_hash = file.sha
+        github_remote_blob.set(file.sha, len(github_bytes))
         
         # Vérifier s'il y a des modifications locales non sauvegardées
         if local_hash and local_hash != github_hash:
-            # Créer une sauvegarde des modifications locales
-            backup_path = f'data/openings_local_backup_{int(time.time())}.json'
-            with open(backup_path, 'w', encoding='utf-8') as f:
-                f.write(local_content)
+            # Créer une sauvegarde des modifications locales (dédupliquée par contenu)
+            backup_path = backup_store.add(local_bytes, 'before_sync_from_github')['id']
             
-            print(f"DEBUG: Modifications locales détectées. Backup créé: {backup_path}")
+            logger.info("Modifications locales détectées. Backup créé: %s", backup_path)
         
         # Sauvegarder le contenu GitHub localement
-        with open('data/openings.json', 'w', encoding='utf-8') as f:
-            f.write(github_content)
+        config.write_openings_content(github_content)
         
-        # Recharger les données en mémoire
-        config.load_openings_from_json()
+        # Recompiler le dépôt en mémoire avec les nouvelles données
+        repository.commit()
+        score_store.import_from_openings(config.OPENINGS)
         
-        # Recréer l'instance trainer globale avec les nouvelles données
-        global trainer
-        trainer = OpeningTrainer()
-        
-        print(f"DEBUG: Synchronisation depuis GitHub réussie. Trainer recréé avec {len(trainer.get_openings_by_category())} catégories")
+        logger.info("Synchronisation depuis GitHub réussie. Trainer recréé avec %d catégories", len(repository.get_trainer().get_openings_by_category()))
         
         return {
             'success': True, 
@@ -282,9 +300,27 @@ def sync_from_github():
         }
         
     except Exception as e:
-        print(f"Erreur lors de la synchronisation depuis GitHub: {e}")
+        logger.exception("Erreur lors de la synchronisation depuis GitHub: %s", e)
         return {'success': False, 'error': str(e), 'status': 'error'}
 
+# Mesures par route (config.METRICS, exposées sur /metrics) : durée de traitement et
+# nombre de requêtes par code de statut. Les fichiers statiques, servis par WhiteNoise
+# avant Flask, ne sont pas comptés.
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    start = g.pop('request_start', None)
+    if start is not None:
+        endpoint = request.endpoint or 'not_found'
+        config.METRICS.observe('http_request_duration_seconds', time.perf_counter() - start,
+                               endpoint=endpoint, method=request.method)
+        config.METRICS.inc('http_requests_total', endpoint=endpoint, method=request.method,
+                           status=response.status_code)
+    return response
+
 # Configuration pour les fichiers statiques avec en-têtes optimisés
 @app.after_request
 def add_header(response):
@@ -299,266 +335,192 @@ def add_header(response):
         response.headers['X-Frame-Options'] = 'SAMEORIGIN'
     return response
 
-# Configuration WhiteNoise pour servir les fichiers statiques avec Gunicorn
-app.wsgi_app = WhiteNoise(app.wsgi_app, root='static/', prefix='static/')
+# Configuration WhiteNoise pour servir les fichiers statiques avec Gunicorn : seul
+# chemin de service de static/. Les fichiers versionnés de static/dist (build_assets.py)
+# sont servis avec un cache d'un an, et leurs versions .br/.gz quand le client les accepte.
+app.wsgi_app = WhiteNoise(app.wsgi_app, root='static/', prefix='static/',
+                          immutable_file_test=AssetManifest.is_immutable)
+
+# URLs des fichiers statiques pour les modèles, d'après static/dist/manifest.json
+assets = AssetManifest(app.static_folder)
+CHESS_PIECES = ['wp', 'wr', 'wn', 'wb', 'wq', 'wk', 'bp', 'br', 'bn', 'bb', 'bq', 'bk']
+
+def piece_urls():
+    """URLs des pièces, indexées par le nom en minuscules utilisé par chessboard.js ('wk')"""
+    return {piece: assets.url(f'img/chesspieces/wikipedia/{piece}.png') for piece in CHESS_PIECES}
+
+def vendor_asset(name):
+    """URL et empreinte SRI d'une bibliothèque de vendor.py, toujours servie depuis static/vendor"""
+    path = VENDOR_LIBRARIES[name]['path']
+    return {'url': assets.url(path), 'integrity': assets.integrity(path)}
+
+# Pas de repli sur les CDN : une bibliothèque absente est signalée dès le démarrage
+# (build_assets.py refuse de construire dans ce cas)
+_missing_vendor = [library['path'] for library in VENDOR_LIBRARIES.values() if not assets.exists(library['path'])]
+if _missing_vendor:
+    logger.error("Bibliothèques absentes de static/vendor (python build_assets.py --fetch-vendor) : %s",
+                 ', '.join(_missing_vendor))
+
+app.jinja_env.globals.update(asset_url=assets.url, piece_urls=piece_urls, vendor_asset=vendor_asset)
 app.secret_key = 'chess_openings_secret_key'
 
-class OpeningTrainer:
-    def __init__(self):
-        self.openings_by_category = self.load_openings()
-    
-    def load_openings(self):
-        """Load all openings from config.py, supporting multiple variations per opening"""
-        openings_by_cat = {}
-        for category, openings_list in config.OPENINGS.items():
-            openings_by_cat[category] = []
-            for opening_data in openings_list:
-                opening_name = opening_data["name"]
-                # Chaque ouverture peut avoir plusieurs variations
-                lines = []
-                for variation in opening_data.get("variations", []):
-                    variation_name = variation["name"]
-                    pgn_text = variation["pgn"]
-                    loaded_lines = self.load_opening_from_pgn_string(pgn_text)
-                    # Ajoute chaque ligne avec le nom de la variation
-                    for line in loaded_lines:
-                        # On remplace le nom par le nom de la variation pour l'affichage
-                        line["name"] = variation_name
-                        lines.append(line)
-                # Inclure toutes les ouvertures, même celles sans variations
-                openings_by_cat[category].append({
-                    "name": opening_name,
-                    "lines": lines
-                })
-        return openings_by_cat
-    
-    def load_opening_from_pgn_string(self, pgn_content):
-        """Load an opening from a PGN string"""
-        lines = []
-        pgn_io = StringIO(pgn_content)
-        while True:
-            try:
-                game = chess.pgn.read_game(pgn_io)
-                if game is None:
-                    break
-                
-                board = game.board()
-                moves = []
-                
-                # Check that the initial position is valid
-                if not board.is_valid():
-                    print(f"Invalid initial position for game: {game.headers.get('Event', 'Unknown')}")
-                    continue
-                
-                for move in game.mainline_moves():
-                    try:
-                        # Check that the move is legal
-                        if move in board.legal_moves:
-                            san_move = board.san(move)
-                            moves.append({
-                                "san": san_move,
-                                "uci": move.uci()
-                            })
-                            board.push(move)
-                        else:
-                            print(f"Illegal move detected: {move.uci()} in {game.headers.get('Event', 'Unknown')}")
-                            break
-                    except Exception as e:
-                        print(f"Error processing move {move.uci()}: {e}")
-                        break
-
-                if moves:
-                    lines.append({
-                        'name': game.headers.get('Event', 'Main Line'),
-                        'moves': moves,
-                    })
-            except Exception as e:
-                print(f"Error processing a PGN game: {e}")
-                continue
-        return lines
-    
-    def get_openings_by_category(self):
-        """Return the openings grouped by category"""
-        return self.openings_by_category
-    
-    def get_opening_lines(self, opening_name):
-        """Return the lines of an opening"""
-        for category in self.openings_by_category.values():
-            for opening in category:
-                if opening['name'] == opening_name:
-                    return opening['lines']
-        return []
-
-    def get_opening_details(self, opening_name):
-        """Return the lines and category of an opening"""
-        for category, openings_list in self.openings_by_category.items():
-            for opening in openings_list:
-                if opening['name'] == opening_name:
-                    return opening['lines'], category
-        return None, None
-
-trainer = OpeningTrainer()
+# Dépôt compilé partagé par toutes les requêtes du processus. Compilé dès le
+# chargement du module : avec preload_app (gunicorn.conf.py), une seule fois
+# dans le maître gunicorn, avant le fork des workers.
+repository = OpeningRepository()
+repository.refresh()
+
+# Sauvegardes adressées par contenu (reprise des anciennes copies à plat de data/)
+backup_store = BackupStore(config.BACKUP_DIR, keep=config.BACKUP_KEEP, max_age_days=config.BACKUP_MAX_AGE_DAYS)
+backup_store.import_legacy(config.DATA_DIR)
+
+# Meilleurs scores, hors de openings.json (reprise des anciens champs best_score)
+score_store = ScoreStore(config.SCORES_FILE)
+score_store.import_from_openings(config.OPENINGS)
+
+def check_variation_pgn(pgn, color, category, opening_name, variation_index=None):
+    """Valide le PGN d'une variation et retourne un PGNValidation (erreurs positionnées,
+    coups compilés réutilisables par le trainer)"""
+    with config.METRICS.span('pgn_parse'):
+        validation = validate_line(pgn, color)
+    if not validation.valid:
+        logger.debug("validate_pgn: PGN invalide %r: %s", pgn, validation.errors[0]['message'])
+        return validation
+    
+    # Unicité de la ligne et transpositions, via l'index des positions finales du trainer
+    # (hors variation en cours d'édition)
+    exclude = (category, opening_name, variation_index) if variation_index is not None else None
+    duplicate, transpositions = repository.get_trainer().variation_index.find(
+        sequence_key(validation.moves), validation.zobrist, exclude)
+    if duplicate:
+        _, other_opening, _, other_variation = duplicate
+        validation.add_error('duplicate_pgn', f"PGN déjà utilisé par {other_opening} / {other_variation}")
+        return validation
+    for other_category, other_opening, _, other_variation in transpositions:
+        validation.warnings.append({
+            'code': 'transposition',
+            'message': f"Cette ligne transpose dans {other_opening} {other_variation}",
+            'category': other_category,
+            'opening': other_opening,
+            'variation': other_variation,
+        })
+    return validation
 
 def validate_pgn(pgn, color, category, opening_name, variation_index=None):
-    import chess.pgn
-    from io import StringIO
-    import re
-    
-    print(f"DEBUG validate_pgn: pgn='{pgn}', color='{color}', category='{category}'")
-    
-    # Vérifier les caractères autorisés dans le PGN
-    allowed_chars = r'^[0-9\.\s\w\+\#\=\-\*\!\?]+$'
-    if not re.match(allowed_chars, pgn):
-        print(f"DEBUG: Échec - caractères non autorisés")
-        return False, "Invalid PGN"
-    
-    # Vérifier le format PGN de base
-    # Doit commencer par 1. et avoir des espaces entre les coups
-    if not pgn.strip().startswith('1.'):
-        print(f"DEBUG: Échec - ne commence pas par 1.")
-        return False, "Invalid PGN"
-    
-    # Vérifier qu'il y a des espaces entre les coups (pas de format compact comme "bg20")
-    if not re.search(r'\d+\.\s+\w+', pgn):
-        print(f"DEBUG: Échec - format compact détecté")
-        return False, "Invalid PGN"
-    
-    # Vérifier que les numéros de coups sont séquentiels
-    move_numbers = re.findall(r'(\d+)\.', pgn)
-    for i, num in enumerate(move_numbers):
-        if int(num) != i + 1:
-            print(f"DEBUG: Échec - numéros de coups non séquentiels")
-            return False, "Invalid PGN"
-    
-    try:
-        pgn_io = StringIO(pgn)
-        game = chess.pgn.read_game(pgn_io)
-        if game is None:
-            print(f"DEBUG: Échec - PGN impossible à lire")
-            return False, "Invalid PGN"
-        board = game.board()
-        moves = list(game.mainline_moves())
-        if not moves:
-            print(f"DEBUG: Échec - aucun coup trouvé")
-            return False, "Invalid PGN"
-        print(f"DEBUG: {len(moves)} coups trouvés")
-        board = chess.Board()
-        for move in moves:
-            if move not in board.legal_moves:
-                print(f"DEBUG: Échec - coup illégal: {move}")
-                return False, "Invalid PGN"
-            board.push(move)
-        
-        # Vérifier que le PGN original correspond au PGN parsé
-        # Cela détecte les formats incorrects comme "Bg20" qui sont interprétés comme "Bg2"
-        reconstructed_pgn = ""
-        board = chess.Board()
-        for i, move in enumerate(moves):
-            if i % 2 == 0:
-                reconstructed_pgn += f"{i//2 + 1}. "
-            reconstructed_pgn += board.san(move) + " "
-            board.push(move)
-        reconstructed_pgn = reconstructed_pgn.strip()
-        
-        # Normaliser les deux PGNs pour la comparaison (supprimer les espaces multiples, etc.)
-        original_normalized = re.sub(r'\s+', ' ', pgn.strip())
-        reconstructed_normalized = re.sub(r'\s+', ' ', reconstructed_pgn)
-        
-        # Supprimer les symboles de fin de partie (*, #, =, etc.) pour la comparaison
-        original_clean = re.sub(r'\s*[\*#=]\s*$', '', original_normalized)
-        reconstructed_clean = re.sub(r'\s*[\*#=]\s*$', '', reconstructed_normalized)
-        
-        if original_clean != reconstructed_clean:
-            return False, "Invalid PGN"
-        
-        # Vérifier que le nombre de coups est cohérent avec la couleur du dernier coup
-        # Pour une ouverture Attack (blancs), le dernier coup doit être blanc (nombre impair de coups)
-        # Pour une ouverture Defense (noirs), le dernier coup doit être noir (nombre pair de coups)
-        print(f"DEBUG: len(moves)={len(moves)}, color={color}, len(moves)%2={len(moves)%2}")
-        if color == 'white' and len(moves) % 2 == 0:
-            print(f"DEBUG: Échec - blancs avec nombre pair de coups")
-            return False, "Invalid PGN"
-        if color == 'black' and len(moves) % 2 == 1:
-            print(f"DEBUG: Échec - noirs avec nombre impair de coups")
-            return False, "Invalid PGN"
-    except Exception as e:
-        print(f"DEBUG: Exception: {e}")
-        return False, "Invalid PGN"
-    
-    print(f"DEBUG: Vérification unicité...")
-    all_pgns = set()
-    for cat, openings in config.OPENINGS.items():
-        for opening in openings:
-            for idx, variation in enumerate(opening['variations']):
-                if cat == category and opening['name'] == opening_name and variation_index is not None and idx == variation_index:
-                    continue
-                all_pgns.add(variation['pgn'].strip())
-    
-    if pgn.strip() in all_pgns:
-        print(f"DEBUG: Échec - PGN déjà existant")
-        return False, "Invalid PGN"
-    
-    print(f"DEBUG: Vérification couleur du dernier coup...")
-    last_move_color = 'white' if len(moves) % 2 == 1 else 'black'
-    print(f"DEBUG: last_move_color={last_move_color}, expected_color={color}")
-    if last_move_color != color:
-        print(f"DEBUG: Échec - couleur du dernier coup incorrecte")
-        return False, "Invalid PGN"
-    
-    print(f"DEBUG: PGN valide!")
-    return True, None
+    """Retourne (est_valide, message d'erreur)"""
+    validation = check_variation_pgn(pgn, color, category, opening_name, variation_index)
+    return validation.valid, validation.message
 
 # Supprimer cette fonction dupliquée et utiliser directement config.save_openings_to_json()
 
+# Lignes de chaque ouverture sérialisées une seule fois : l'entrée reste valable
+# tant que le trainer sert la même liste de lignes (recréée à chaque recompilation)
+_line_bundles = {}
+
+def get_line_bundle(opening_name):
+    """Retourne (version, corps JSON) des lignes d'une ouverture, ou (None, None)"""
+    lines, category = repository.get_trainer().get_opening_details(opening_name)
+    if category is None:
+        return None, None
+    cached = _line_bundles.get(opening_name)
+    if cached is not None and cached[0] is lines:
+        return cached[1], cached[2]
+    body = json.dumps({'opening': opening_name, 'category': category, 'lines': lines},
+                      ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    version = hashlib.sha256(body).hexdigest()[:20]
+    _line_bundles[opening_name] = (lines, version, body)
+    return version, body
+
+# Pages rendues, resservies tant que le contenu de openings.json ne change pas
+page_cache = PageCache()
+
+def cached_page(key, template_name, render_context):
+    """Sert une page depuis le cache de rendu, avec ETag/Last-Modified et 304.
+
+    render_context() retourne le contexte du modèle ; il n'est appelé que si la
+    page n'est pas en cache pour la génération courante du corpus.
+    """
+    repository.get_trainer()
+    
+    def render():
+        html = render_template(template_name, **render_context())
+        # Dernière modification : données ou modèle, le plus récent des deux
+        mtimes = [os.path.getmtime(path) for path in (config.OPENINGS_FILE, os.path.join(app.template_folder, template_name))
+                  if os.path.exists(path)]
+        return html, datetime.fromtimestamp(int(max(mtimes, default=time.time())), tz=timezone.utc)
+    
+    etag, last_modified, body = page_cache.get(key, repository.content_hash, render)
+    response = make_response(body)
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    # Gardée par le navigateur mais revalidée à chaque visite (304 si inchangée)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
 @app.route('/')
 def index():
     """Home page with the main menu"""
-    print(f"📄 Page d'accueil demandée - {datetime.now().strftime('%H:%M:%S')}")
-    # Recharger les données depuis le fichier pour s'assurer qu'elles sont à jour
-    config.load_openings_from_json()
-    # Recréer l'instance trainer avec les données mises à jour
-    global trainer
-    trainer = OpeningTrainer()
-    openings_by_category = trainer.get_openings_by_category()
-    
-    # Trier les ouvertures par ordre alphabétique dans chaque catégorie
-    for category in openings_by_category:
-        openings_by_category[category].sort(key=lambda x: x['name'].lower())
-    
-    # Headers pour éviter le cache
-    response = make_response(render_template('index.html', openings_by_category=openings_by_category))
-    response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
-    response.headers['Pragma'] = 'no-cache'
-    response.headers['Expires'] = '0'
-    return response
+    logger.debug("Page d'accueil demandée")
+    
+    def render_context():
+        # Le dépôt ne recompile que si le fichier de données a changé
+        trainer = repository.get_trainer()
+        # Trier les ouvertures par ordre alphabétique dans chaque catégorie
+        # (copies triées : les listes du trainer partagé gardent l'ordre du fichier)
+        openings_by_category = {
+            category: sorted(openings, key=lambda x: x['name'].lower())
+            for category, openings in trainer.get_openings_by_category().items()
+        }
+        return {'openings_by_category': openings_by_category}
+    
+    return cached_page(('index.html',), 'index.html', render_context)
 
 @app.route('/opening/<opening_name>')
 def opening_page(opening_name):
     """Game page for a specific opening"""
-    # Recharger les données depuis le fichier pour s'assurer qu'elles sont à jour
-    config.load_openings_from_json()
-    # Recréer l'instance trainer avec les données mises à jour
-    global trainer
-    trainer = OpeningTrainer()
+    # Le dépôt ne recompile que si le fichier de données a changé
+    trainer = repository.get_trainer()
     lines, category = trainer.get_opening_details(opening_name)
     if category is None:
         return "Opening not found", 404
     
-    # DÉFINITION ROBUSTE DE L'ORIENTATION
-    defense_openings = ['Albin Countergambit', 'Sicilian Defense', 'French Defense', 'Caro-Kann Defense']
-    is_defense = any(defense in opening_name for defense in defense_openings) or category == 'Defense'
-    
-    orientation = 'black' if is_defense else 'white'
-    
-    # DEBUG CRITIQUE: Logs pour diagnostiquer l'orientation
-    print(f"=== ORIENTATION DEBUG ===")
-    print(f"Opening name: {opening_name}")
-    print(f"Category: {category}")
-    print(f"Is defense opening: {is_defense}")
-    print(f"Calculated orientation: {orientation}")
-    print(f"=== END ORIENTATION DEBUG ===")
+    def render_context():
+        # DÉFINITION ROBUSTE DE L'ORIENTATION
+        defense_openings = ['Albin Countergambit', 'Sicilian Defense', 'French Defense', 'Caro-Kann Defense']
+        is_defense = any(defense in opening_name for defense in defense_openings) or category == 'Defense'
+        
+        orientation = 'black' if is_defense else 'white'
+        
+        logger.debug("Orientation de %r (catégorie %s, défense=%s): %s",
+                     opening_name, category, is_defense, orientation)
+        
+        # Les coups des lignes sont chargés à part, par une URL versionnée mise en cache par
+        # le navigateur ; seuls leurs noms sont rendus dans la page (sélecteur de ligne)
+        lines_version, _ = get_line_bundle(opening_name)
+        lines_url = url_for('opening_lines', opening_name=opening_name, v=lines_version)
+        return {'opening_name': opening_name, 'lines_url': lines_url, 'orientation': orientation,
+                'line_names': [line['name'] for line in lines]}
     
-    return render_template('opening.html', opening_name=opening_name, lines=lines, orientation=orientation)
+    return cached_page(('opening.html', opening_name), 'opening.html', render_context)
+
+@app.route('/api/openings/<opening_name>/lines')
+def opening_lines(opening_name):
+    """Lignes compilées d'une ouverture, avec un ETag fort dérivé de leur contenu.
+
+    Demandée avec ?v=<version courante>, la réponse est immuable et mise en cache
+    un an ; sans version (ou avec une version périmée), elle est revalidée à chaque
+    utilisation et un If-None-Match correspondant reçoit un 304 sans corps.
+    """
+    version, body = get_line_bundle(opening_name)
+    if version is None:
+        return jsonify({'error': 'Opening not found'}), 404
+    response = app.response_class(body, mimetype='application/json')
+    response.set_etag(version)
+    if request.args.get('v') == version:
+        response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    else:
+        response.headers['Cache-Control'] = 'public, no-cache'
+    return response.make_conditional(request)
 
 # Routes de sécurité pour l'administration
 @app.route('/admin/login', methods=['GET', 'POST'])
@@ -583,8 +545,8 @@ def admin_logout():
 @app.route('/openings/settings', methods=['GET'])
 @require_admin_auth
 def opening_settings():
-    # Recharger les données depuis le fichier pour s'assurer qu'elles sont à jour
-    config.load_openings_from_json()
+    # Recharger les données depuis le fichier si elles ont changé
+    repository.refresh()
     
     # Préparer la liste des ouvertures sous forme plate (catégorie, nom, variations)
     openings = []
@@ -603,6 +565,7 @@ def opening_settings():
 
 @app.route('/openings/settings/add', methods=['POST'])
 @require_admin_auth
+@openings_mutation
 def add_opening():
     # Accepte JSON ou form classique
     if request.is_json:
@@ -613,59 +576,51 @@ def add_opening():
         category = request.form.get('category')
         name = request.form.get('name')
     
-    print(f"DEBUG add_opening: category='{category}', name='{name}'")
-    print(f"DEBUG: config.OPENINGS keys avant: {list(config.OPENINGS.keys())}")
+    logger.debug("add_opening: category=%r, name=%r", category, name)
+    logger.debug("config.OPENINGS keys avant: %s", config.OPENINGS.keys())
     
     if not (category and name):
         return jsonify({'error': 'Données manquantes'}), 400
     
-    # Recharger les données depuis le fichier pour s'assurer qu'elles sont à jour
-    config.load_openings_from_json()
-    print(f"DEBUG: config.OPENINGS keys après rechargement: {list(config.OPENINGS.keys())}")
-    print(f"DEBUG: config.OPENINGS[{category}] existe: {category in config.OPENINGS}")
+    # Recharger les données depuis le fichier si elles ont changé
+    repository.refresh()
+    logger.debug("config.OPENINGS keys après rechargement: %s", config.OPENINGS.keys())
+    logger.debug("config.OPENINGS[%s] existe: %s", category, category in config.OPENINGS)
     
-    # Vérifier unicité dans toutes les catégories
-    for cat, openings in config.OPENINGS.items():
-        for opening in openings:
-            if opening['name'].strip().lower() == name.strip().lower():
-                return jsonify({'error': 'Ce nom existe déjà'}), 400
+    # Vérifier unicité dans toutes les catégories (index insensible à la casse)
+    _, existing_opening = repository.find_opening_folded(name)
+    if existing_opening is not None:
+        return jsonify({'error': 'Ce nom existe déjà'}), 400
     
     # Ajoute à la structure en mémoire
-    if category in config.OPENINGS:
-        config.OPENINGS[category].append({
-            'name': name.strip(),
-            'variations': []
-        })
-    else:
-        config.OPENINGS[category] = [{
-            'name': name.strip(),
-            'variations': []
-        }]
+    new_opening = {
+        'name': name.strip(),
+        'variations': []
+    }
+    config.OPENINGS.setdefault(category, []).append(new_opening)
     
     # Sauvegarder dans le fichier JSON
-    print(f"DEBUG: Tentative de sauvegarde pour '{name}' dans la catégorie '{category}'")
+    logger.debug("Tentative de sauvegarde pour %r dans la catégorie %r", name, category)
     if config.save_openings_to_json():
-        print(f"DEBUG: Ouverture '{name}' ajoutée avec succès")
+        # Ne recompiler que la nouvelle ouverture
+        repository.commit_opening(category, new_opening)
+        logger.debug("Ouverture %r ajoutée avec succès", name)
         
         # Synchroniser avec GitHub si configuré
         github_result = None
         if github_client:
-            github_result = sync_to_github()
-            print(f"DEBUG: Synchronisation GitHub: {github_result}")
+            github_result = github_sync_queue.request()
+            logger.debug("Synchronisation GitHub programmée: %s", github_result)
         
         # Recharger les données après la sauvegarde pour s'assurer qu'elles sont synchronisées
-        config.load_openings_from_json()
-        print(f"DEBUG: Après rechargement, config.OPENINGS[{category}] contient: {[op['name'] for op in config.OPENINGS.get(category, [])]}")
+        repository.refresh()
         
         # Vérifier que l'ouverture a bien été ajoutée
-        opening_added = False
-        for opening in config.OPENINGS.get(category, []):
-            if opening['name'] == name.strip():
-                opening_added = True
-                break
+        _, added_opening = repository.find_opening(name.strip(), category)
+        opening_added = added_opening is not None
         
         if opening_added:
-            print(f"DEBUG: Ouverture '{name}' confirmée dans la structure")
+            logger.debug("Ouverture %r confirmée dans la structure", name)
             response = {
                 'success': True,
                 'message': f'Ouverture "{name}" ajoutée avec succès',
@@ -677,20 +632,18 @@ def add_opening():
             }
             if github_result:
                 response['github_sync'] = github_result
-                if github_result.get('success'):
-                    response['message'] += ' et synchronisée avec GitHub'
-                else:
-                    response['message'] += ' (erreur de synchronisation GitHub)'
+                response['message'] += ' (synchronisation GitHub programmée)'
             return jsonify(response)
         else:
-            print(f"DEBUG: ERREUR - Ouverture '{name}' non trouvée après ajout")
+            logger.warning("Ouverture %r non trouvée après ajout", name)
             return jsonify({'error': 'Erreur de synchronisation'}), 500
     else:
-        print("DEBUG: Erreur lors de la sauvegarde JSON")
+        logger.error("Erreur lors de la sauvegarde JSON")
         return jsonify({'error': 'Erreur lors de la sauvegarde'}), 500
 
 @app.route('/openings/settings/add_variation', methods=['POST'])
 @require_admin_auth
+@openings_mutation
 def add_variation():
     # Accepte JSON ou form classique
     if request.is_json:
@@ -705,117 +658,104 @@ def add_variation():
         var_title = request.form.get('variation_title')
         var_pgn = request.form.get('variation_pgn')
     
-    print(f"DEBUG add_variation: category='{category}', name='{name}', var_title='{var_title}'")
-    print(f"DEBUG config.OPENINGS keys: {list(config.OPENINGS.keys())}")
-    print(f"DEBUG: config.OPENINGS[{category}] existe: {category in config.OPENINGS}")
+    logger.debug("add_variation: category=%r, name=%r, var_title=%r", category, name, var_title)
+    logger.debug("config.OPENINGS keys: %s", config.OPENINGS.keys())
+    logger.debug("config.OPENINGS[%s] existe: %s", category, category in config.OPENINGS)
     
     if not (category and name and var_title and var_pgn):
         return jsonify({'error': 'Données manquantes'}), 400
     
-    # Recharger les données depuis le fichier pour s'assurer qu'elles sont à jour
-    config.load_openings_from_json()
+    # Recharger les données depuis le fichier si elles ont changé
+    repository.refresh()
     
-    print(f"DEBUG: Après rechargement, config.OPENINGS[{category}] contient: {[op['name'] for op in config.OPENINGS.get(category, [])]}")
-    print(f"DEBUG: Recherche de l'ouverture '{name}' dans la catégorie '{category}'")
+    logger.debug("Recherche de l'ouverture %r dans la catégorie %r", name, category)
     
-    if category in config.OPENINGS:
-        print(f"DEBUG openings in {category}: {[op['name'] for op in config.OPENINGS[category]]}")
-        # Vérification détaillée
-        for i, opening in enumerate(config.OPENINGS[category]):
-            print(f"DEBUG opening {i}: '{opening['name']}' vs '{name}' (match: {opening['name'] == name})")
-    else:
-        print(f"DEBUG: ERREUR - La catégorie '{category}' n'existe pas dans config.OPENINGS")
+    if category not in config.OPENINGS:
+        logger.warning("La catégorie %r n'existe pas dans config.OPENINGS", category)
         return jsonify({'error': 'Ouverture non trouvée'}), 404
     
     # Chercher l'ouverture et ajouter la variation
-    opening_found = False
-    for opening in config.OPENINGS.get(category, []):
-        if opening['name'] == name:
-            opening_found = True
-            
-            # Déterminer la couleur attendue pour le dernier coup
-            color = 'white' if category == 'Attack' else 'black'
-            
-            # Validation PGN
-            is_valid, error_msg = validate_pgn(var_pgn, color, category, name)
-            if not is_valid:
-                print(f"DEBUG: PGN invalide - {error_msg}")
-                return jsonify({'error': error_msg}), 400
-            
-            # Vérifier l'unicité du nom de variation dans cette ouverture (en ignorant le préfixe #N)
-            print(f"DEBUG: Vérification unicité pour '{var_title}'")
-            # Extraire le nom sans le préfixe #N
-            var_title_clean = re.sub(r'^#\d+\s*', '', var_title.strip().lower())
-            print(f"DEBUG: Nom nettoyé: '{var_title_clean}'")
+    _, opening = repository.find_opening(name, category)
+    opening_found = opening is not None
+    if opening_found:
+        # Déterminer la couleur attendue pour le dernier coup
+        color = 'white' if category == 'Attack' else 'black'
+        
+        # Validation PGN
+        validation = check_variation_pgn(var_pgn, color, category, name)
+        if not validation.valid:
+            return jsonify({'error': validation.message, 'pgn_errors': validation.errors}), 400
+        
+        # Vérifier l'unicité du nom de variation dans cette ouverture (en ignorant le préfixe #N)
+        logger.debug("Vérification unicité pour %r", var_title)
+        # Extraire le nom sans le préfixe #N
+        var_title_clean = re.sub(r'^#\d+\s*', '', var_title.strip().lower())
+        logger.debug("Nom nettoyé: %r", var_title_clean)
+        
+        for variation in opening['variations']:
+            variation_name_clean = re.sub(r'^#\d+\s*', '', variation['name'].strip().lower())
+            logger.debug("Comparaison %r vs %r", variation_name_clean, var_title_clean)
+            if variation_name_clean == var_title_clean:
+                logger.debug("Nom en double trouvé!")
+                return jsonify({'error': 'Une variation avec ce nom existe déjà dans cette ouverture'}), 400
+        
+        opening['variations'].append({'name': var_title.strip(), 'pgn': var_pgn.strip()})
+        # Sauvegarder dans le fichier JSON
+        if config.save_openings_to_json():
+            # La nouvelle variation réutilise les coups compilés par la validation
+            repository.commit_opening(category, opening, precompiled=validation.compiled_lines(var_title.strip()))
+            logger.debug("Variation ajoutée avec succès à %r", name)
             
-            for variation in opening['variations']:
-                variation_name_clean = re.sub(r'^#\d+\s*', '', variation['name'].strip().lower())
-                print(f"DEBUG: Comparaison '{variation_name_clean}' vs '{var_title_clean}'")
-                if variation_name_clean == var_title_clean:
-                    print(f"DEBUG: Nom en double trouvé!")
-                    return jsonify({'error': 'Une variation avec ce nom existe déjà dans cette ouverture'}), 400
+            # Synchroniser avec GitHub si configuré
+            github_result = None
+            if github_client:
+                github_result = github_sync_queue.request()
+                logger.debug("Synchronisation GitHub programmée: %s", github_result)
             
-            opening['variations'].append({'name': var_title.strip(), 'pgn': var_pgn.strip()})
-            # Sauvegarder dans le fichier JSON
-            if config.save_openings_to_json():
-                print(f"DEBUG: Variation ajoutée avec succès à '{name}'")
-                
-                # Synchroniser avec GitHub si configuré
-                github_result = None
-                if github_client:
-                    github_result = sync_to_github()
-                    print(f"DEBUG: Synchronisation GitHub: {github_result}")
-                
-                response = {'success': True}
-                if github_result:
-                    response['github_sync'] = github_result
-                return jsonify(response)
-            else:
-                print("DEBUG: Erreur lors de la sauvegarde JSON")
-                return jsonify({'error': 'Erreur lors de la sauvegarde'}), 500
+            response = {'success': True}
+            if github_result:
+                response['github_sync'] = github_result
+            if validation.warnings:
+                response['warnings'] = validation.warnings
+            return jsonify(response)
+        else:
+            logger.error("Erreur lors de la sauvegarde JSON")
+            return jsonify({'error': 'Erreur lors de la sauvegarde'}), 500
     
     # Si l'ouverture n'a pas été trouvée, la créer automatiquement
-    if not opening_found:
-        print(f"DEBUG: Ouverture '{name}' non trouvée, création automatique")
-        if category in config.OPENINGS:
-            config.OPENINGS[category].append({
-                'name': name,
-                'variations': []
-            })
-        else:
-            config.OPENINGS[category] = [{
-                'name': name,
-                'variations': []
-            }]
-        
-        # Sauvegarder l'ouverture
-        if not config.save_openings_to_json():
-            return jsonify({'error': 'Erreur lors de la création de l\'ouverture'}), 500
+    logger.debug("Ouverture %r non trouvée, création automatique", name)
+    opening = {
+        'name': name,
+        'variations': []
+    }
+    config.OPENINGS[category].append(opening)
+    
+    # Sauvegarder l'ouverture
+    if not config.save_openings_to_json():
+        return jsonify({'error': 'Erreur lors de la création de l\'ouverture'}), 500
+    
+    # Maintenant ajouter la variation
+    opening['variations'].append({'name': var_title.strip(), 'pgn': var_pgn.strip()})
+    if config.save_openings_to_json():
+        repository.commit_opening(category, opening)
+        logger.debug("Ouverture créée et variation ajoutée avec succès")
         
-        # Maintenant ajouter la variation
-        for opening in config.OPENINGS.get(category, []):
-            if opening['name'] == name:
-                opening['variations'].append({'name': var_title.strip(), 'pgn': var_pgn.strip()})
-                if config.save_openings_to_json():
-                    print(f"DEBUG: Ouverture créée et variation ajoutée avec succès")
-                    
-                    # Synchroniser avec GitHub si configuré
-                    github_result = None
-                    if github_client:
-                        github_result = sync_to_github()
-                        print(f"DEBUG: Synchronisation GitHub: {github_result}")
-                    
-                    response = {'success': True}
-                    if github_result:
-                        response['github_sync'] = github_result
-                    return jsonify(response)
-                else:
-                    return jsonify({'error': 'Erreur lors de la sauvegarde'}), 500
+        # Synchroniser avec GitHub si configuré
+        github_result = None
+        if github_client:
+            github_result = github_sync_queue.request()
+            logger.debug("Synchronisation GitHub programmée: %s", github_result)
         
-        return jsonify({'error': 'Erreur inattendue'}), 500
+        response = {'success': True}
+        if github_result:
+            response['github_sync'] = github_result
+        return jsonify(response)
+    else:
+        return jsonify({'error': 'Erreur lors de la sauvegarde'}), 500
 
 @app.route('/openings/settings/edit_variation', methods=['POST'])
 @require_admin_auth
+@openings_mutation
 def edit_variation():
     data = request.get_json()
     category = data.get('category')
@@ -824,7 +764,7 @@ def edit_variation():
     new_title = data.get('new_title')
     new_pgn = data.get('new_pgn')
     
-    print(f"DEBUG edit_variation: category='{category}', opening='{opening_name}', index={variation_index}")
+    logger.debug("edit_variation: category=%r, opening=%r, index=%s", category, opening_name, variation_index)
     
     if not (category and opening_name and new_title and new_pgn and variation_index is not None):
         return jsonify({'error': 'Missing data'}), 400
@@ -834,63 +774,68 @@ def edit_variation():
     except Exception:
         return jsonify({'error': 'Invalid index'}), 400
     
-    # Recharger les données depuis le fichier pour s'assurer qu'elles sont à jour
-    config.load_openings_from_json()
+    # Recharger les données depuis le fichier si elles ont changé
+    repository.refresh()
     
     # Déterminer la couleur attendue pour le dernier coup
     color = 'white' if category == 'Attack' else 'black'
     
     # Validation PGN
-    is_valid, error_msg = validate_pgn(new_pgn, color, category, opening_name, variation_index)
-    if not is_valid:
-        return jsonify({'error': error_msg}), 400
-    
-    # Chercher l'ouverture
-    for opening in config.OPENINGS.get(category, []):
-        if opening['name'] == opening_name:
-            if 0 <= variation_index < len(opening['variations']):
-                # Vérifier l'unicité du nom de variation (en excluant la variation actuelle et en ignorant le préfixe #N)
-                new_title_clean = re.sub(r'^#\d+\s*', '', new_title.strip().lower())
-                for i, variation in enumerate(opening['variations']):
-                    if i != variation_index:
-                        variation_name_clean = re.sub(r'^#\d+\s*', '', variation['name'].strip().lower())
-                        if variation_name_clean == new_title_clean:
-                            return jsonify({'error': 'Une variation avec ce nom existe déjà dans cette ouverture'}), 400
+    validation = check_variation_pgn(new_pgn, color, category, opening_name, variation_index)
+    if not validation.valid:
+        return jsonify({'error': validation.message, 'pgn_errors': validation.errors}), 400
+    
+    # Chercher l'ouverture (index par catégorie et nom)
+    _, opening = repository.find_opening(opening_name, category)
+    if opening is not None:
+        if 0 <= variation_index < len(opening['variations']):
+            # Vérifier l'unicité du nom de variation (en excluant la variation actuelle et en ignorant le préfixe #N)
+            new_title_clean = re.sub(r'^#\d+\s*', '', new_title.strip().lower())
+            for i, variation in enumerate(opening['variations']):
+                if i != variation_index:
+                    variation_name_clean = re.sub(r'^#\d+\s*', '', variation['name'].strip().lower())
+                    if variation_name_clean == new_title_clean:
+                        return jsonify({'error': 'Une variation avec ce nom existe déjà dans cette ouverture'}), 400
+            
+            opening['variations'][variation_index]['name'] = new_title.strip()
+            opening['variations'][variation_index]['pgn'] = new_pgn.strip()
+            # Sauvegarder dans le fichier JSON
+            if config.save_openings_to_json():
+                # La variation modifiée réutilise les coups compilés par la validation
+                repository.commit_opening(category, opening, precompiled=validation.compiled_lines(new_title.strip()))
+                logger.debug("Variation %s modifiée avec succès dans %r", variation_index, opening_name)
                 
-                opening['variations'][variation_index]['name'] = new_title.strip()
-                opening['variations'][variation_index]['pgn'] = new_pgn.strip()
-                # Sauvegarder dans le fichier JSON
-                if config.save_openings_to_json():
-                    print(f"DEBUG: Variation {variation_index} modifiée avec succès dans '{opening_name}'")
-                    
-                    # Synchroniser avec GitHub si configuré
-                    github_result = None
-                    if github_client:
-                        github_result = sync_to_github()
-                        print(f"DEBUG: Synchronisation GitHub: {github_result}")
-                    
-                    response = {'success': True}
-                    if github_result:
-                        response['github_sync'] = github_result
-                    return jsonify(response)
-                else:
-                    print("DEBUG: Erreur lors de la sauvegarde JSON")
-                    return jsonify({'error': 'Erreur lors de la sauvegarde sur disque'}), 500
+                # Synchroniser avec GitHub si configuré
+                github_result = None
+                if github_client:
+                    github_result = github_sync_queue.request()
+                    logger.debug("Synchronisation GitHub programmée: %s", github_result)
+                
+                response = {'success': True}
+                if github_result:
+                    response['github_sync'] = github_result
+                if validation.warnings:
+                    response['warnings'] = validation.warnings
+                return jsonify(response)
             else:
-                return jsonify({'error': 'Variation index out of range'}), 400
+                logger.error("Erreur lors de la sauvegarde JSON")
+                return jsonify({'error': 'Erreur lors de la sauvegarde sur disque'}), 500
+        else:
+            return jsonify({'error': 'Variation index out of range'}), 400
     
-    print(f"DEBUG: Ouverture '{opening_name}' non trouvée dans la catégorie '{category}'")
+    logger.debug("Ouverture %r non trouvée dans la catégorie %r", opening_name, category)
     return jsonify({'error': 'Opening not found'}), 404
 
 @app.route('/openings/settings/delete_variation', methods=['POST'])
 @require_admin_auth
+@openings_mutation
 def delete_variation():
     data = request.get_json()
     category = data.get('category')
     opening_name = data.get('opening')
     variation_index = data.get('variation_index')
     
-    print(f"DEBUG delete_variation: category='{category}', opening='{opening_name}', index={variation_index}")
+    logger.debug("delete_variation: category=%r, opening=%r, index=%s", category, opening_name, variation_index)
     
     if not (category and opening_name and variation_index is not None):
         return jsonify({'error': 'Missing data'}), 400
@@ -900,40 +845,42 @@ def delete_variation():
     except Exception:
         return jsonify({'error': 'Invalid index'}), 400
     
-    # Recharger les données depuis le fichier pour s'assurer qu'elles sont à jour
-    config.load_openings_from_json()
+    # Recharger les données depuis le fichier si elles ont changé
+    repository.refresh()
     
-    # Chercher l'ouverture
-    for opening in config.OPENINGS.get(category, []):
-        if opening['name'] == opening_name:
-            if 0 <= variation_index < len(opening['variations']):
-                # Supprimer la variation
-                deleted_variation = opening['variations'].pop(variation_index)
-                # Sauvegarder dans le fichier JSON
-                if config.save_openings_to_json():
-                    print(f"DEBUG: Variation {variation_index} supprimée avec succès de '{opening_name}'")
-                    
-                    # Synchroniser avec GitHub si configuré
-                    github_result = None
-                    if github_client:
-                        github_result = sync_to_github()
-                        print(f"DEBUG: Synchronisation GitHub: {github_result}")
-                    
-                    response = {'success': True}
-                    if github_result:
-                        response['github_sync'] = github_result
-                    return jsonify(response)
-                else:
-                    print("DEBUG: Erreur lors de la sauvegarde JSON")
-                    return jsonify({'error': 'Erreur lors de la sauvegarde sur disque'}), 500
+    # Chercher l'ouverture (index par catégorie et nom)
+    _, opening = repository.find_opening(opening_name, category)
+    if opening is not None:
+        if 0 <= variation_index < len(opening['variations']):
+            # Supprimer la variation
+            deleted_variation = opening['variations'].pop(variation_index)
+            # Sauvegarder dans le fichier JSON
+            if config.save_openings_to_json():
+                repository.commit_opening(category, opening)
+                logger.debug("Variation %s supprimée avec succès de %r", variation_index, opening_name)
+                
+                # Synchroniser avec GitHub si configuré
+                github_result = None
+                if github_client:
+                    github_result = github_sync_queue.request()
+                    logger.debug("Synchronisation GitHub programmée: %s", github_result)
+                
+                response = {'success': True}
+                if github_result:
+                    response['github_sync'] = github_result
+                return jsonify(response)
             else:
-                return jsonify({'error': 'Variation index out of range'}), 400
+                logger.error("Erreur lors de la sauvegarde JSON")
+                return jsonify({'error': 'Erreur lors de la sauvegarde sur disque'}), 500
+        else:
+            return jsonify({'error': 'Variation index out of range'}), 400
     
-    print(f"DEBUG: Ouverture '{opening_name}' non trouvée dans la catégorie '{category}'")
+    logger.debug("Ouverture %r non trouvée dans la catégorie %r", opening_name, category)
     return jsonify({'error': 'Opening not found'}), 404
 
 @app.route('/openings/settings/delete_opening', methods=['POST'])
 @require_admin_auth
+@openings_mutation
 def delete_opening():
     # Accepte JSON ou form classique
     if request.is_json:
@@ -944,46 +891,101 @@ def delete_opening():
         category = request.form.get('category')
         name = request.form.get('name')
     
-    print(f"DEBUG delete_opening: category='{category}', name='{name}'")
+    logger.debug("delete_opening: category=%r, name=%r", category, name)
     
     if not (category and name):
         return jsonify({'error': 'Données manquantes'}), 400
     
-    # Recharger les données depuis le fichier pour s'assurer qu'elles sont à jour
-    config.load_openings_from_json()
+    # Recharger les données depuis le fichier si elles ont changé
+    repository.refresh()
     
     # Chercher et supprimer l'ouverture
-    if category in config.OPENINGS:
-        for i, opening in enumerate(config.OPENINGS[category]):
-            if opening['name'] == name:
-                del config.OPENINGS[category][i]
-                
-                # Sauvegarder dans le fichier JSON
-                if config.save_openings_to_json():
-                    print(f"DEBUG: Ouverture '{name}' supprimée avec succès")
-                    
-                    # Synchroniser avec GitHub si configuré
-                    github_result = None
-                    if github_client:
-                        github_result = sync_to_github()
-                        print(f"DEBUG: Synchronisation GitHub: {github_result}")
-                    
-                    response = {'success': True}
-                    if github_result:
-                        response['github_sync'] = github_result
-                    return jsonify(response)
-                else:
-                    print("DEBUG: Erreur lors de la sauvegarde JSON")
-                    return jsonify({'error': 'Erreur lors de la sauvegarde'}), 500
+    _, opening = repository.find_opening(name, category)
+    if opening is not None:
+        config.OPENINGS[category].remove(opening)
+        
+        # Sauvegarder dans le fichier JSON
+        if config.save_openings_to_json():
+            repository.commit_opening(category, opening, removed=True)
+            logger.debug("Ouverture %r supprimée avec succès", name)
+            
+            # Synchroniser avec GitHub si configuré
+            github_result = None
+            if github_client:
+                github_result = github_sync_queue.request()
+                logger.debug("Synchronisation GitHub programmée: %s", github_result)
+            
+            response = {'success': True}
+            if github_result:
+                response['github_sync'] = github_result
+            return jsonify(response)
+        else:
+            logger.error("Erreur lors de la sauvegarde JSON")
+            return jsonify({'error': 'Erreur lors de la sauvegarde'}), 500
     
     return jsonify({'error': 'Ouverture non trouvée'}), 404
 
+def import_pgn(lines, category, workers=None):
+    """Importe toutes les parties d'un flux PGN dans une catégorie.
+
+    Les parties sont analysées en parallèle hors du verrou ; l'ajout au corpus, la
+    sauvegarde (une seule, atomique) et la recompilation des ouvertures touchées se
+    font ensuite sous le verrou, suivis d'une seule synchronisation GitHub.
+    Retourne (rapport, code HTTP).
+    """
+    color = 'white' if category == 'Attack' else 'black'
+    with config.METRICS.span('pgn_import'):
+        results = list(parse_games(lines, color, workers or config.PGN_IMPORT_WORKERS or None))
+    
+    with repository.mutation():
+        report, changes = merge_games(results, category, config.OPENINGS[category],
+                                      repository.find_opening, repository.find_opening_folded,
+                                      repository.get_trainer().variation_index)
+        logger.info("import_pgn: %d/%d partie(s) importée(s) dans %s, %d ignorée(s)",
+                    report['imported'], report['games'], category, len(report['skipped']))
+        if not changes:
+            return report, 200
+        
+        # Sauvegarde de l'état avant import, qui peut toucher beaucoup d'ouvertures
+        try:
+            with open(config.OPENINGS_FILE, 'rb') as f:
+                report['backup'] = backup_store.add(f.read(), 'before_import')['id']
+        except FileNotFoundError:
+            pass
+        
+        if not config.save_openings_to_json():
+            # Les ouvertures ont été modifiées en mémoire : on revient à l'état du fichier
+            repository.refresh(force=True)
+            report['error'] = 'Erreur lors de la sauvegarde'
+            return report, 500
+        repository.commit_openings(changes)
+    
+    if github_client:
+        report['github_sync'] = github_sync_queue.request()
+    return report, 200
+
+@app.route('/openings/settings/import_pgn', methods=['POST'])
+@require_admin_auth
+def import_pgn_route():
+    """Import en masse d'un fichier PGN multi-parties (champ 'pgn' d'un formulaire
+    multipart, ou corps brut de la requête) dans la catégorie donnée"""
+    category = request.args.get('category') or request.form.get('category')
+    if category not in config.OPENINGS:
+        return jsonify({'error': 'Catégorie invalide'}), 400
+    upload = request.files.get('pgn')
+    stream = upload.stream if upload else request.stream
+    lines = io.TextIOWrapper(stream, encoding='utf-8', errors='replace')
+    report, status = import_pgn(lines, category)
+    report['success'] = status == 200
+    return jsonify(report), status
+
 # Routes de synchronisation GitHub
 @app.route('/openings/settings/sync_to_github', methods=['POST'])
 @require_admin_auth
 def sync_to_github_route():
     """Synchronise les données locales vers GitHub"""
-    result = sync_to_github()
+    # Envoi immédiat, qui inclut les éditions encore en attente dans la file
+    result = github_sync_queue.run_now()
     
     # Ajouter des informations supplémentaires
     if result.get('success'):
@@ -1003,6 +1005,7 @@ def sync_to_github_route():
 
 @app.route('/openings/settings/sync_from_github', methods=['POST'])
 @require_admin_auth
+@openings_mutation
 def sync_from_github_route():
     """Synchronise les données depuis GitHub vers local"""
     result = sync_from_github()
@@ -1023,6 +1026,32 @@ def sync_from_github_route():
     
     return jsonify(result)
 
+@app.route('/openings/settings/sync_job', methods=['GET'])
+@require_admin_auth
+def sync_job_status():
+    """État de la synchronisation GitHub en arrière-plan (pour ce worker)"""
+    return jsonify({
+        'github_configured': github_client is not None,
+        **github_sync_queue.status()
+    })
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Mesures de tous les workers au format texte de Prometheus.
+
+    Réservé à l'admin : session admin, ou en-tête `Authorization: Bearer <METRICS_TOKEN>`
+    pour un collecteur qui ne peut pas ouvrir de session.
+    """
+    authorization = request.headers.get('Authorization', '').encode('utf-8')
+    expected = f'Bearer {config.METRICS_TOKEN}'.encode('utf-8')
+    token_valid = bool(config.METRICS_TOKEN) and hmac.compare_digest(authorization, expected)
+    if not token_valid and not is_admin_authenticated():
+        return jsonify({'error': 'Authentification requise'}), 401
+    response = make_response(config.METRICS.render())
+    response.headers['Content-Type'] = 'text/plain; version=0.0.4; charset=utf-8'
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
 @app.route('/openings/settings/github_status', methods=['GET'])
 @require_admin_auth
 def github_status():
@@ -1048,12 +1077,8 @@ def github_status():
 def get_openings():
     """Retourne les ouvertures mises à jour"""
     try:
-        # Recharger les données depuis le fichier
-        config.load_openings_from_json()
-        
-        # Recréer l'instance trainer avec les données mises à jour
-        global trainer
-        trainer = OpeningTrainer()
+        # Recharger les données depuis le fichier si elles ont changé
+        repository.refresh()
         
         return jsonify({
             'success': True,
@@ -1066,6 +1091,37 @@ def get_openings():
             'error': str(e)
         }), 500
 
+@app.route('/openings/settings/export', methods=['GET'])
+@require_admin_auth
+def export_openings():
+    """Exporte le répertoire en flux : ?format=pgn (défaut) ou ndjson, filtrable
+    par ?category= et ?opening="""
+    export_format = request.args.get('format', 'pgn')
+    category = request.args.get('category') or None
+    opening_name = request.args.get('opening') or None
+    if export_format not in ('pgn', 'ndjson'):
+        return jsonify({'error': 'Format inconnu (pgn ou ndjson)'}), 400
+    
+    trainer = repository.get_trainer()
+    # Référence fixée au début : un rechargement pendant l'export ne mélange pas deux versions
+    openings = config.OPENINGS
+    if category is not None and category not in openings:
+        return jsonify({'error': 'Catégorie non trouvée'}), 404
+    if opening_name is not None and repository.find_opening(opening_name, category)[1] is None:
+        return jsonify({'error': 'Ouverture non trouvée'}), 404
+    
+    if export_format == 'pgn':
+        body = export_pgn(openings, category, opening_name)
+        mimetype = 'application/x-chess-pgn'
+    else:
+        body = export_ndjson(openings, category, opening_name, trainer.variation_lines)
+        mimetype = 'application/x-ndjson'
+    filename = 'sacthebook-' + '-'.join(re.sub(r'[^\w-]+', '_', part) for part in
+                                        filter(None, (category or 'all', opening_name)))
+    response = app.response_class(body, mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}.{export_format}"'
+    return response
+
 @app.route('/render_debug', methods=['GET'])
 @require_admin_auth
 def render_debug():
@@ -1146,10 +1202,11 @@ def test_sync_status():
     """Route de test pour vérifier l'état de la synchronisation"""
     try:
         # Vérifier le fichier local
-        with open('data/openings.json', 'r', encoding='utf-8') as f:
+        with open(config.OPENINGS_FILE, 'r', encoding='utf-8') as f:
             local_content = f.read()
         
         # Vérifier le trainer
+        trainer = repository.trainer
         trainer_categories = len(trainer.get_openings_by_category()) if trainer else 0
         
         # Vérifier config
@@ -1170,42 +1227,36 @@ def test_sync_status():
             'config_categories': 0
         })
 
-@app.route('/restore_backup/<filename>', methods=['POST'])
-def restore_backup(filename):
-    """Restaure une sauvegarde spécifique"""
+@app.route('/restore_backup/<backup_id>', methods=['POST'])
+@openings_mutation
+def restore_backup(backup_id):
+    """Restaure une sauvegarde spécifique (identifiant sha256 ou préfixe d'au moins 8 caractères)"""
     try:
-        backup_path = os.path.join('data', filename)
-        if not os.path.exists(backup_path):
-            return jsonify({'success': False, 'error': 'Sauvegarde non trouvée'}), 404
-        
         # Lire la sauvegarde
-        with open(backup_path, 'r', encoding='utf-8') as f:
-            backup_content = f.read()
+        backup_content = backup_store.read(backup_id)
+        if backup_content is None:
+            return jsonify({'success': False, 'error': 'Sauvegarde non trouvée'}), 404
+        backup_id = backup_store.find(backup_id)['id']
         
         # Créer une sauvegarde de l'état actuel
-        current_backup = f'data/restore_backup_{int(time.time())}.json'
+        current_backup = None
         try:
-            with open('data/openings.json', 'r', encoding='utf-8') as f:
-                current_content = f.read()
-            with open(current_backup, 'w', encoding='utf-8') as f:
-                f.write(current_content)
+            with open(config.OPENINGS_FILE, 'rb') as f:
+                current_backup = backup_store.add(f.read(), 'before_restore')['id']
         except FileNotFoundError:
             pass
         
         # Restaurer la sauvegarde
-        with open('data/openings.json', 'w', encoding='utf-8') as f:
-            f.write(backup_content)
+        config.write_openings_content(backup_content.decode('utf-8'))
         
-        # Recharger les données
-        config.load_openings_from_json()
-        global trainer
-        trainer = OpeningTrainer()
+        # Recompiler le dépôt avec les données restaurées
+        repository.commit()
         
         return jsonify({
             'success': True,
-            'message': f'Sauvegarde {filename} restaurée',
-            'backup_restored': filename,
-            'current_backup': current_backup if os.path.exists(current_backup) else None
+            'message': f'Sauvegarde {backup_id[:8]} restaurée',
+            'backup_restored': backup_id,
+            'current_backup': current_backup
         })
         
     except Exception as e:
@@ -1221,25 +1272,15 @@ def sync_status():
         })
     
     try:
-        # Lire le contenu local
-        try:
-            with open('data/openings.json', 'r', encoding='utf-8') as f:
-                local_content = f.read()
-            local_hash = hashlib.sha256(local_content.encode()).hexdigest()
-        except FileNotFoundError:
-            local_content = ""
-            local_hash = ""
+        # SHA de blob local, recalculé seulement si le fichier a changé
+        local_hash, local_size = local_openings_blob.get()
         
-        # Récupérer le contenu GitHub
+        # SHA de blob GitHub : requête conditionnelle sur les métadonnées, sans contenu
         try:
-            repo = github_client.get_repo(GITHUB_REPO)
-            file = repo.get_contents(GITHUB_FILE_PATH, ref=GITHUB_BRANCH)
-            github_content = base64.b64decode(file.content).decode('utf-8')
-            github_hash = hashlib.sha256(github_content.encode()).hexdigest()
+            github_hash, github_size = github_remote_blob.get(force=request.args.get('refresh') == '1')
             github_available = True
         except Exception as e:
-            github_content = ""
-            github_hash = ""
+            github_hash, github_size = None, 0
             github_available = False
             github_error = str(e)
         
@@ -1255,12 +1296,8 @@ def sync_status():
         else:
             status = 'out_of_sync'
         
-        # Vérifier les sauvegardes existantes
-        backup_files = []
-        if os.path.exists('data'):
-            for file in os.listdir('data'):
-                if file.startswith('openings_backup_') or file.startswith('openings_local_backup_'):
-                    backup_files.append(file)
+        # Sauvegardes existantes, depuis l'index (aucun parcours du dossier)
+        backup_files = backup_store.list()
         
         return jsonify({
             'github_configured': True,
@@ -1268,8 +1305,8 @@ def sync_status():
             'status': status,
             'local_hash': local_hash[:8] if local_hash else None,
             'github_hash': github_hash[:8] if github_hash else None,
-            'local_size': len(local_content),
-            'github_size': len(github_content),
+            'local_size': local_size,
+            'github_size': github_size,
             'backup_files': backup_files,
             'last_check': datetime.now().isoformat(),
             'github_error': github_error if not github_available else None
@@ -1286,8 +1323,7 @@ def sync_status():
 @app.route('/test_orientation/<opening_name>')
 def test_orientation(opening_name):
     """Route de test pour vérifier l'orientation d'une ouverture"""
-    config.load_openings_from_json()
-    trainer = OpeningTrainer()
+    trainer = repository.get_trainer()
     lines, category = trainer.get_opening_details(opening_name)
     
     if category is None:
@@ -1315,47 +1351,98 @@ def validate_move():
     current_move_index = data.get('current_move_index', 0)
     move_uci = data.get('move')
     
-    # Recharger les données depuis le fichier pour s'assurer qu'elles sont à jour
-    config.load_openings_from_json()
-    # Recréer l'instance trainer avec les données mises à jour
-    global trainer
-    trainer = OpeningTrainer()
+    # Le dépôt ne recompile que si le fichier de données a changé
+    trainer = repository.get_trainer()
     
-    lines = trainer.get_opening_lines(opening_name)
-    if not lines:
+    tree = trainer.get_move_tree(opening_name)
+    if not tree:
         return jsonify({'error': 'Opening not found'}), 404
     
-    if line_index >= len(lines):
+    if tree.node_at(line_index, 0) is None:
         return jsonify({'error': 'Line not found'}), 404
     
-    line = lines[line_index]
-    moves = line['moves']
-    
-    if current_move_index >= len(moves):
+    expected_node = tree.expected_node(line_index, current_move_index)
+    if expected_node is None:
         return jsonify({'error': 'End of line reached'}), 400
     
-    expected_move = moves[current_move_index]
-    expected_uci = expected_move['uci']
-    
-    if move_uci == expected_uci:
-        is_last_move = current_move_index == len(moves) - 1
-        
-        # The next computer move is the next one in the list
-        next_computer_move = None
-        if not is_last_move and current_move_index + 1 < len(moves):
-            next_computer_move = moves[current_move_index + 1]
+    # Un seul saut dans l'arbre : le coup joué prolonge-t-il cette ligne ?
+    played_node = tree.play(line_index, current_move_index, move_uci)
+    if played_node is not None:
+        # The next computer move is the next one in the line
+        next_node = tree.expected_node(line_index, current_move_index + 1)
+        is_last_move = next_node is None
 
         return jsonify({
             'correct': True,
-            'next_computer_move': next_computer_move,
-            'is_last_move': is_last_move
+            'next_computer_move': next_node.move() if next_node else None,
+            'is_last_move': is_last_move,
+            'continuing_lines': tree.continuations(played_node)
         })
     else:
         return jsonify({
             'correct': False,
-            'expected_move': expected_move['san'],
+            'expected_move': expected_node.san,
         })
 
+@app.route('/api/validate_line', methods=['POST'])
+def validate_line_moves():
+    """API validant en une requête une suite de coups joués sur une ligne.
+
+    `moves` contient les coups UCI du joueur, à partir du demi-coup
+    `current_move_index` ; les réponses de l'ordinateur sont lues dans la ligne.
+    Retourne l'indice du premier coup qui s'écarte de la ligne (None si tous sont
+    corrects), le coup attendu à cet endroit et les réponses de l'ordinateur.
+    """
+    data = request.get_json()
+    opening_name = data.get('opening_name')
+    line_index = data.get('line_index', 0)
+    ply = data.get('current_move_index', 0)
+    moves = data.get('moves')
+    if not isinstance(moves, list):
+        return jsonify({'error': 'moves must be a list of UCI moves'}), 400
+
+    # Le dépôt ne recompile que si le fichier de données a changé
+    trainer = repository.get_trainer()
+
+    tree = trainer.get_move_tree(opening_name)
+    if not tree:
+        return jsonify({'error': 'Opening not found'}), 404
+    if tree.node_at(line_index, 0) is None:
+        return jsonify({'error': 'Line not found'}), 404
+
+    computer_moves = []
+    deviation_index = None
+    expected_node = None
+    node = tree.node_at(line_index, ply)
+    for index, move_uci in enumerate(moves):
+        expected_node = tree.expected_node(line_index, ply)
+        played_node = tree.play(line_index, ply, move_uci) if expected_node else None
+        if played_node is None:
+            deviation_index = index
+            break
+        # Le coup de l'ordinateur suit directement dans la ligne
+        node = played_node
+        ply += 1
+        reply_node = tree.expected_node(line_index, ply)
+        if reply_node is None:
+            if index + 1 < len(moves):
+                deviation_index, expected_node = index + 1, None
+            break
+        computer_moves.append(reply_node.move())
+        node = reply_node
+        ply += 1
+
+    return jsonify({
+        'correct': deviation_index is None,
+        'deviation_index': deviation_index,
+        'expected_move': expected_node.san if deviation_index is not None and expected_node else None,
+        'expected_uci': expected_node.uci if deviation_index is not None and expected_node else None,
+        'computer_moves': computer_moves,
+        'current_move_index': ply,
+        'is_last_move': tree.expected_node(line_index, ply) is None,
+        'continuing_lines': tree.continuations(node) if node is not None else []
+    })
+
 @app.route('/api/get_hint', methods=['POST'])
 def get_hint():
     """API for getting a hint"""
@@ -1364,26 +1451,20 @@ def get_hint():
     line_index = data.get('line_index', 0)
     current_move_index = data.get('current_move_index', 0)
 
-    # Recharger les données depuis le fichier pour s'assurer qu'elles sont à jour
-    config.load_openings_from_json()
-    # Recréer l'instance trainer avec les données mises à jour
-    global trainer
-    trainer = OpeningTrainer()
+    # Le dépôt ne recompile que si le fichier de données a changé
+    trainer = repository.get_trainer()
 
-    lines = trainer.get_opening_lines(opening_name)
-    if not lines or line_index >= len(lines):
+    tree = trainer.get_move_tree(opening_name)
+    if not tree or tree.node_at(line_index, 0) is None:
         return jsonify({'error': 'Line not found'}), 404
 
-    line = lines[line_index]
-    moves = line['moves']
-
-    if current_move_index >= len(moves):
+    expected_node = tree.expected_node(line_index, current_move_index)
+    if expected_node is None:
         return jsonify({'error': 'End of line reached'}), 400
 
-    expected_move = moves[current_move_index]
     return jsonify({
-        'hint': expected_move['uci'],
-        'message': f"The correct move is {expected_move['san']}"
+        'hint': expected_node.uci,
+        'message': f"The correct move is {expected_node.san}"
     })
 
 @app.route('/api/get_position', methods=['POST'])
@@ -1394,28 +1475,16 @@ def get_position():
     line_index = data.get('line_index', 0)
     move_index = data.get('move_index', 0)
 
-    # Recharger les données depuis le fichier pour s'assurer qu'elles sont à jour
-    config.load_openings_from_json()
-    # Recréer l'instance trainer avec les données mises à jour
-    global trainer
-    trainer = OpeningTrainer()
+    # Le dépôt ne recompile que si le fichier de données a changé
+    trainer = repository.get_trainer()
 
-    lines = trainer.get_opening_lines(opening_name)
-    if not lines or line_index >= len(lines):
+    tree = trainer.get_move_tree(opening_name)
+    node = tree.position_at(line_index, move_index) if tree else None
+    if node is None:
         return jsonify({'error': 'Line not found'}), 404
 
-    line = lines[line_index]
-    moves = line['moves']
-
-    board = chess.Board()
-    for i in range(min(move_index, len(moves))):
-        board.push_uci(moves[i]['uci'])
-
-    return jsonify({
-        'fen': board.fen(),
-        'is_white_turn': board.turn == chess.WHITE,
-        'legal_moves': [move.uci() for move in board.legal_moves]
-    })
+    # FEN et coups légaux précalculés à la compilation
+    return jsonify(node.position())
 
 @app.route('/test_validation', methods=['GET'])
 def test_validation():
@@ -1564,7 +1633,7 @@ def debug_pgn():
 @app.route('/debug_openings', methods=['GET'])
 def debug_openings():
     """Route de débogage pour vérifier l'état des ouvertures"""
-    config.load_openings_from_json()
+    repository.refresh()
     return jsonify({
         'openings': config.OPENINGS,
         'categories': list(config.OPENINGS.keys()),
@@ -1573,6 +1642,7 @@ def debug_openings():
     })
 
 @app.route('/test_add_variation', methods=['GET'])
+@openings_mutation
 def test_add_variation():
     """Route de test pour ajouter une variation"""
     # Simuler l'ajout d'une variation
@@ -1581,10 +1651,10 @@ def test_add_variation():
     var_title = "b"
     var_pgn = "1. e4 e5"
     
-    print(f"DEBUG test_add_variation: category='{category}', name='{name}', var_title='{var_title}'")
+    logger.debug("test_add_variation: category=%r, name=%r, var_title=%r", category, name, var_title)
     
     # Recharger les données
-    config.load_openings_from_json()
+    repository.refresh()
     
     # D'abord, créer l'ouverture si elle n'existe pas
     opening_found = False
@@ -1594,7 +1664,7 @@ def test_add_variation():
             break
     
     if not opening_found:
-        print(f"DEBUG: Création de l'ouverture '{name}'")
+        logger.debug("Création de l'ouverture %r", name)
         if category in config.OPENINGS:
             config.OPENINGS[category].append({
                 'name': name,
@@ -1608,20 +1678,21 @@ def test_add_variation():
         # Sauvegarder l'ouverture
         if not config.save_openings_to_json():
             return jsonify({'success': False, 'message': 'Erreur lors de la création de l\'ouverture'})
-        print(f"DEBUG: Ouverture '{name}' créée avec succès")
+        logger.debug("Ouverture %r créée avec succès", name)
     
     # Maintenant chercher l'ouverture et ajouter la variation
     for opening in config.OPENINGS.get(category, []):
         if opening['name'] == name:
             # Vérifier la validation PGN
             is_valid, error_msg = validate_pgn(var_pgn, 'black', category, name)
-            print(f"DEBUG: Validation PGN - is_valid={is_valid}, error_msg={error_msg}")
+            logger.debug("Validation PGN - is_valid=%s, error_msg=%s", is_valid, error_msg)
             
             if is_valid:
                 # Ajouter la variation
                 opening['variations'].append({'name': var_title, 'pgn': var_pgn})
                 # Sauvegarder
                 if config.save_openings_to_json():
+                    repository.commit()
                     return jsonify({'success': True, 'message': 'Variation ajoutée'})
                 else:
                     return jsonify({'success': False, 'message': 'Erreur de sauvegarde'})
@@ -1633,7 +1704,7 @@ def test_add_variation():
 @app.route('/test_reload', methods=['GET'])
 def test_reload():
     """Route de test pour vérifier si les données sont bien rechargées"""
-    config.load_openings_from_json()
+    repository.refresh()
     return jsonify({
         'openings': config.OPENINGS,
         'defense_count': len(config.OPENINGS.get('Defense', [])),
@@ -1641,6 +1712,7 @@ def test_reload():
     })
 
 @app.route('/test_save', methods=['GET'])
+@openings_mutation
 def test_save():
     """Route de test pour vérifier la sauvegarde"""
     # Ajouter une ouverture de test
@@ -1655,16 +1727,7 @@ def test_save():
     config.OPENINGS['Defense'].append(test_opening)
     
     # Sauvegarder directement avec la fonction de config.py
-    try:
-        import os
-        os.makedirs('data', exist_ok=True)
-        with open('data/openings.json', 'w', encoding='utf-8') as f:
-            import json
-            json.dump(config.OPENINGS, f, indent=4, ensure_ascii=False)
-        success = True
-    except Exception as e:
-        success = False
-        print(f"Erreur de sauvegarde: {e}")
+    success = config.save_openings_to_json()
     
     return jsonify({
         'success': success,
@@ -1682,32 +1745,23 @@ def save_best_score():
         
         if not opening_name:
             return jsonify({'success': False, 'error': 'Opening name is required'})
+        if not isinstance(best_score, int) or isinstance(best_score, bool) or best_score < 0:
+            return jsonify({'success': False, 'error': 'best_score must be a non-negative integer'})
         
-        # Chercher l'ouverture dans toutes les catégories
-        opening_found = False
-        for category, openings_list in config.OPENINGS.items():
-            for opening in openings_list:
-                if opening['name'] == opening_name:
-                    opening['best_score'] = best_score
-                    opening_found = True
-                    print(f"Updated best score for {opening_name}: {best_score}")
-                    break
-            if opening_found:
-                break
-        
-        if not opening_found:
+        # Chercher l'ouverture via l'index des noms
+        repository.get_trainer()
+        _, opening = repository.find_opening(opening_name)
+        if opening is None:
             return jsonify({'success': False, 'error': f'Opening {opening_name} not found'})
         
-        # Sauvegarder dans le fichier JSON
-        import os
-        os.makedirs('data', exist_ok=True)
-        with open('data/openings.json', 'w', encoding='utf-8') as f:
-            json.dump(config.OPENINGS, f, indent=4, ensure_ascii=False)
+        # Une seule ligne mise à jour, le record ne peut que monter
+        best_score = score_store.save(opening_name, best_score)
+        logger.debug("Updated best score for %s: %s", opening_name, best_score)
         
-        return jsonify({'success': True})
+        return jsonify({'success': True, 'best_score': best_score})
         
     except Exception as e:
-        print(f"Error saving best score: {e}")
+        logger.exception("Error saving best score: %s", e)
         return jsonify({'success': False, 'error': str(e)})
 
 @app.route('/get_best_score')
@@ -1719,66 +1773,23 @@ def get_best_score():
         if not opening_name:
             return jsonify({'success': False, 'error': 'Opening name is required'})
         
-        # Chercher l'ouverture dans toutes les catégories
-        best_score = 0
-        opening_found = False
-        for category, openings_list in config.OPENINGS.items():
-            for opening in openings_list:
-                if opening['name'] == opening_name:
-                    best_score = opening.get('best_score', 0)
-                    opening_found = True
-                    print(f"Loaded best score for {opening_name}: {best_score}")
-                    break
-            if opening_found:
-                break
-        
-        if not opening_found:
-            print(f"Opening {opening_name} not found, returning default best score 0")
+        # Lecture par clé primaire dans le stockage des scores
+        best_score = score_store.get(opening_name)
+        logger.debug("Loaded best score for %s: %s", opening_name, best_score)
         
         return jsonify({'success': True, 'best_score': best_score})
         
     except Exception as e:
-        print(f"Error loading best score: {e}")
+        logger.exception("Error loading best score: %s", e)
         return jsonify({'success': False, 'error': str(e)})
 
-# Route explicite pour servir les fichiers statiques (pour Render)
-@app.route('/static/<path:filename>')
-def static_files(filename):
-    """Serve static files explicitly with better error handling"""
-    try:
-        # Vérifier si le fichier existe
-        static_folder = app.static_folder
-        file_path = os.path.join(static_folder, filename)
-        
-        if os.path.exists(file_path):
-            return send_from_directory(static_folder, filename)
-        else:
-            print(f"Static file not found: {filename}")
-            return f"File not found: {filename}", 404
-    except Exception as e:
-        print(f"Error serving static file {filename}: {e}")
-        return f"Error serving file: {filename}", 500
-
 # Route spécifique pour les pièces d'échecs
 @app.route('/chess_pieces/<piece>')
 def chess_piece(piece):
-    """Serve chess pieces with proper headers"""
-    try:
-        piece_path = os.path.join(app.static_folder, 'img', 'chesspieces', 'wikipedia', f'{piece}.png')
-        if os.path.exists(piece_path):
-            response = send_from_directory(
-                os.path.join(app.static_folder, 'img', 'chesspieces', 'wikipedia'),
-                f'{piece}.png'
-            )
-            response.headers['Cache-Control'] = 'public, max-age=31536000'
-            response.headers['Access-Control-Allow-Origin'] = '*'
-            response.headers['Content-Type'] = 'image/png'
-            return response
-        else:
-            return f"Chess piece not found: {piece}", 404
-    except Exception as e:
-        print(f"Error serving chess piece {piece}: {e}")
-        return f"Error serving chess piece: {piece}", 500
+    """Ancienne URL des pièces : redirige vers le fichier versionné servi par WhiteNoise"""
+    if piece not in CHESS_PIECES:
+        return f"Chess piece not found: {piece}", 404
+    return redirect(assets.url(f'img/chesspieces/wikipedia/{piece}.png'), code=301)
 
 # Route de test pour vérifier les pièces d'échecs
 @app.route('/test_pieces')
@@ -1906,6 +1917,25 @@ def list_static():
             'static_folder': app.static_folder
     })
 
+@app.cli.command('import-pgn')
+@click.argument('pgn_file', type=click.Path(exists=True, dir_okay=False))
+@click.option('--category', type=click.Choice(['Attack', 'Defense']), required=True)
+@click.option('--workers', type=int, default=0, help="Processus d'analyse (0 = un par CPU)")
+def import_pgn_command(pgn_file, category, workers):
+    """Importe un fichier PGN multi-parties : flask --app app import-pgn parties.pgn --category Defense"""
+    with open(pgn_file, 'r', encoding='utf-8', errors='replace') as lines:
+        report, status = import_pgn(lines, category, workers or None)
+    for skipped in report['skipped']:
+        click.echo(f"Partie {skipped['game']} ignorée ({skipped['reason']}): {skipped['opening'] or '?'}")
+    click.echo(f"{report['imported']}/{report['games']} partie(s) importée(s), "
+               f"{len(report['created_openings'])} ouverture(s) créée(s), "
+               f"{len(report['updated_openings'])} complétée(s)")
+    if status != 200:
+        raise click.ClickException(report.get('error', 'Import échoué'))
+    if github_client and report['imported']:
+        # Pas d'attente du délai de regroupement : le processus s'arrête ici
+        click.echo(f"Synchronisation GitHub: {github_sync_queue.run_now()}")
+
 if __name__ == '__main__':
     print("=" * 50)
     print("🚀 Démarrage de SacTheBook...")
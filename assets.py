@@ -0,0 +1,73 @@
+# URLs des fichiers statiques versionnés, d'après le manifeste écrit par build_assets.py
+
+import json
+import logging
+import os
+import re
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Nom produit par build_assets.hashed_name : <nom>.<12 caractères hexadécimaux>.<ext>
+_HASHED_NAME = re.compile(r'\.[0-9a-f]{12}\.[^./]+$')
+
+
+class AssetManifest:
+    """Associe un chemin de static/ à son nom versionné dans static/dist.
+
+    Le manifeste est relu seulement quand il change sur le disque ; sans
+    manifeste (build non lancé, développement), url() retombe sur le fichier
+    source, servi sans cache long.
+    """
+
+    def __init__(self, static_dir='static', url_prefix='/static/'):
+        self.static_dir = static_dir
+        self.url_prefix = url_prefix
+        self.path = os.path.join(static_dir, 'dist', 'manifest.json')
+        self._lock = threading.Lock()
+        self._files = {}
+        self._integrity = {}
+        self._stat = None
+
+    def _load(self):
+        try:
+            st = os.stat(self.path)
+            stat = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            stat = None
+        if stat != self._stat:
+            with self._lock:
+                files, integrity = {}, {}
+                if stat is not None:
+                    try:
+                        with open(self.path, 'r', encoding='utf-8') as f:
+                            manifest = json.load(f)
+                        files, integrity = manifest['files'], manifest.get('integrity', {})
+                    except (OSError, ValueError, KeyError) as e:
+                        logger.error("Manifeste des fichiers statiques illisible (%s): %s", self.path, e)
+                self._files, self._integrity, self._stat = files, integrity, stat
+        return self._files
+
+    def url(self, path):
+        """URL publique d'un fichier de static/ (chemin relatif, ex. 'img/button/arrow.png')"""
+        path = path.lstrip('/')
+        return self.url_prefix + self._load().get(path, path)
+
+    def exists(self, path):
+        """Vrai si le fichier est dans le manifeste ou, sans build, dans static/"""
+        path = path.lstrip('/')
+        return path in self._load() or os.path.isfile(os.path.join(self.static_dir, path))
+
+    def integrity(self, path):
+        """Empreinte SRI ('sha384-...') du fichier versionné, None sans build"""
+        self._load()
+        return self._integrity.get(path.lstrip('/'))
+
+    def urls(self, paths):
+        """{chemin: URL} pour passer plusieurs fichiers au JavaScript d'une page"""
+        return {path: self.url(path) for path in paths}
+
+    @staticmethod
+    def is_immutable(path, url):
+        """Test immutable_file_test de WhiteNoise : fichiers versionnés de static/dist"""
+        return '/dist/' in url and bool(_HASHED_NAME.search(url))
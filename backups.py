@@ -0,0 +1,163 @@
+# Sauvegardes de openings.json adressées par contenu, compressées et à rétention bornée
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+
+import storage
+
+logger = logging.getLogger(__name__)
+
+# Anciennes sauvegardes posées à plat dans data/ (avant ce module)
+LEGACY_BACKUP_PATTERN = re.compile(r'^(openings_backup|openings_local_backup|restore_backup)_(\d+)\.json$')
+LEGACY_BACKUP_KINDS = {
+    'openings_backup': 'before_sync_to_github',
+    'openings_local_backup': 'before_sync_from_github',
+    'restore_backup': 'before_restore',
+}
+
+
+class BackupStore:
+    """Un seul fichier gzip par contenu distinct, nommé par son sha256.
+
+    index.json garde les métadonnées de chaque sauvegarde (type, dates, tailles) :
+    lister les sauvegardes ne parcourt jamais le dossier. Sauvegarder un contenu
+    déjà présent ne fait que mettre à jour son entrée. Après chaque ajout, seules
+    les `keep` sauvegardes les plus récentes (et, si max_age_days est défini,
+    celles de moins de max_age_days jours) sont conservées.
+    """
+
+    def __init__(self, directory, keep=20, max_age_days=0):
+        self.directory = directory
+        self.index_path = os.path.join(directory, 'index.json')
+        self.keep = keep
+        self.max_age_days = max_age_days
+        self._lock = storage.FileLock(os.path.join(directory, 'index.lock'))
+        self._index = None
+        self._index_stat = None
+
+    def _object_path(self, backup_id):
+        return os.path.join(self.directory, backup_id[:2], backup_id + '.json.gz')
+
+    def _load_index(self):
+        """Index en mémoire, relu seulement si un autre processus l'a réécrit"""
+        try:
+            st = os.stat(self.index_path)
+            stat = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            stat = None
+        if self._index is None or stat != self._index_stat:
+            index = {}
+            if stat is not None:
+                try:
+                    with open(self.index_path, 'r', encoding='utf-8') as f:
+                        index = {entry['id']: entry for entry in json.load(f)['backups']}
+                except (OSError, ValueError, KeyError) as e:
+                    logger.warning("Index des sauvegardes illisible (%s): %s", self.index_path, e)
+            self._index, self._index_stat = index, stat
+        return self._index
+
+    def _save_index(self, index):
+        backups = sorted(index.values(), key=lambda entry: entry['updated_at'], reverse=True)
+        storage.atomic_write_json(self.index_path, {'version': 1, 'backups': backups})
+        st = os.stat(self.index_path)
+        self._index, self._index_stat = index, (st.st_mtime_ns, st.st_size)
+
+    def add(self, content, kind, created_at=None):
+        """Sauvegarde content (str ou bytes) et retourne l'entrée d'index correspondante"""
+        if isinstance(content, str):
+            content = content.encode('utf-8')
+        backup_id = hashlib.sha256(content).hexdigest()
+        now = created_at if created_at is not None else time.time()
+        with self._lock:
+            index = dict(self._load_index())
+            entry = index.get(backup_id)
+            if entry is None or not os.path.exists(self._object_path(backup_id)):
+                compressed = gzip.compress(content, mtime=0)
+                storage.atomic_write_bytes(self._object_path(backup_id), compressed)
+                entry = {
+                    'id': backup_id,
+                    'kinds': [],
+                    'created_at': now,
+                    'updated_at': now,
+                    'size': len(content),
+                    'compressed_size': len(compressed),
+                }
+            else:
+                entry = dict(entry, updated_at=max(entry['updated_at'], now))
+            if kind not in entry['kinds']:
+                entry['kinds'] = entry['kinds'] + [kind]
+            index[backup_id] = entry
+            self._apply_retention(index, keep_id=backup_id)
+            self._save_index(index)
+        return entry
+
+    def _apply_retention(self, index, keep_id=None):
+        """Retire de l'index, puis du disque, les sauvegardes hors politique de rétention"""
+        ordered = sorted(index.values(), key=lambda entry: entry['updated_at'], reverse=True)
+        # keep <= 0 : pas de limite en nombre, l'âge s'applique à toutes les sauvegardes
+        kept = ordered[:self.keep] if self.keep > 0 else ordered
+        expired = ordered[len(kept):]
+        if self.max_age_days > 0:
+            cutoff = time.time() - self.max_age_days * 86400
+            expired += [entry for entry in kept if entry['updated_at'] < cutoff]
+        for entry in expired:
+            if entry['id'] == keep_id:
+                continue
+            del index[entry['id']]
+            object_path = self._object_path(entry['id'])
+            try:
+                os.unlink(object_path)
+                os.rmdir(os.path.dirname(object_path))  # seulement s'il est vide
+            except OSError:
+                pass
+
+    def list(self):
+        """Métadonnées des sauvegardes, de la plus récente à la plus ancienne"""
+        return sorted(self._load_index().values(), key=lambda entry: entry['updated_at'], reverse=True)
+
+    def find(self, backup_id):
+        """Entrée d'index pour un identifiant complet ou un préfixe non ambigu (8 caractères min.)"""
+        index = self._load_index()
+        if backup_id in index:
+            return index[backup_id]
+        if len(backup_id) >= 8:
+            matches = [entry for key, entry in index.items() if key.startswith(backup_id)]
+            if len(matches) == 1:
+                return matches[0]
+        return None
+
+    def read(self, backup_id):
+        """Contenu (bytes) d'une sauvegarde, ou None si elle n'existe pas"""
+        entry = self.find(backup_id)
+        if entry is None:
+            return None
+        try:
+            with open(self._object_path(entry['id']), 'rb') as f:
+                return gzip.decompress(f.read())
+        except OSError:
+            return None
+
+    def import_legacy(self, data_dir):
+        """Range dans le store les anciennes sauvegardes à plat de data_dir, puis les supprime"""
+        imported = 0
+        if not os.path.isdir(data_dir):
+            return imported
+        for filename in sorted(os.listdir(data_dir)):
+            match = LEGACY_BACKUP_PATTERN.match(filename)
+            if not match:
+                continue
+            path = os.path.join(data_dir, filename)
+            try:
+                with open(path, 'rb') as f:
+                    content = f.read()
+                self.add(content, LEGACY_BACKUP_KINDS[match.group(1)], created_at=float(match.group(2)))
+                os.unlink(path)
+                imported += 1
+            except OSError as e:
+                logger.warning("Sauvegarde %s non importée: %s", filename, e)
+        return imported
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Construit les fichiers statiques servis en production : chaque fichier de
+static/ est copié dans static/dist/ sous un nom contenant le condensé de son
+contenu (wk.png -> wk.3f2a1b9c0d12.png), accompagné de versions précompressées
+.gz (et .br si le module brotli est installé) pour les formats texte. Les
+scripts et feuilles de style non minifiés (js/, css/) sont minifiés au passage
+si rjsmin et rcssmin sont installés.
+
+static/dist/manifest.json associe chaque chemin source à son nom versionné et
+à son empreinte SRI (attribut integrity des balises <script>/<link>) ; les
+modèles l'utilisent via asset_url() et WhiteNoise sert ces fichiers avec un
+cache d'un an (immutable). Un nom versionné ne change que si le contenu change.
+
+Utilisation :
+    python build_assets.py                 # construit static/dist
+    python build_assets.py --fetch-vendor  # télécharge d'abord les bibliothèques
+                                           # manquantes de vendor.py dans static/vendor
+
+Le build échoue (code de sortie 1) si une bibliothèque de vendor.py manque dans
+static/vendor ou ne correspond pas à son empreinte : la page ne retombe jamais
+sur un CDN.
+"""
+
+import base64
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+import urllib.request
+
+try:
+    import brotli
+except ImportError:  # dépendance optionnelle : seulement les .gz
+    brotli = None
+try:
+    import rcssmin
+    import rjsmin
+except ImportError:  # dépendances optionnelles : fichiers copiés sans minification
+    rcssmin = rjsmin = None
+
+import storage
+from vendor import VENDOR_LIBRARIES
+
+STATIC_DIR = 'static'
+DIST_DIRNAME = 'dist'
+MANIFEST_NAME = 'manifest.json'
+HASH_LENGTH = 12
+
+# Formats déjà compressés (png, mp3...) : les recompresser ne gagne rien
+COMPRESSIBLE_EXTENSIONS = {'.css', '.js', '.json', '.svg', '.html', '.txt', '.map', '.xml', '.ico'}
+_CSS_URL = re.compile(r'url\(\s*([\'"]?)(?!data:|https?:|//)([^\'")]+)\1\s*\)')
+
+
+def hashed_name(path, content):
+    """img/wk.png -> img/wk.<condensé>.png"""
+    root, ext = os.path.splitext(path)
+    return f'{root}.{hashlib.sha256(content).hexdigest()[:HASH_LENGTH]}{ext}'
+
+
+def integrity(content):
+    """Empreinte Subresource Integrity du contenu servi"""
+    return 'sha384-' + base64.b64encode(hashlib.sha384(content).digest()).decode('ascii')
+
+
+def _rewrite_css_urls(css, css_path, manifest):
+    """Remplace dans une feuille de style les url() vers static/ par leur nom versionné"""
+    def replace(match):
+        quote, target = match.group(1), match.group(2)
+        if target.startswith('/static/'):
+            source = target[len('/static/'):]
+        else:
+            source = os.path.normpath(os.path.join(os.path.dirname(css_path), target)).replace(os.sep, '/')
+        if source not in manifest:
+            return match.group(0)
+        return f'url({quote}/static/{manifest[source]}{quote})'
+    return _CSS_URL.sub(replace, css)
+
+
+def minify(path, content):
+    """Version minifiée d'un .js ou .css (hors fichiers déjà en .min.*), sinon content"""
+    if rjsmin is None or '.min.' in os.path.basename(path):
+        return content
+    if path.endswith('.js'):
+        return rjsmin.jsmin(content.decode('utf-8')).encode('utf-8')
+    if path.endswith('.css'):
+        return rcssmin.cssmin(content.decode('utf-8')).encode('utf-8')
+    return content
+
+
+def _write(path, content):
+    storage.atomic_write_bytes(path, content)
+    os.chmod(path, 0o644)  # le fichier temporaire est créé en 0600
+
+
+def _write_compressed(path, content):
+    gz = gzip.compress(content, compresslevel=9, mtime=0)
+    if len(gz) < len(content):
+        _write(path + '.gz', gz)
+    if brotli is not None:
+        br = brotli.compress(content, quality=11)
+        if len(br) < len(content):
+            _write(path + '.br', br)
+
+
+def source_files(static_dir=STATIC_DIR):
+    """Chemins (relatifs, séparés par /) des fichiers sources, hors static/dist"""
+    for root, dirs, files in os.walk(static_dir):
+        dirs[:] = sorted(d for d in dirs if os.path.join(root, d) != os.path.join(static_dir, DIST_DIRNAME))
+        for filename in sorted(files):
+            if filename.startswith('.'):
+                continue
+            yield os.path.relpath(os.path.join(root, filename), static_dir).replace(os.sep, '/')
+
+
+def fetch_vendor(static_dir=STATIC_DIR):
+    """Télécharge les bibliothèques de vendor.py absentes de static/vendor.
+
+    Retourne [(chemin, empreinte SRI)] des fichiers téléchargés ; ils sont à
+    vérifier puis à committer (avec leur empreinte dans vendor.py), le build ne
+    les télécharge jamais de lui-même. Un téléchargement qui ne correspond pas à
+    l'empreinte déjà connue n'est pas écrit.
+    """
+    fetched = []
+    for library in VENDOR_LIBRARIES.values():
+        output = os.path.join(static_dir, library['path'])
+        if os.path.exists(output):
+            continue
+        with urllib.request.urlopen(library['source'], timeout=30) as response:
+            content = response.read()
+        digest = integrity(content)
+        if library.get('integrity') and digest != library['integrity']:
+            raise ValueError(f"{library['source']} : empreinte {digest}, {library['integrity']} attendue")
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+        _write(output, content)
+        fetched.append((library['path'], digest))
+    return fetched
+
+
+def check_vendor(static_dir=STATIC_DIR):
+    """Problèmes des bibliothèques de vendor.py dans static/vendor (liste vide si tout va bien) :
+    fichier absent, empreinte non reportée dans vendor.py ou différente"""
+    problems = []
+    for name, library in VENDOR_LIBRARIES.items():
+        try:
+            with open(os.path.join(static_dir, library['path']), 'rb') as f:
+                digest = integrity(f.read())
+        except FileNotFoundError:
+            problems.append(f"{name} : {library['path']} absent (python build_assets.py --fetch-vendor)")
+            continue
+        if 'integrity' not in library:
+            problems.append(f"{name} : empreinte {digest} à reporter dans vendor.py")
+        elif digest != library['integrity']:
+            problems.append(f"{name} : {library['path']} a l'empreinte {digest}, {library['integrity']} attendue")
+    return problems
+
+
+def build(static_dir=STATIC_DIR):
+    """Reconstruit static/dist et retourne le manifeste {chemin source: chemin versionné}"""
+    dist_dir = os.path.join(static_dir, DIST_DIRNAME)
+    shutil.rmtree(dist_dir, ignore_errors=True)
+    manifest = {}
+    hashes = {}
+    # Les feuilles de style en dernier : elles référencent les autres fichiers
+    paths = sorted(source_files(static_dir), key=lambda path: path.endswith('.css'))
+    for path in paths:
+        with open(os.path.join(static_dir, path), 'rb') as f:
+            content = f.read()
+        if path.endswith('.css'):
+            content = _rewrite_css_urls(content.decode('utf-8'), path, manifest).encode('utf-8')
+        content = minify(path, content)
+        target = DIST_DIRNAME + '/' + hashed_name(path, content)
+        output = os.path.join(static_dir, target)
+        _write(output, content)
+        if os.path.splitext(path)[1].lower() in COMPRESSIBLE_EXTENSIONS:
+            _write_compressed(output, content)
+        manifest[path] = target
+        hashes[path] = integrity(content)
+    manifest_path = os.path.join(dist_dir, MANIFEST_NAME)
+    storage.atomic_write_json(manifest_path, {'version': 2, 'files': manifest, 'integrity': hashes})
+    os.chmod(manifest_path, 0o644)
+    return manifest
+
+
+def main():
+    if '--fetch-vendor' in sys.argv[1:]:
+        for path, digest in fetch_vendor():
+            print(f"Téléchargé : {path} ({digest})")
+    problems = check_vendor()
+    if problems:
+        print("Bibliothèques de vendor.py à corriger :", file=sys.stderr)
+        for problem in problems:
+            print(f"  {problem}", file=sys.stderr)
+        return 1
+    manifest = build()
+    missing = [name for name, module in (('brotli', brotli), ('rjsmin/rcssmin', rjsmin)) if module is None]
+    print(f"{len(manifest)} fichier(s) versionné(s) dans {os.path.join(STATIC_DIR, DIST_DIRNAME)}"
+          + (f" (absents : {', '.join(missing)})" if missing else ""))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,13 +1,52 @@
 # Application configuration for Chess Openings Revision
 
+import hashlib
 import json
+import logging
 import os
 
+import metrics
+import storage
+
+logger = logging.getLogger(__name__)
+
 # Server parameters - Production ready
 HOST = '0.0.0.0'
 PORT = int(os.environ.get('PORT', 5000))  # Use environment variable for port
 DEBUG = os.environ.get('FLASK_ENV') == 'development'  # Only debug in development
 
+# Logging
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'DEBUG' if DEBUG else 'INFO')  # Minimum level written (DEBUG, INFO, WARNING, ERROR)
+LOG_FORMAT = os.environ.get('LOG_FORMAT', 'text')  # 'text' (one readable line per message) or 'json' (one JSON object per line)
+LOG_DEBUG_SAMPLE_RATE = float(os.environ.get('LOG_DEBUG_SAMPLE_RATE', 1.0))  # Fraction of DEBUG messages kept when LOG_LEVEL=DEBUG
+
+# Data files
+DATA_DIR = os.environ.get('DATA_DIR', 'data')  # Directory holding openings.json and its backups
+OPENINGS_FILE = os.path.join(DATA_DIR, 'openings.json')
+OPENINGS_STAT_INTERVAL = float(os.environ.get('OPENINGS_STAT_INTERVAL', 1.0))  # Seconds between two checks of openings.json for edits made outside the app
+OPENINGS_VERSION_FILE = os.path.join(DATA_DIR, 'openings.version')  # Monotonic counter bumped on every write of openings.json
+OPENINGS_LOCK = storage.FileLock(os.path.join(DATA_DIR, 'openings.lock'))  # Serializes reads and writes of openings.json across workers
+OPENINGS_VERSION = 0  # Version of openings.json that OPENINGS was loaded from
+OPENINGS_CONTENT_HASH = None  # sha256 of the bytes last written to openings.json by save_openings_to_json()
+SCORES_FILE = os.path.join(DATA_DIR, 'scores.sqlite3')  # Best drill scores, kept out of openings.json
+BACKUP_DIR = os.path.join(DATA_DIR, 'backups')  # Content-addressed, gzip-compressed copies of openings.json
+BACKUP_KEEP = int(os.environ.get('BACKUP_KEEP', 20))  # Number of distinct backups kept (0 = unlimited)
+BACKUP_MAX_AGE_DAYS = float(os.environ.get('BACKUP_MAX_AGE_DAYS', 0))  # Drop backups older than this many days (0 = no age limit)
+
+# GitHub synchronization
+GITHUB_SYNC_DEBOUNCE = float(os.environ.get('GITHUB_SYNC_DEBOUNCE', 5.0))  # Seconds of inactivity before edits are pushed as one commit
+GITHUB_SYNC_MAX_DELAY = float(os.environ.get('GITHUB_SYNC_MAX_DELAY', 60.0))  # Upper bound on how long a pending edit waits while edits keep coming
+GITHUB_STATUS_TTL = float(os.environ.get('GITHUB_STATUS_TTL', 5.0))  # Seconds a remote status check is reused before a new conditional request
+
+# Metrics
+METRICS_DIR = os.path.join(DATA_DIR, 'metrics')  # One file per gunicorn worker, summed by /metrics
+METRICS_FLUSH_INTERVAL = float(os.environ.get('METRICS_FLUSH_INTERVAL', 5.0))  # Seconds between two writes of a worker's metrics file
+METRICS = metrics.Metrics(METRICS_DIR, flush_interval=METRICS_FLUSH_INTERVAL)  # Request latency histograms, counters and internal spans
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')  # Bearer token letting a Prometheus scraper read /metrics without an admin session
+
+# Bulk PGN import
+PGN_IMPORT_WORKERS = int(os.environ.get('PGN_IMPORT_WORKERS', 0))  # Processes parsing an imported PGN file (0 = one per CPU)
+
 # Game parameters
 DEFAULT_PLAYER_COLOR = 'white'  # 'white' or 'black'
 COMPUTER_MOVE_DELAY = 0.5  # Delay in seconds before the computer plays
@@ -36,28 +75,47 @@ CUSTOM_STYLES = {  # Dictionary containing customizable CSS color styles for the
 
 def load_openings_from_json():
     """Charge les ouvertures depuis le fichier JSON"""
+    global OPENINGS, OPENINGS_VERSION
     try:
-        if os.path.exists('data/openings.json'):
-            with open('data/openings.json', 'r', encoding='utf-8') as f:
-                global OPENINGS
-                OPENINGS = json.load(f)
+        if os.path.exists(OPENINGS_FILE):
+            with OPENINGS_LOCK:
+                with open(OPENINGS_FILE, 'r', encoding='utf-8') as f:
+                    OPENINGS = json.load(f)
+                OPENINGS_VERSION = storage.read_version(OPENINGS_VERSION_FILE)
                 return True
     except Exception as e:
-        print(f"Erreur lors du chargement JSON: {e}")
+        logger.error("Erreur lors du chargement JSON: %s", e)
     return False
 
 def save_openings_to_json():
-    """Sauvegarde les ouvertures dans le fichier JSON"""
+    """Sauvegarde les ouvertures dans le fichier JSON.
+
+    Échoue si le fichier a été réécrit par un autre worker depuis le chargement
+    de OPENINGS, pour ne pas écraser sa modification. L'empreinte des octets écrits
+    est gardée dans OPENINGS_CONTENT_HASH : le dépôt n'a pas à relire le fichier.
+    """
+    global OPENINGS_VERSION, OPENINGS_CONTENT_HASH
     try:
-        os.makedirs('data', exist_ok=True)
-        with open('data/openings.json', 'w', encoding='utf-8') as f:
-            json.dump(OPENINGS, f, indent=4, ensure_ascii=False)
-        print(f"DEBUG config.py: Sauvegarde réussie de {len(OPENINGS)} catégories")
+        with METRICS.span('json_save'), storage.versioned_write(OPENINGS_LOCK, OPENINGS_VERSION_FILE, OPENINGS_VERSION) as version:
+            content = storage.atomic_write_json(OPENINGS_FILE, OPENINGS)
+        OPENINGS_VERSION = version
+        OPENINGS_CONTENT_HASH = hashlib.sha256(content).hexdigest()
+        logger.debug("Sauvegarde réussie de %d catégories (version %s)", len(OPENINGS), version)
         return True
+    except storage.StaleWriteError as e:
+        logger.warning("Sauvegarde JSON refusée, fichier modifié par un autre processus: %s", e)
+        return False
     except Exception as e:
-        print(f"Erreur lors de la sauvegarde JSON: {e}")
+        logger.exception("Erreur lors de la sauvegarde JSON: %s", e)
         return False
 
+def write_openings_content(content):
+    """Remplace le fichier JSON par un contenu brut (synchronisation GitHub, restauration)"""
+    global OPENINGS_VERSION
+    with METRICS.span('json_save'), storage.versioned_write(OPENINGS_LOCK, OPENINGS_VERSION_FILE) as version:
+        storage.atomic_write_bytes(OPENINGS_FILE, content.encode('utf-8'))
+    OPENINGS_VERSION = version
+
 # Fonction supprimée car redondante avec save_openings_to_json()
 
 
@@ -0,0 +1,113 @@
+# État de synchronisation avec GitHub sans télécharger le contenu : on compare des SHA de blob git
+
+import hashlib
+import os
+import posixpath
+import threading
+import time
+from contextlib import nullcontext
+
+import requests
+
+
+def git_blob_sha(content):
+    """SHA du blob git d'un contenu (bytes), identique au champ `sha` de l'API GitHub"""
+    return hashlib.sha1(b'blob %d\0' % len(content) + content).hexdigest()
+
+
+class LocalBlobHash:
+    """SHA de blob du fichier local, recalculé seulement quand (mtime, taille) change"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._stat = None
+        self._sha = None
+        self._size = 0
+
+    def get(self):
+        """Retourne (sha, taille), ou (None, 0) si le fichier n'existe pas"""
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None, 0
+        stat = (st.st_mtime_ns, st.st_size)
+        with self._lock:
+            if stat != self._stat:
+                try:
+                    with open(self.path, 'rb') as f:
+                        content = f.read()
+                except OSError:
+                    return None, 0
+                self._sha, self._size, self._stat = git_blob_sha(content), len(content), stat
+            return self._sha, self._size
+
+
+class RemoteBlobStatus:
+    """SHA de blob du fichier distant, obtenu en listant son dossier via l'API contents.
+
+    Le listing ne contient que les métadonnées (sha, taille), jamais le contenu.
+    Chaque rafraîchissement envoie If-None-Match avec l'ETag précédent : une réponse
+    304 ne transfère rien et n'est pas décomptée du quota de l'API GitHub. Entre
+    deux rafraîchissements, `ttl` secondes de cache évitent même l'aller-retour.
+    Les allers-retours sont mesurés sous le span github_status si metrics est fourni.
+    """
+
+    def __init__(self, api_url, token, repo, branch, path, ttl=5.0, timeout=10, metrics=None):
+        self.url = f"{api_url.rstrip('/')}/repos/{repo}/contents/{posixpath.dirname(path)}"
+        self.branch = branch
+        self.name = posixpath.basename(path)
+        self.ttl = ttl
+        self.timeout = timeout
+        self._session = requests.Session()
+        self._session.headers.update({
+            'Accept': 'application/vnd.github+json',
+            'Authorization': f'token {token}',
+        })
+        self.metrics = metrics
+        self._lock = threading.Lock()
+        self._etag = None
+        self._sha = None
+        self._size = 0
+        self._checked_at = 0.0
+        self.stats = {'requests': 0, 'not_modified': 0}
+
+    def get(self, force=False):
+        """Retourne (sha, taille) du fichier distant ; sha vaut None s'il n'existe pas.
+
+        Lève requests.RequestException (ou RuntimeError) si GitHub ne répond pas.
+        """
+        with self._lock:
+            if not force and self._checked_at and time.monotonic() - self._checked_at < self.ttl:
+                return self._sha, self._size
+            headers = {'If-None-Match': self._etag} if self._etag else {}
+            with self.metrics.span('github_status') if self.metrics else nullcontext():
+                response = self._session.get(self.url, params={'ref': self.branch},
+                                             headers=headers, timeout=self.timeout)
+            self.stats['requests'] += 1
+            if response.status_code == 304:
+                self.stats['not_modified'] += 1
+            elif response.status_code == 404:
+                self._etag, self._sha, self._size = None, None, 0
+            elif response.ok:
+                self._sha, self._size = None, 0
+                for entry in response.json():
+                    if entry.get('name') == self.name and entry.get('type') == 'file':
+                        self._sha, self._size = entry['sha'], entry.get('size', 0)
+                        break
+                self._etag = response.headers.get('ETag')
+            else:
+                raise RuntimeError(f"GitHub a répondu {response.status_code}: {response.text[:200]}")
+            self._checked_at = time.monotonic()
+            return self._sha, self._size
+
+    def set(self, sha, size):
+        """Mémorise l'état distant connu après un envoi ou une récupération"""
+        with self._lock:
+            self._sha, self._size = sha, size
+            self._etag = None  # le listing a changé : le prochain rafraîchissement refait un 200
+            self._checked_at = time.monotonic()
+
+    def invalidate(self):
+        with self._lock:
+            self._checked_at = 0.0
@@ -0,0 +1,16 @@
+# Configuration Gunicorn (chargée automatiquement par `gunicorn app:app`)
+#
+# Le dépôt d'ouvertures est compilé une seule fois dans le processus maître
+# puis partagé en copy-on-write par tous les workers forkés. Après une édition
+# admin, le compteur mappé en mémoire data/openings.generation indique aux
+# autres workers de recharger le snapshot compilé.
+
+import gc
+
+preload_app = True
+
+
+def when_ready(server):
+    # Geler les objets déjà alloués (dont le corpus compilé) : le ramasse-miettes
+    # n'écrit plus dans leurs pages, qui restent physiquement partagées après le fork
+    gc.freeze()
@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+Test de charge de l'API d'entraînement, sans accès réseau : lance l'application
+sous gunicorn sur un port local, avec une copie de data/ dans un dossier
+temporaire, puis rejoue des sessions d'entraînement en parallèle.
+
+Une session = chargement de la page d'une ouverture (HTML puis lignes versionnées),
+puis, pour une ligne tirée au hasard et chaque demi-coup : get_position, et pour
+les coups du joueur un get_hint (de temps en temps), une erreur volontaire (de
+temps en temps) et validate_move.
+
+Le rapport donne, par route, le nombre de requêtes, les erreurs, le débit et les
+latences p50/p95/p99. --json enregistre le rapport ; --baseline compare le p95
+de chaque route à un rapport précédent et échoue au-delà de --max-regression.
+
+Utilisation :
+    python loadtest.py                                   # 200 sessions, 8 en parallèle
+    python loadtest.py --concurrency 32 --duration 60 --workers 4
+    python loadtest.py --json bench.json                 # enregistre la référence
+    python loadtest.py --baseline bench.json             # code 1 si un p95 régresse de plus de 20 %
+    python loadtest.py --url http://127.0.0.1:5000       # serveur déjà lancé
+"""
+
+import argparse
+import http.client
+import json
+import math
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+ROUTES = (
+    'GET /opening/<name>',
+    'GET /api/openings/<name>/lines',
+    'POST /api/get_position',
+    'POST /api/get_hint',
+    'POST /api/validate_move',
+)
+
+
+def percentile(sorted_values, fraction):
+    """Percentile au rang le plus proche d'une liste triée"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class Recorder:
+    """Durées (ms) et erreurs par route, partagées par les threads clients"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = {route: [] for route in ROUTES}
+        self.errors = {route: 0 for route in ROUTES}
+        self.sessions = 0
+
+    def add(self, route, milliseconds, ok):
+        with self._lock:
+            self.latencies[route].append(milliseconds)
+            if not ok:
+                self.errors[route] += 1
+
+    def report(self, elapsed):
+        routes = {}
+        for route in ROUTES:
+            values = sorted(self.latencies[route])
+            if not values:
+                continue
+            routes[route] = {
+                'count': len(values),
+                'errors': self.errors[route],
+                'rps': round(len(values) / elapsed, 1),
+                'p50_ms': round(percentile(values, 0.50), 2),
+                'p95_ms': round(percentile(values, 0.95), 2),
+                'p99_ms': round(percentile(values, 0.99), 2),
+                'max_ms': round(values[-1], 2),
+            }
+        total = sum(route['count'] for route in routes.values())
+        return {
+            'elapsed_s': round(elapsed, 2),
+            'sessions': self.sessions,
+            'requests': total,
+            'rps': round(total / elapsed, 1),
+            'sessions_per_s': round(self.sessions / elapsed, 2),
+            'routes': routes,
+        }
+
+
+class Client:
+    """Connexion HTTP d'un thread client ; rouverte automatiquement si le serveur la ferme"""
+
+    def __init__(self, base_url, recorder):
+        parsed = urllib.parse.urlsplit(base_url)
+        self.host, self.port = parsed.hostname, parsed.port or 80
+        self.recorder = recorder
+        self.connection = http.client.HTTPConnection(self.host, self.port, timeout=30)
+
+    def request(self, route, method, path, payload=None):
+        body = json.dumps(payload).encode('utf-8') if payload is not None else None
+        headers = {'Content-Type': 'application/json'} if body is not None else {}
+        start = time.perf_counter()
+        try:
+            self.connection.request(method, path, body=body, headers=headers)
+            response = self.connection.getresponse()
+            data = response.read()
+            ok = response.status < 400
+        except (OSError, http.client.HTTPException):
+            self.connection.close()
+            data, ok = b'', False
+        if self.recorder is not None:
+            self.recorder.add(route, (time.perf_counter() - start) * 1000, ok)
+        return data if ok else None
+
+
+def opening_names(data_dir):
+    """Ouvertures jouables (au moins une variation) du fichier de données"""
+    with open(os.path.join(data_dir, 'openings.json'), 'r', encoding='utf-8') as f:
+        openings = json.load(f)
+    return [opening['name'] for category in openings.values() for opening in category if opening['variations']]
+
+
+def run_session(client, name, rng, hint_rate, mistake_rate):
+    """Une session d'entraînement complète sur une ligne tirée au hasard"""
+    quoted = urllib.parse.quote(name)
+    html = client.request('GET /opening/<name>', 'GET', f'/opening/{quoted}')
+    if html is None:
+        return
+    # URL versionnée des lignes, telle que la page la précharge
+    marker = f'/api/openings/{quoted}/lines'.encode('utf-8')
+    start = html.find(marker)
+    lines_path = html[start:html.find(b'"', start)].decode('utf-8') if start >= 0 else marker.decode('utf-8')
+    bundle = client.request('GET /api/openings/<name>/lines', 'GET', lines_path.replace('&amp;', '&'))
+    if bundle is None:
+        return
+    bundle = json.loads(bundle)
+    if not bundle['lines']:
+        return
+    line_index = rng.randrange(len(bundle['lines']))
+    moves = bundle['lines'][line_index]['moves']
+    player_parity = 0 if bundle['category'] == 'Attack' else 1
+    for ply, move in enumerate(moves):
+        client.request('POST /api/get_position', 'POST', '/api/get_position',
+                       {'opening_name': name, 'line_index': line_index, 'move_index': ply})
+        if ply % 2 != player_parity:
+            continue  # coup de l'ordinateur, joué côté client
+        request = {'opening_name': name, 'line_index': line_index, 'current_move_index': ply}
+        if rng.random() < hint_rate:
+            client.request('POST /api/get_hint', 'POST', '/api/get_hint', request)
+        if rng.random() < mistake_rate:
+            client.request('POST /api/validate_move', 'POST', '/api/validate_move',
+                           dict(request, move='a1a1'))
+        client.request('POST /api/validate_move', 'POST', '/api/validate_move',
+                       dict(request, move=move['uci']))
+
+
+def run_load(base_url, names, args, recorder):
+    """Lance args.concurrency threads clients jusqu'à args.sessions sessions ou args.duration secondes"""
+    remaining = [args.sessions]
+    lock = threading.Lock()
+    deadline = time.monotonic() + args.duration if args.duration else None
+
+    def take_session():
+        with lock:
+            if deadline is not None:
+                return time.monotonic() < deadline
+            if remaining[0] <= 0:
+                return False
+            remaining[0] -= 1
+            return True
+
+    def worker(index):
+        rng = random.Random(args.seed * 1000 + index)
+        client = Client(base_url, recorder)
+        while take_session():
+            run_session(client, rng.choice(names), rng, args.hint_rate, args.mistake_rate)
+            if recorder is not None:
+                with lock:
+                    recorder.sessions += 1
+
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(args.concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(data_dir, workers, threads):
+    """Lance gunicorn (gunicorn.conf.py du dépôt) sur un port libre, avec DATA_DIR=data_dir"""
+    port = free_port()
+    env = dict(os.environ, DATA_DIR=data_dir, GITHUB_TOKEN='', LOG_LEVEL='WARNING')
+    command = [sys.executable, '-m', 'gunicorn', '--bind', f'127.0.0.1:{port}', '--log-level', 'warning',
+               '--workers', str(workers), '--threads', str(threads), 'app:app']
+    process = subprocess.Popen(command, cwd=ROOT, env=env)
+    base_url = f'http://127.0.0.1:{port}'
+    deadline = time.monotonic() + 120
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"gunicorn s'est arrêté au démarrage (code {process.returncode})")
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=1):
+                pass
+            if Client(base_url, None).request(None, 'GET', '/') is not None:
+                return process, base_url
+        except OSError:
+            pass
+        time.sleep(0.2)
+    stop_server(process)
+    raise RuntimeError("gunicorn ne répond pas après 120 s")
+
+
+def stop_server(process):
+    process.terminate()
+    try:
+        process.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def print_report(report):
+    print(f"{report['sessions']} session(s), {report['requests']} requête(s) en {report['elapsed_s']} s : "
+          f"{report['rps']} req/s, {report['sessions_per_s']} sessions/s")
+    print(f"{'route':<34}{'requêtes':>9}{'erreurs':>9}{'req/s':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}  (ms)")
+    for route, stats in report['routes'].items():
+        print(f"{route:<34}{stats['count']:>9}{stats['errors']:>9}{stats['rps']:>9}"
+              f"{stats['p50_ms']:>9}{stats['p95_ms']:>9}{stats['p99_ms']:>9}{stats['max_ms']:>9}")
+
+
+def regressions(report, baseline, max_regression):
+    """Routes dont le p95 dépasse celui de la référence de plus de max_regression (fraction)"""
+    found = []
+    for route, stats in report['routes'].items():
+        reference = baseline.get('routes', {}).get(route)
+        if reference and stats['p95_ms'] > reference['p95_ms'] * (1 + max_regression):
+            found.append((route, reference['p95_ms'], stats['p95_ms']))
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Test de charge local de l'API d'entraînement")
+    parser.add_argument('--url', help="serveur déjà lancé (sinon gunicorn est démarré localement)")
+    parser.add_argument('--data-dir', default=os.path.join(ROOT, 'data'), help="corpus à copier (openings.json)")
+    parser.add_argument('--workers', type=int, default=2, help="workers gunicorn")
+    parser.add_argument('--threads', type=int, default=1, help="threads par worker gunicorn")
+    parser.add_argument('--concurrency', type=int, default=8, help="sessions simultanées")
+    parser.add_argument('--sessions', type=int, default=200, help="nombre de sessions mesurées")
+    parser.add_argument('--duration', type=float, help="durée de la mesure en secondes (remplace --sessions)")
+    parser.add_argument('--warmup', type=int, default=20, help="sessions de chauffe, non mesurées")
+    parser.add_argument('--hint-rate', type=float, default=0.2, help="probabilité d'un get_hint par coup du joueur")
+    parser.add_argument('--mistake-rate', type=float, default=0.1, help="probabilité d'une erreur par coup du joueur")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', help="enregistre le rapport dans ce fichier")
+    parser.add_argument('--baseline', help="rapport de référence (--json d'une exécution précédente)")
+    parser.add_argument('--max-regression', type=float, default=0.2, help="hausse de p95 tolérée (0.2 = 20 %%)")
+    args = parser.parse_args()
+
+    names = opening_names(args.data_dir)
+    if not names:
+        print("Aucune ouverture jouable dans", args.data_dir)
+        return 1
+
+    process = temp_dir = None
+    base_url = args.url
+    try:
+        if base_url is None:
+            temp_dir = tempfile.mkdtemp(prefix='sacthebook-loadtest-')
+            shutil.copy(os.path.join(args.data_dir, 'openings.json'), temp_dir)
+            process, base_url = start_server(temp_dir, args.workers, args.threads)
+        print(f"🧪 {base_url} : {len(names)} ouverture(s), {args.concurrency} session(s) simultanée(s)")
+
+        if args.warmup:
+            warmup = argparse.Namespace(**vars(args))
+            warmup.sessions, warmup.duration = args.warmup, None
+            run_load(base_url, names, warmup, None)
+
+        recorder = Recorder()
+        elapsed = run_load(base_url, names, args, recorder)
+    finally:
+        if process is not None:
+            stop_server(process)
+        if temp_dir is not None:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+    report = recorder.report(elapsed)
+    report['config'] = {key: getattr(args, key) for key in
+                        ('workers', 'threads', 'concurrency', 'sessions', 'duration', 'hint_rate', 'mistake_rate', 'seed')}
+    report['config']['openings'] = len(names)
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=4, ensure_ascii=False)
+
+    status = 0
+    if any(stats['errors'] for stats in report['routes'].values()):
+        print("⚠️  Des requêtes ont échoué.")
+        status = 1
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        for route, before, after in regressions(report, baseline, args.max_regression):
+            print(f"❌ {route} : p95 {before} ms -> {after} ms")
+            status = 1
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,86 @@
+# Journalisation : niveaux, un logger par module, écriture dans un thread dédié
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+
+TEXT_FORMAT = '%(asctime)s %(levelname)s [%(process)d] %(name)s: %(message)s'
+
+_handler = None   # QueueHandler installé sur le logger racine
+_listener = None  # Thread qui écrit les messages de la file
+
+
+class DebugSampler(logging.Filter):
+    """Ne garde qu'une fraction `rate` des messages DEBUG ; les autres niveaux passent tous"""
+
+    def __init__(self, rate=1.0):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        return record.levelno > logging.DEBUG or self.rate >= 1 or random.random() < self.rate
+
+
+class JSONFormatter(logging.Formatter):
+    """Une ligne JSON par message, pour un collecteur de journaux"""
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'pid': record.process,
+            'message': record.getMessage(),
+        }
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+def configure_logging(level='INFO', fmt='text', debug_sample_rate=1.0, stream=None):
+    """Installe sur le logger racine un QueueHandler : la requête ne fait que mettre le
+    message en file, un thread écrit sur stream (stdout par défaut). Sans effet au
+    second appel.
+
+    Les modules journalisent avec logging.getLogger(__name__) et des arguments
+    %-style (logger.debug("... %s", valeur)) : sous le niveau configuré, l'appel
+    s'arrête avant toute mise en forme.
+    """
+    global _handler, _listener
+    if _handler is not None:
+        return
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(JSONFormatter() if fmt == 'json' else logging.Formatter(TEXT_FORMAT))
+    log_queue = queue.SimpleQueue()
+    _handler = logging.handlers.QueueHandler(log_queue)
+    _handler.addFilter(DebugSampler(debug_sample_rate))
+    root = logging.getLogger()
+    root.addHandler(_handler)
+    root.setLevel(level.upper() if isinstance(level, str) else level)
+    _listener = logging.handlers.QueueListener(log_queue, output)
+    _listener.start()
+    atexit.register(_stop)
+    os.register_at_fork(after_in_child=_restart_after_fork)
+
+
+def _restart_after_fork():
+    # Le thread d'écriture ne survit pas au fork des workers gunicorn : nouvelle file, nouveau thread
+    global _listener
+    if _listener is None:
+        return
+    log_queue = queue.SimpleQueue()
+    _handler.queue = log_queue
+    _listener = logging.handlers.QueueListener(log_queue, *_listener.handlers)
+    _listener.start()
+
+
+def _stop():
+    # Écrit les messages encore en file avant la sortie du processus
+    if _listener is not None and _listener._thread is not None:
+        _listener.stop()
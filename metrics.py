@@ -0,0 +1,222 @@
+# Mesures de latence (requêtes HTTP et étapes internes) exposées au format texte de Prometheus
+
+import atexit
+import bisect
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Bornes (secondes) des histogrammes : de la milliseconde à la synchronisation GitHub lente
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_HELP = {
+    'http_request_duration_seconds': ('histogram', "Durée de traitement des requêtes par route"),
+    'http_requests_total': ('counter', "Requêtes traitées par route et code de statut"),
+    'span_duration_seconds': ('histogram', "Durée des étapes internes (chargement du corpus, PGN, JSON, GitHub)"),
+    'span_errors_total': ('counter', "Étapes internes terminées par une exception"),
+}
+
+
+class Metrics:
+    """Histogrammes de durée et compteurs, additionnés entre les workers gunicorn.
+
+    Chaque processus tient ses propres séries et les écrit toutes les
+    flush_interval secondes dans directory/<pid>.json. render() additionne les
+    fichiers des processus encore vivants : /metrics donne les totaux de tous
+    les workers, quel que soit celui qui répond. Sans directory, seules les
+    séries du processus courant sont exposées.
+    """
+
+    def __init__(self, directory=None, flush_interval=5.0, namespace='sacthebook'):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.namespace = namespace
+        self._reset()
+        atexit.register(self._remove_file)
+
+    def _reset(self):
+        # État propre au processus : appelé à la création et après un fork
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._histograms = {}  # (nom, labels) -> [compte par intervalle..., compte au-delà, somme]
+        self._counters = {}    # (nom, labels) -> valeur
+        self._dirty = False
+        self._thread = None
+
+    def _check_fork(self):
+        # Un worker forké repart de zéro : les séries héritées sont celles du maître
+        if self._pid != os.getpid():
+            self._reset()
+
+    def _ensure_thread(self):
+        if self.directory and (self._thread is None or not self._thread.is_alive()):
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._flush_loop, name='metrics-flush', daemon=True)
+                    self._thread.start()
+
+    def observe(self, name, value, **labels):
+        """Ajoute une durée (secondes) à l'histogramme name{labels}"""
+        self._check_fork()
+        key = (name, tuple(sorted(labels.items())))
+        index = bisect.bisect_left(BUCKETS, value)
+        with self._lock:
+            series = self._histograms.get(key)
+            if series is None:
+                series = self._histograms[key] = [0] * (len(BUCKETS) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+            self._dirty = True
+        self._ensure_thread()
+
+    def inc(self, name, amount=1, **labels):
+        self._check_fork()
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+            self._dirty = True
+        self._ensure_thread()
+
+    @contextmanager
+    def span(self, name):
+        """Mesure la durée du bloc sous span_duration_seconds{span=name}"""
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.inc('span_errors_total', span=name)
+            raise
+        finally:
+            self.observe('span_duration_seconds', time.perf_counter() - start, span=name)
+
+    def snapshot(self):
+        """Séries du processus courant, sérialisables en JSON"""
+        self._check_fork()
+        with self._lock:
+            return {
+                'histograms': [[name, list(labels), list(series)] for (name, labels), series in self._histograms.items()],
+                'counters': [[name, list(labels), value] for (name, labels), value in self._counters.items()],
+            }
+
+    def _file(self, pid=None):
+        return os.path.join(self.directory, f'{pid or os.getpid()}.json')
+
+    def flush(self):
+        """Écrit les séries du processus dans son fichier (sans fsync : rien de durable ici)"""
+        if not self.directory or not self._dirty:
+            return
+        self._dirty = False
+        data = json.dumps(self.snapshot()).encode('utf-8')
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix='.metrics-', suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, self._file())
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except OSError as e:
+                logger.warning("Écriture des mesures impossible: %s", e)
+
+    def _remove_file(self):
+        if self.directory and self._pid == os.getpid():
+            try:
+                os.remove(self._file())
+            except OSError:
+                pass
+
+    def _snapshots(self):
+        """Séries de ce processus et des autres processus vivants ayant écrit leur fichier"""
+        yield self.snapshot()
+        if not self.directory:
+            return
+        try:
+            filenames = os.listdir(self.directory)
+        except OSError:
+            return
+        for filename in filenames:
+            pid = filename[:-len('.json')]
+            if not filename.endswith('.json') or not pid.isdigit() or int(pid) == os.getpid():
+                continue
+            try:
+                os.kill(int(pid), 0)
+            except ProcessLookupError:
+                # Worker arrêté sans nettoyage : ses compteurs disparaissent (remise à zéro)
+                try:
+                    os.remove(os.path.join(self.directory, filename))
+                except OSError:
+                    pass
+                continue
+            except OSError:
+                pass  # processus vivant appartenant à un autre utilisateur
+            try:
+                with open(os.path.join(self.directory, filename), 'r', encoding='utf-8') as f:
+                    yield json.load(f)
+            except (OSError, ValueError):
+                continue
+
+    def collect(self):
+        """(histogrammes, compteurs) additionnés sur tous les processus"""
+        histograms, counters = {}, {}
+        for snapshot in self._snapshots():
+            for name, labels, series in snapshot['histograms']:
+                key = (name, tuple(tuple(label) for label in labels))
+                total = histograms.setdefault(key, [0] * len(series))
+                for i, value in enumerate(series):
+                    total[i] += value
+            for name, labels, value in snapshot['counters']:
+                key = (name, tuple(tuple(label) for label in labels))
+                counters[key] = counters.get(key, 0) + value
+        return histograms, counters
+
+    def render(self):
+        """Format d'exposition texte de Prometheus (version 0.0.4)"""
+        histograms, counters = self.collect()
+        lines = []
+        for name, (kind, help_text) in _HELP.items():
+            series = histograms if kind == 'histogram' else counters
+            keys = sorted(key for key in series if key[0] == name)
+            if not keys:
+                continue
+            full_name = f'{self.namespace}_{name}'
+            lines.append(f'# HELP {full_name} {help_text}')
+            lines.append(f'# TYPE {full_name} {kind}')
+            for key in keys:
+                labels = key[1]
+                if kind == 'counter':
+                    lines.append(f'{full_name}{_labels(labels)} {_number(series[key])}')
+                    continue
+                values = series[key]
+                cumulative = 0
+                for bound, count in zip(BUCKETS, values):
+                    cumulative += count
+                    lines.append(f'{full_name}_bucket{_labels(labels, le=_number(bound))} {cumulative}')
+                cumulative += values[len(BUCKETS)]
+                lines.append(f'{full_name}_bucket{_labels(labels, le="+Inf")} {cumulative}')
+                lines.append(f'{full_name}_sum{_labels(labels)} {_number(values[-1])}')
+                lines.append(f'{full_name}_count{_labels(labels)} {cumulative}')
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(labels, **extra):
+    pairs = list(labels) + list(extra.items())
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
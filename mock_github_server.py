@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Serveur local qui imite le sous-ensemble de l'API REST GitHub utilisé par la
+synchronisation (dépôt, lecture et écriture d'un fichier), pour tester sans
+réseau ni token réel.
+
+Utilisation :
+    python mock_github_server.py --port 8001 --seed data/openings.json
+    GITHUB_TOKEN=test GITHUB_API_URL=http://127.0.0.1:8001 python app.py
+
+GET /_mock/state retourne les commits reçus, le nombre de requêtes par route
+et les octets envoyés. Les GET portent un ETag et répondent 304 à If-None-Match.
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlsplit
+
+from github_status import git_blob_sha
+
+
+class MockGitHub:
+    """État en mémoire : fichiers par branche, commits et compteurs de requêtes"""
+
+    def __init__(self, repo='Noan-r/SacTheBook', branch='master'):
+        self.repo = repo
+        self.default_branch = branch
+        self.files = {}  # (branche, chemin) -> contenu (bytes)
+        self.commits = []
+        self.requests = Counter()
+        self.lock = threading.Lock()
+
+    def put(self, path, content, branch=None, message='seed'):
+        with self.lock:
+            self.files[(branch or self.default_branch, path)] = content
+            self.commits.append({'path': path, 'branch': branch or self.default_branch,
+                                 'message': message, 'sha': git_blob_sha(content)})
+
+
+def make_handler(state):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status, payload=None, etag=False):
+            body = json.dumps(payload if payload is not None else {}).encode('utf-8')
+            if etag:
+                # Comme GitHub : ETag sur les GET, 304 sans corps si If-None-Match correspond
+                tag = '"%s"' % hashlib.sha1(body).hexdigest()
+                if self.headers.get('If-None-Match') == tag:
+                    state.requests['304 Not Modified'] += 1
+                    self.send_response(304)
+                    self.send_header('ETag', tag)
+                    self.end_headers()
+                    return
+            state.requests['bytes sent'] += len(body)
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            if etag:
+                self.send_header('ETag', tag)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _base(self):
+            return f'http://{self.headers.get("Host")}'
+
+        def _route(self):
+            parts = urlsplit(self.path)
+            query = dict(p.split('=', 1) for p in parts.query.split('&') if '=' in p)
+            segments = [unquote(s) for s in parts.path.strip('/').split('/')]
+            return segments, query
+
+        def _repo_json(self):
+            return {
+                'id': 1,
+                'name': state.repo.split('/')[1],
+                'full_name': state.repo,
+                'default_branch': state.default_branch,
+                'url': f'{self._base()}/repos/{state.repo}',
+            }
+
+        def _content_json(self, path, content, branch):
+            return {
+                'type': 'file',
+                'encoding': 'base64',
+                'name': path.rsplit('/', 1)[-1],
+                'path': path,
+                'size': len(content),
+                'sha': git_blob_sha(content),
+                'content': base64.b64encode(content).decode('ascii'),
+                'url': f'{self._base()}/repos/{state.repo}/contents/{path}?ref={branch}',
+            }
+
+        def _match_repo(self, segments):
+            return len(segments) >= 3 and segments[0] == 'repos' and '/'.join(segments[1:3]) == state.repo
+
+        def do_GET(self):
+            segments, query = self._route()
+            if segments == ['_mock', 'state']:
+                with state.lock:
+                    return self._send(200, {'commits': state.commits, 'requests': dict(state.requests)})
+            if not self._match_repo(segments):
+                return self._send(404, {'message': 'Not Found'})
+            if len(segments) == 3:
+                state.requests['GET repo'] += 1
+                return self._send(200, self._repo_json(), etag=True)
+            if segments[3] == 'contents':
+                path = '/'.join(s for s in segments[4:] if s)
+                branch = query.get('ref', state.default_branch)
+                content = state.files.get((branch, path))
+                if content is not None:
+                    state.requests['GET contents (file)'] += 1
+                    return self._send(200, self._content_json(path, content, branch), etag=True)
+                # Dossier : métadonnées des fichiers directement dedans, sans contenu
+                prefix = path + '/' if path else ''
+                entries = []
+                for (file_branch, file_path), file_content in sorted(state.files.items()):
+                    if file_branch == branch and file_path.startswith(prefix) and '/' not in file_path[len(prefix):]:
+                        entry = self._content_json(file_path, file_content, branch)
+                        del entry['content'], entry['encoding']
+                        entries.append(entry)
+                state.requests['GET contents (dir)'] += 1
+                if not entries:
+                    return self._send(404, {'message': 'Not Found'})
+                return self._send(200, entries, etag=True)
+            return self._send(404, {'message': 'Not Found'})
+
+        def do_PUT(self):
+            segments, _ = self._route()
+            if not self._match_repo(segments) or len(segments) < 5 or segments[3] != 'contents':
+                return self._send(404, {'message': 'Not Found'})
+            state.requests['PUT contents'] += 1
+            path = '/'.join(segments[4:])
+            payload = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+            branch = payload.get('branch', state.default_branch)
+            current = state.files.get((branch, path))
+            if current is not None and payload.get('sha') != git_blob_sha(current):
+                return self._send(409, {'message': f'{path} does not match {payload.get("sha")}'})
+            content = base64.b64decode(payload['content'])
+            state.put(path, content, branch, payload.get('message', ''))
+            return self._send(201 if current is None else 200, {
+                'content': self._content_json(path, content, branch),
+                'commit': {'sha': hashlib.sha1(str(len(state.commits)).encode()).hexdigest(),
+                           'message': payload.get('message', '')},
+            })
+
+    return Handler
+
+
+def serve(state, host='127.0.0.1', port=0):
+    """Démarre le serveur dans un thread et le retourne (port choisi par l'OS si 0)"""
+    server = ThreadingHTTPServer((host, port), make_handler(state))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serveur GitHub de substitution pour tester la synchronisation")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8001)
+    parser.add_argument('--repo', default='Noan-r/SacTheBook')
+    parser.add_argument('--branch', default='master')
+    parser.add_argument('--path', default='data/openings.json', help='chemin du fichier dans le dépôt')
+    parser.add_argument('--seed', help='fichier local servant de contenu initial')
+    args = parser.parse_args()
+
+    state = MockGitHub(args.repo, args.branch)
+    if args.seed:
+        with open(args.seed, 'rb') as f:
+            state.put(args.path, f.read())
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(state))
+    print(f"API GitHub de substitution sur http://{args.host}:{args.port} (repo {args.repo})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+# Cache des pages HTML rendues, valable tant que le corpus d'ouvertures ne change pas
+
+import hashlib
+import threading
+
+
+class PageCache:
+    """Pages rendues par clé (modèle, ouverture), associées à la génération du corpus.
+
+    Une entrée est rendue au premier accès et resservie telle quelle tant que la
+    génération passée à get() est la même. L'ETag est un condensé du HTML : il est
+    identique dans tous les workers et change aussi quand le modèle change.
+    Au-delà de max_entries, les entrées les plus anciennes sont retirées.
+    """
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = {}  # clé -> (génération, etag, last_modified, corps)
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0}
+
+    def get(self, key, generation, render):
+        """Retourne (etag, last_modified, corps en bytes) ; render() -> (html, last_modified)"""
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == generation:
+            self.stats['hits'] += 1
+            return entry[1:]
+        self.stats['misses'] += 1
+        html, last_modified = render()
+        body = html.encode('utf-8')
+        entry = (generation, hashlib.sha256(body).hexdigest()[:20], last_modified, body)
+        with self._lock:
+            self._entries.pop(key, None)
+            while len(self._entries) >= self.max_entries:
+                self._entries.pop(next(iter(self._entries)))
+            self._entries[key] = entry
+        return entry[1:]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,108 @@
+# Export du répertoire en flux (PGN multi-parties ou NDJSON), sans le construire en mémoire
+
+import json
+import re
+
+_VARIATION_PREFIX = re.compile(r'^#\d+\s*')
+_PGN_LINE_WIDTH = 80
+CHUNK_SIZE = 16 * 1024
+
+
+def iter_variations(openings, category=None, opening_name=None):
+    """Parcourt (catégorie, ouverture, index, variation) en suivant l'ordre du fichier.
+
+    Les listes sont copiées au fil du parcours : une édition admin concurrente
+    ne peut pas faire échouer un export en cours.
+    """
+    for current_category, category_openings in list(openings.items()):
+        if category is not None and current_category != category:
+            continue
+        for opening in list(category_openings):
+            if opening_name is not None and opening['name'] != opening_name:
+                continue
+            for index, variation in enumerate(list(opening['variations'])):
+                yield current_category, opening, index, variation
+
+
+def _pgn_tag(name, value):
+    value = str(value).replace('\\', '\\\\').replace('"', '\\"')
+    return f'[{name} "{value}"]\n'
+
+
+def _wrap_movetext(movetext):
+    """Coupe le texte des coups à 80 colonnes, comme le recommande le standard PGN"""
+    lines, current = [], ''
+    for token in movetext.split():
+        if current and len(current) + 1 + len(token) > _PGN_LINE_WIDTH:
+            lines.append(current)
+            current = token
+        else:
+            current = f'{current} {token}' if current else token
+    lines.append(current)
+    return '\n'.join(lines)
+
+
+def format_pgn_game(category, opening, index, variation):
+    """Une variation sous forme de partie PGN, relisible par l'import en masse"""
+    movetext = variation['pgn'].strip()
+    if not movetext.endswith('*'):
+        movetext += ' *'
+    return ''.join((
+        _pgn_tag('Event', opening['name']),
+        _pgn_tag('Site', 'SacTheBook'),
+        _pgn_tag('Date', '????.??.??'),
+        _pgn_tag('Round', index + 1),
+        _pgn_tag('White', '?'),
+        _pgn_tag('Black', '?'),
+        _pgn_tag('Result', '*'),
+        _pgn_tag('Opening', opening['name']),
+        _pgn_tag('Variation', _VARIATION_PREFIX.sub('', variation['name'].strip())),
+        _pgn_tag('Category', category),
+        '\n',
+        _wrap_movetext(movetext),
+        '\n\n',
+    ))
+
+
+def format_ndjson_variation(category, opening, index, variation, lines=None):
+    """Une variation par ligne JSON ; `moves` (UCI) vient des lignes compilées si fournies"""
+    record = {
+        'category': category,
+        'opening': opening['name'],
+        'index': index,
+        'name': variation['name'],
+        'pgn': variation['pgn'],
+    }
+    if lines:
+        record['moves'] = [move['uci'] for move in lines[0]['moves']]
+    return json.dumps(record, ensure_ascii=False) + '\n'
+
+
+def _buffered(parts, size=CHUNK_SIZE):
+    """Regroupe les petits morceaux en blocs d'environ `size` octets par écriture réseau"""
+    buffer, length = [], 0
+    for part in parts:
+        buffer.append(part)
+        length += len(part)
+        if length >= size:
+            yield ''.join(buffer)
+            buffer, length = [], 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+def export_pgn(openings, category=None, opening_name=None):
+    return _buffered(format_pgn_game(*item) for item in iter_variations(openings, category, opening_name))
+
+
+def export_ndjson(openings, category=None, opening_name=None, variation_lines=None):
+    """variation_lines est le dict du trainer {(catégorie, ouverture): [(nom, pgn, lignes)]}"""
+    def records():
+        for current_category, opening, index, variation in iter_variations(openings, category, opening_name):
+            lines = None
+            if variation_lines is not None:
+                compiled = variation_lines.get((current_category, opening['name']), ())
+                if index < len(compiled) and compiled[index][:2] == (variation['name'], variation['pgn']):
+                    lines = compiled[index][2]
+            yield format_ndjson_variation(current_category, opening, index, variation, lines)
+    return _buffered(records())
@@ -0,0 +1,187 @@
+# Import en masse d'un fichier PGN multi-parties, analysé en parallèle
+
+import io
+import os
+import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import chess
+import chess.pgn
+
+from pgn_validator import validate_line
+from trainer import fold_name, sequence_key
+
+_VARIATION_PREFIX = re.compile(r'^#\d+\s*')
+DEFAULT_VARIATION_NAME = 'Imported Line'
+
+
+def split_games(lines):
+    """Découpe un flux de lignes PGN en textes de partie, sans tout charger en mémoire.
+
+    Une partie commence à la première ligne d'en-tête ([Tag "..."]) qui suit
+    le texte des coups de la partie précédente.
+    """
+    game = []
+    in_movetext = False
+    for line in lines:
+        if line.startswith('\ufeff'):
+            line = line[1:]
+        stripped = line.strip()
+        if stripped.startswith('[') and in_movetext:
+            yield ''.join(game)
+            game, in_movetext = [], False
+        if stripped and not stripped.startswith('['):
+            in_movetext = True
+        game.append(line if line.endswith('\n') else line + '\n')
+    if any(line.strip() for line in game):
+        yield ''.join(game)
+
+
+class _GameBuilder(chess.pgn.GameBuilder):
+    """Garde les erreurs dans game.errors (reprises dans le rapport) sans les journaliser"""
+
+    def handle_error(self, error):
+        self.game.errors.append(error)
+
+
+def _header(headers, name):
+    value = headers.get(name, '').strip()
+    return '' if value in ('', '?') else value
+
+
+def parse_game(number, text, color=None):
+    """Analyse une partie (dans un processus du pool) et retourne un dict sérialisable.
+
+    L'ouverture vient de l'en-tête Opening (à défaut Event), le nom de variation de
+    Variation (à défaut "Blancs - Noirs"). Seule la ligne principale est gardée ; elle
+    est réécrite en SAN canonique puis validée comme une variation saisie à la main.
+    """
+    result = {'game': number, 'opening': None, 'variation': None, 'pgn': None,
+              'moves': [], 'zobrist': None, 'errors': []}
+    try:
+        game = chess.pgn.read_game(io.StringIO(text), Visitor=_GameBuilder)
+    except (ValueError, IndexError) as e:
+        game = None
+        result['errors'].append({'code': 'unreadable_game', 'message': str(e)})
+    if game is None:
+        if not result['errors']:
+            result['errors'].append({'code': 'unreadable_game', 'message': "Partie illisible"})
+        return result
+    if game.errors:
+        result['errors'].append({'code': 'invalid_game', 'message': str(game.errors[0])})
+        return result
+
+    headers = game.headers
+    result['opening'] = _header(headers, 'Opening') or _header(headers, 'Event')
+    players = ' - '.join(filter(None, (_header(headers, 'White'), _header(headers, 'Black'))))
+    result['variation'] = _header(headers, 'Variation') or players or DEFAULT_VARIATION_NAME
+    if not result['opening']:
+        result['errors'].append({'code': 'missing_opening', 'message': "Ni en-tête Opening ni Event"})
+        return result
+
+    pgn = game.board().variation_san(game.mainline_moves())
+    validation = validate_line(pgn + ' *', color)
+    result['pgn'] = validation.pgn
+    result['moves'] = validation.moves
+    result['zobrist'] = validation.zobrist
+    result['errors'] = validation.errors
+    return result
+
+
+def parse_batch(batch, color=None):
+    return [parse_game(number, text, color) for number, text in batch]
+
+
+def parse_games(lines, color=None, workers=None, batch_size=64):
+    """Analyse toutes les parties d'un flux PGN, dans l'ordre, en répartissant les lots
+    de batch_size parties sur un pool de processus.
+
+    Le fichier est lu au fur et à mesure : au plus deux lots par processus sont en
+    attente, quelle que soit la taille du fichier. workers=1 analyse sur place.
+    """
+    workers = workers or os.cpu_count() or 1
+    games = enumerate(split_games(lines), 1)
+    batches = iter(lambda: list(islice(games, batch_size)), [])
+    if workers == 1:
+        for batch in batches:
+            yield from parse_batch(batch, color)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for batch in batches:
+            pending.append(pool.submit(parse_batch, batch, color))
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def merge_games(results, category, openings, find_opening, find_opening_folded, variation_index):
+    """Ajoute les parties analysées aux ouvertures de la catégorie (liste de config.OPENINGS).
+
+    Les noms d'ouverture sont comparés sans tenir compte de la casse, comme à l'ajout
+    manuel : une partie rejoint l'ouverture existante de la catégorie, et est refusée
+    si ce nom appartient à une ouverture d'une autre catégorie. Les parties en erreur
+    et les lignes déjà présentes (dans le corpus ou plus tôt dans l'import) sont
+    ignorées et listées dans le rapport. Retourne
+    (rapport, [(catégorie, ouverture, precompiled)]) pour repository.commit_openings.
+    """
+    report = {'games': 0, 'imported': 0, 'created_openings': [], 'updated_openings': [],
+              'transpositions': 0, 'skipped': []}
+    touched = {}  # nom replié de l'ouverture -> (ouverture, precompiled, noms de variation pris)
+    imported_sequences = set()
+    for result in results:
+        report['games'] += 1
+        if result['errors']:
+            report['skipped'].append({'game': result['game'], 'opening': result['opening'],
+                                      'reason': result['errors'][0]['code'], 'errors': result['errors']})
+            continue
+        name = result['opening']
+        key = fold_name(name)
+        if key not in touched:
+            _, opening = find_opening(name, category)
+            if opening is None:
+                other_category, opening = find_opening_folded(name)
+                if opening is not None and other_category != category:
+                    message = f"L'ouverture \"{opening['name']}\" existe déjà dans la catégorie {other_category}"
+                    report['skipped'].append({'game': result['game'], 'opening': name, 'reason': 'opening_in_other_category',
+                                              'errors': [{'code': 'opening_in_other_category', 'message': message}]})
+                    continue
+
+        sequence = sequence_key(result['moves'])
+        duplicate, transpositions = variation_index.find(sequence, result['zobrist'])
+        if duplicate or sequence in imported_sequences:
+            report['skipped'].append({'game': result['game'], 'opening': result['opening'],
+                                      'reason': 'duplicate_pgn', 'errors': []})
+            continue
+        imported_sequences.add(sequence)
+        report['transpositions'] += bool(transpositions)
+
+        if key in touched:
+            opening, precompiled, taken = touched[key]
+        else:
+            if opening is None:
+                opening = {'name': name, 'variations': []}
+                openings.append(opening)
+                report['created_openings'].append(name)
+            else:
+                report['updated_openings'].append(opening['name'])
+            # Noms uniques dans l'ouverture (en ignorant le préfixe #N), numérotés comme à la main
+            taken = {_VARIATION_PREFIX.sub('', v['name'].strip().lower()) for v in opening['variations']}
+            precompiled = {}
+            touched[key] = (opening, precompiled, taken)
+
+        base = result['variation']
+        title, suffix = base, 2
+        while title.lower() in taken:
+            title, suffix = f"{base} ({suffix})", suffix + 1
+        taken.add(title.lower())
+        variation_name = f"#{len(opening['variations']) + 1} {title}"
+        opening['variations'].append({'name': variation_name, 'pgn': result['pgn']})
+        precompiled[(variation_name, result['pgn'])] = [{'name': variation_name, 'moves': result['moves']}]
+        report['imported'] += 1
+
+    changes = [(category, opening, precompiled) for opening, precompiled, _ in touched.values()]
+    return report, changes
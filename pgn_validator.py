@@ -0,0 +1,144 @@
+# Validation des PGN de variation en un seul passage sur l'échiquier
+
+import re
+
+import chess
+import chess.polyglot
+
+# Caractères acceptés dans un PGN de variation (coups SAN, numéros, fin de partie)
+_INVALID_CHAR = re.compile(r'[^0-9.\s\w+#=\-*!?]')
+_TOKEN = re.compile(r'\S+')
+_MOVE_NUMBER = re.compile(r'(\d+)\.$')
+_COMPACT_MOVE_NUMBER = re.compile(r'\d+\.+\S')
+
+INVALID_PGN_MESSAGE = "Invalid PGN"
+
+
+class PGNValidation:
+    """Résultat de validation : coups compilés et erreurs positionnées.
+
+    Chaque erreur est un dict {'code', 'message', 'offset', 'token', 'ply'} où
+    offset est la position du caractère fautif dans le PGN et ply le demi-coup
+    concerné (0 pour le premier coup des blancs), None quand ils ne s'appliquent pas.
+    Les avertissements (transpositions) n'empêchent pas l'enregistrement. zobrist
+    est le hash de la position finale, None tant que la marche n'est pas complète.
+    """
+
+    __slots__ = ('pgn', 'moves', 'errors', 'warnings', 'zobrist')
+
+    def __init__(self, pgn):
+        self.pgn = pgn
+        self.moves = []
+        self.errors = []
+        self.warnings = []
+        self.zobrist = None
+
+    @property
+    def valid(self):
+        return not self.errors
+
+    @property
+    def message(self):
+        """Message d'erreur court historiquement renvoyé par l'API, None si valide"""
+        return None if self.valid else INVALID_PGN_MESSAGE
+
+    def add_error(self, code, message, offset=None, token=None, ply=None):
+        self.errors.append({'code': code, 'message': message, 'offset': offset, 'token': token, 'ply': ply})
+
+    def compiled_lines(self, variation_name):
+        """Lignes au format de OpeningTrainer.compile_variation, pour ne pas reparser le PGN"""
+        return {(variation_name, self.pgn.strip()): [{'name': variation_name, 'moves': list(self.moves)}]}
+
+
+def validate_line(pgn, color=None):
+    """Valide le PGN d'une variation en une seule marche sur l'échiquier.
+
+    Le découpage en tokens, la numérotation des coups, la légalité de chaque coup
+    et l'écriture SAN canonique (un "Bg20" ou "Nge2" superflu est refusé) sont
+    vérifiés au même passage. Si color vaut 'white' ou 'black', le dernier coup
+    doit être joué par cette couleur. S'arrête à la première erreur sur un coup.
+    """
+    result = PGNValidation(pgn)
+    bad_char = _INVALID_CHAR.search(pgn)
+    if bad_char:
+        result.add_error('invalid_character', f"Caractère non autorisé {bad_char.group()!r}",
+                         offset=bad_char.start(), token=bad_char.group())
+        return result
+
+    tokens = [(m.start(), m.group()) for m in _TOKEN.finditer(pgn)]
+    if not tokens:
+        result.add_error('empty', "PGN vide")
+        return result
+    if tokens[-1][1] == '*':
+        tokens.pop()
+    move_positions = [i for i, (_, token) in enumerate(tokens) if not _MOVE_NUMBER.match(token)]
+    last_move_position = move_positions[-1] if move_positions else None
+
+    board = chess.Board()
+    numbered = False  # le numéro du prochain coup blanc a été lu
+    for position, (offset, token) in enumerate(tokens):
+        ply = len(result.moves)
+        number = _MOVE_NUMBER.match(token)
+        if number:
+            expected = ply // 2 + 1
+            if ply % 2 or numbered:
+                result.add_error('unexpected_move_number', f"Numéro de coup {token} inattendu avant un coup noir",
+                                 offset=offset, token=token, ply=ply)
+                return result
+            if int(number.group(1)) != expected:
+                result.add_error('move_number_out_of_sequence', f"Numéro de coup {token} au lieu de {expected}.",
+                                 offset=offset, token=token, ply=ply)
+                return result
+            numbered = True
+            continue
+        if _COMPACT_MOVE_NUMBER.match(token):
+            result.add_error('compact_move_number', f"Espace manquant après le numéro de coup dans {token!r}",
+                             offset=offset, token=token, ply=ply)
+            return result
+        if token == '*':
+            result.add_error('unexpected_result', "Le marqueur de fin '*' doit terminer le PGN",
+                             offset=offset, token=token, ply=ply)
+            return result
+        if ply % 2 == 0 and not numbered:
+            result.add_error('missing_move_number', f"Numéro de coup {ply // 2 + 1}. manquant avant {token}",
+                             offset=offset, token=token, ply=ply)
+            return result
+
+        try:
+            move = board.parse_san(token)
+        except chess.AmbiguousMoveError:
+            result.add_error('ambiguous_move', f"Coup ambigu {token}", offset=offset, token=token, ply=ply)
+            return result
+        except chess.IllegalMoveError:
+            result.add_error('illegal_move', f"Coup illégal {token}", offset=offset, token=token, ply=ply)
+            return result
+        except ValueError:
+            result.add_error('invalid_san', f"Notation SAN invalide {token!r}", offset=offset, token=token, ply=ply)
+            return result
+
+        san = board.san(move)
+        # Le '#' final peut être omis (comme le tolérait l'ancienne comparaison)
+        if token != san and not (position == last_move_position and san.endswith('#') and token == san[:-1]):
+            result.add_error('non_canonical_san', f"{token} s'écrit {san}", offset=offset, token=token, ply=ply)
+            return result
+        result.moves.append({'san': san, 'uci': move.uci()})
+        board.push(move)
+        numbered = False
+    result.zobrist = chess.polyglot.zobrist_hash(board)
+
+    if not result.moves:
+        result.add_error('no_moves', "Aucun coup trouvé")
+        return result
+    if numbered:
+        offset, token = tokens[-1]
+        result.add_error('dangling_move_number', f"Numéro de coup {token} sans coup", offset=offset, token=token,
+                         ply=len(result.moves))
+        return result
+
+    if color in ('white', 'black'):
+        last_move_color = 'white' if len(result.moves) % 2 == 1 else 'black'
+        if last_move_color != color:
+            result.add_error('wrong_last_move_color',
+                             f"Le dernier coup doit être joué par les {'blancs' if color == 'white' else 'noirs'}",
+                             ply=len(result.moves) - 1)
+    return result
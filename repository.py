@@ -0,0 +1,315 @@
+# Dépôt compilé des ouvertures, partagé par toutes les requêtes du processus
+
+import atexit
+import hashlib
+import json
+import logging
+import mmap
+import os
+import pickle
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+import storage
+
+import config
+from trainer import OpeningIndex, OpeningTrainer
+
+logger = logging.getLogger(__name__)
+
+# Snapshot binaire du trainer compilé, écrit à côté de openings.json.
+# Incrémenter SNAPSHOT_VERSION à chaque changement de structure de trainer.py.
+SNAPSHOT_MAGIC = b'SACTB'
+SNAPSHOT_VERSION = 3
+_SNAPSHOT_HEADER_SIZE = len(SNAPSHOT_MAGIC) + 2 + 32  # magic, version, sha256 du JSON source
+
+
+class SharedGeneration:
+    """Compteur de génération partagé par tous les workers via un fichier de 8 octets
+    mappé en mémoire : le lire ne coûte ni appel système ni accès disque."""
+
+    SIZE = 8
+
+    def __init__(self, path):
+        self.path = path
+        self._map = None
+
+    def _open(self):
+        if self._map is None:
+            try:
+                fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+                try:
+                    if os.fstat(fd).st_size < self.SIZE:
+                        os.ftruncate(fd, self.SIZE)
+                    self._map = mmap.mmap(fd, self.SIZE)
+                finally:
+                    os.close(fd)
+            except (OSError, ValueError) as e:
+                logger.warning("Compteur de génération partagé indisponible (%s): %s", self.path, e)
+        return self._map
+
+    def value(self):
+        shared = self._open()
+        return int.from_bytes(shared[:self.SIZE], 'little') if shared is not None else 0
+
+    def bump(self):
+        """Signale aux autres workers que le corpus a changé"""
+        shared = self._open()
+        if shared is not None:
+            value = max(time.time_ns(), self.value() + 1)
+            shared[:self.SIZE] = value.to_bytes(self.SIZE, 'little')
+
+
+class OpeningRepository:
+    """Garde en mémoire l'OpeningTrainer compilé et ne le reconstruit que lorsque
+    la génération du fichier JSON (mtime/taille/hash du contenu) change."""
+
+    def __init__(self, path=None):
+        self.path = path or config.OPENINGS_FILE
+        self.snapshot_path = os.path.splitext(self.path)[0] + '.snapshot'
+        self.shared_generation = SharedGeneration(os.path.splitext(self.path)[0] + '.generation')
+        self._lock = threading.RLock()
+        self._stat = None
+        self._seen_shared_generation = None
+        self._next_stat_check = 0.0
+        self.content_hash = None
+        self.generation = 0
+        self.trainer = None
+        self.catalog = OpeningIndex({})  # index sur config.OPENINGS (données brutes)
+        self._snapshot_pending = threading.Event()  # snapshot à réécrire après une édition
+        self._snapshot_thread = None
+        atexit.register(self.flush_snapshot)
+
+    def _file_stat(self):
+        """Signature bon marché du fichier : (mtime_ns, taille), None s'il n'existe pas"""
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def get_trainer(self):
+        """Retourne le trainer compilé, en le reconstruisant seulement si le fichier a changé.
+
+        Une édition admin dans n'importe quel worker incrémente le compteur partagé,
+        vérifié à chaque appel ; les modifications faites hors de l'application ne
+        sont détectées que par stat(), au plus une fois toutes les
+        config.OPENINGS_STAT_INTERVAL secondes.
+        """
+        if (self.trainer is None
+                or self.shared_generation.value() != self._seen_shared_generation
+                or time.monotonic() >= self._next_stat_check):
+            self.refresh()
+        return self.trainer
+
+    def refresh(self, force=False):
+        """Recharge config.OPENINGS et recompile si la génération du fichier a changé.
+
+        Retourne True si une recompilation a eu lieu.
+        """
+        with self._lock:
+            shared_generation = self.shared_generation.value()
+            # Un autre worker a publié une édition : on compare le contenu même si
+            # stat() n'a pas bougé (mtime de même granularité, même taille)
+            published = shared_generation != self._seen_shared_generation
+            self._seen_shared_generation = shared_generation
+            self._next_stat_check = time.monotonic() + config.OPENINGS_STAT_INTERVAL
+            stat = self._file_stat()
+            if not force and not published and self.trainer is not None and stat == self._stat:
+                return False
+
+            # Lecture, décodage et compilation (ou snapshot) du corpus
+            with config.METRICS.span('corpus_load'):
+                content = None
+                version = 0
+                if stat is not None:
+                    try:
+                        # Sous verrou : contenu et version lus ensemble, jamais pendant une écriture
+                        with config.OPENINGS_LOCK:
+                            with open(self.path, 'rb') as f:
+                                content = f.read()
+                            version = storage.read_version(config.OPENINGS_VERSION_FILE)
+                            stat = self._file_stat()
+                    except OSError as e:
+                        logger.error("Erreur lors de la lecture de %s: %s", self.path, e)
+
+                content_hash = hashlib.sha256(content).hexdigest() if content is not None else None
+                if not force and self.trainer is not None and content_hash == self.content_hash:
+                    # Fichier touché mais contenu identique : rien à recompiler
+                    self._stat = stat
+                    config.OPENINGS_VERSION = version
+                    return False
+
+                trainer = None
+                if content is not None:
+                    try:
+                        config.OPENINGS = json.loads(content.decode('utf-8'))
+                        config.OPENINGS_VERSION = version
+                    except ValueError as e:
+                        # Fichier en cours d'écriture ou corrompu : on garde la version compilée
+                        logger.error("Erreur lors du chargement JSON: %s", e)
+                        if self.trainer is not None:
+                            return False
+                    else:
+                        trainer = self._load_snapshot(content_hash)
+                        if trainer is None:
+                            trainer = OpeningTrainer(config.OPENINGS)
+                            self._write_snapshot(content_hash, trainer)
+
+                self.trainer = trainer or OpeningTrainer(config.OPENINGS)
+                self.catalog = OpeningIndex(config.OPENINGS)
+                self._stat = stat
+                self.content_hash = content_hash
+                self.generation += 1
+                return True
+
+    @contextmanager
+    def mutation(self):
+        """Sérialise une mutation de config.OPENINGS entre threads et workers.
+
+        Le verrou fichier est pris avant de recharger les données : la mutation
+        part toujours de la dernière version écrite, et aucun autre worker ne peut
+        écrire avant sa sauvegarde.
+        """
+        with self._lock, config.OPENINGS_LOCK:
+            self.refresh()
+            yield
+
+    def commit_opening(self, category, opening, removed=False, precompiled=None):
+        """À appeler après la sauvegarde d'une mutation admin portant sur une seule
+        ouverture de config.OPENINGS : seules ses variations modifiées sont reparsées
+        (sauf celles fournies déjà compilées dans precompiled), et seuls son arbre de
+        coups et ses entrées d'index sont reconstruits."""
+        if removed:
+            with self._lock:
+                if self.trainer is None:
+                    return self.refresh(force=True)
+                self.catalog.remove(category, opening)
+                self.trainer.remove_opening(category, opening['name'])
+                self._mark_saved()
+                return True
+        return self.commit_openings([(category, opening, precompiled)])
+
+    def commit_openings(self, changes):
+        """Comme commit_opening pour plusieurs ouvertures [(catégorie, ouverture, precompiled)]
+        enregistrées par une seule sauvegarde (import en masse) : un seul snapshot écrit
+        et une seule génération publiée."""
+        with self._lock:
+            if self.trainer is None:
+                return self.refresh(force=True)
+            for category, opening, precompiled in changes:
+                if self.catalog.find(opening['name'], category)[1] is not opening:
+                    self.catalog.add(category, opening)
+                self.trainer.update_opening(category, opening, precompiled)
+            self._mark_saved()
+            return True
+
+    def _mark_saved(self):
+        """Aligne la génération sur le fichier que l'on vient d'écrire, sans recompiler.
+
+        L'empreinte est celle des octets écrits par config.save_openings_to_json : le
+        fichier n'est ni relu ni haché. Le snapshot, désormais périmé, est supprimé et
+        réécrit hors de la requête par un thread (schedule_snapshot).
+        """
+        self._stat = self._file_stat()
+        self.content_hash = config.OPENINGS_CONTENT_HASH
+        self.generation += 1
+        self._discard_snapshot()
+        if self.content_hash:
+            self.schedule_snapshot()
+        self._publish()
+
+    def _publish(self):
+        """Prévient les autres workers qu'ils doivent recharger"""
+        self.shared_generation.bump()
+        self._seen_shared_generation = self.shared_generation.value()
+
+    def schedule_snapshot(self):
+        """Demande la réécriture du snapshot par le thread dédié ; les éditions
+        rapprochées n'en écrivent qu'un, pour la dernière version"""
+        self._snapshot_pending.set()
+        # Le thread ne survit pas au fork des workers gunicorn : on le relance au besoin
+        if self._snapshot_thread is None or not self._snapshot_thread.is_alive():
+            with self._lock:
+                if self._snapshot_thread is None or not self._snapshot_thread.is_alive():
+                    self._snapshot_thread = threading.Thread(target=self._snapshot_loop,
+                                                             name='openings-snapshot', daemon=True)
+                    self._snapshot_thread.start()
+
+    def _snapshot_loop(self):
+        while True:
+            self._snapshot_pending.wait()
+            self.flush_snapshot()
+
+    def flush_snapshot(self):
+        """Écrit tout de suite le snapshot demandé (thread dédié, ou sortie du processus)"""
+        # Sous verrou : le trainer n'est pas modifié pendant qu'on le sérialise
+        with self._lock:
+            if not self._snapshot_pending.is_set():
+                return
+            self._snapshot_pending.clear()
+            if self.content_hash and self.trainer is not None:
+                with config.METRICS.span('snapshot_write'):
+                    self._write_snapshot(self.content_hash, self.trainer)
+
+    def _discard_snapshot(self):
+        try:
+            os.unlink(self.snapshot_path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning("Suppression du snapshot %s impossible: %s", self.snapshot_path, e)
+
+    def _load_snapshot(self, content_hash):
+        """Charge le trainer précompilé si le snapshot correspond au JSON source, sinon None"""
+        try:
+            with open(self.snapshot_path, 'rb') as f:
+                header = f.read(_SNAPSHOT_HEADER_SIZE)
+                magic = header[:len(SNAPSHOT_MAGIC)]
+                version = int.from_bytes(header[len(SNAPSHOT_MAGIC):len(SNAPSHOT_MAGIC) + 2], 'big')
+                source_hash = header[len(SNAPSHOT_MAGIC) + 2:].hex()
+                if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION or source_hash != content_hash:
+                    return None
+                trainer = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            # Snapshot tronqué ou illisible : on recompile
+            logger.warning("Snapshot %s ignoré: %s", self.snapshot_path, e)
+            return None
+        return trainer if isinstance(trainer, OpeningTrainer) else None
+
+    def _write_snapshot(self, content_hash, trainer):
+        """Écrit le snapshot via un fichier temporaire renommé atomiquement"""
+        directory = os.path.dirname(self.snapshot_path) or '.'
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.openings-', suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(SNAPSHOT_MAGIC)
+                    f.write(SNAPSHOT_VERSION.to_bytes(2, 'big'))
+                    f.write(bytes.fromhex(content_hash))
+                    pickle.dump(trainer, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp_path, self.snapshot_path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except Exception as e:
+            logger.error("Erreur lors de l'écriture du snapshot: %s", e)
+
+    def find_opening(self, name, category=None):
+        """Retourne (catégorie, ouverture brute de config.OPENINGS) en O(1)"""
+        return self.catalog.find(name, category)
+
+    def find_opening_folded(self, name):
+        """Recherche insensible à la casse, utilisée pour l'unicité des noms"""
+        return self.catalog.find_folded(name)
+
+    def commit(self):
+        """À appeler après une mutation admin sauvegardée : force la recompilation"""
+        with self._lock:
+            compiled = self.refresh(force=True)
+            self._publish()
+            return compiled
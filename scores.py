@@ -0,0 +1,98 @@
+# Stockage des meilleurs scores, séparé de openings.json
+
+import os
+import sqlite3
+import threading
+import time
+
+
+class ScoreStore:
+    """Meilleurs scores par ouverture dans une petite base SQLite.
+
+    Une mise à jour ne touche qu'une ligne et ne garde que le maximum : deux
+    workers qui enregistrent un score en même temps ne peuvent pas faire
+    régresser le record.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+    def _connection(self):
+        # Une connexion par thread et par processus : une connexion SQLite ouverte
+        # dans le maître gunicorn ne doit pas être réutilisée après le fork
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS best_scores ('
+                ' opening_name TEXT PRIMARY KEY,'
+                ' best_score INTEGER NOT NULL,'
+                ' updated_at REAL NOT NULL'
+                ') WITHOUT ROWID'
+            )
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, opening_name):
+        """Meilleur score enregistré pour l'ouverture, 0 s'il n'y en a pas"""
+        row = self._connection().execute(
+            'SELECT best_score FROM best_scores WHERE opening_name = ?', (opening_name,)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def save(self, opening_name, score):
+        """Enregistre score s'il bat le record, et retourne le record en vigueur"""
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute(
+                'INSERT INTO best_scores (opening_name, best_score, updated_at) VALUES (?, ?, ?) '
+                'ON CONFLICT(opening_name) DO UPDATE SET'
+                ' best_score = excluded.best_score, updated_at = excluded.updated_at '
+                'WHERE excluded.best_score > best_scores.best_score',
+                (opening_name, score, time.time())
+            )
+            best_score = conn.execute(
+                'SELECT best_score FROM best_scores WHERE opening_name = ?', (opening_name,)
+            ).fetchone()[0]
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return best_score
+
+    def import_from_openings(self, openings_by_category):
+        """Reprend les champs best_score historiquement stockés dans openings.json.
+
+        Idempotent (compare-and-max) : peut être rejoué à chaque démarrage ou après
+        une synchronisation GitHub sans écraser de meilleurs scores.
+        """
+        now = time.time()
+        legacy = [
+            (opening['name'], int(opening['best_score']), now)
+            for openings in openings_by_category.values()
+            for opening in openings
+            if isinstance(opening.get('best_score'), (int, float))
+        ]
+        if not legacy:
+            return 0
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.executemany(
+                'INSERT INTO best_scores (opening_name, best_score, updated_at) VALUES (?, ?, ?) '
+                'ON CONFLICT(opening_name) DO UPDATE SET'
+                ' best_score = excluded.best_score, updated_at = excluded.updated_at '
+                'WHERE excluded.best_score > best_scores.best_score',
+                legacy
+            )
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return len(legacy)
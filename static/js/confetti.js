@@ -0,0 +1,81 @@
+// Pluie de confettis de fin de ligne, servie depuis static/ comme le reste de la page.
+// Remplace canvas-confetti pour le seul usage de opening.js :
+// confetti({ particleCount, spread, origin: { x, y } }), x et y entre 0 et 1.
+(function() {
+    const COLORS = ['#26ccff', '#a25afd', '#ff5e7e', '#88ff5a', '#fcff42', '#ffa62d', '#ff36ff'];
+    const GRAVITY = 0.5;
+    const DRAG = 0.9;
+    const DURATION = 200; // en images (~3 s à 60 images/s)
+
+    let canvas = null;
+    let particles = [];
+
+    function createCanvas() {
+        canvas = document.createElement('canvas');
+        canvas.style.cssText = 'position:fixed;top:0;left:0;width:100%;height:100%;pointer-events:none;z-index:100;';
+        canvas.width = window.innerWidth;
+        canvas.height = window.innerHeight;
+        document.body.appendChild(canvas);
+    }
+
+    function particle(x, y, spread) {
+        // Tirées vers le haut, dans un cône de `spread` degrés
+        const angle = (90 + (Math.random() - 0.5) * spread) * Math.PI / 180;
+        const velocity = 22 + Math.random() * 23;
+        return {
+            x: x,
+            y: y,
+            vx: Math.cos(angle) * velocity,
+            vy: -Math.sin(angle) * velocity,
+            tilt: Math.random() * Math.PI,
+            wobble: Math.random() * 10,
+            size: 6 + Math.random() * 4,
+            color: COLORS[Math.floor(Math.random() * COLORS.length)],
+            age: 0
+        };
+    }
+
+    function frame() {
+        const context = canvas.getContext('2d');
+        context.clearRect(0, 0, canvas.width, canvas.height);
+        particles = particles.filter(function(p) { return p.age < DURATION && p.y < canvas.height + 20; });
+        particles.forEach(function(p) {
+            p.vx *= DRAG;
+            p.vy = p.vy * DRAG + GRAVITY * 3;
+            p.x += p.vx + Math.cos(p.wobble) * 2;
+            p.y += p.vy;
+            p.wobble += 0.1;
+            p.tilt += 0.1;
+            p.age++;
+            context.globalAlpha = 1 - p.age / DURATION;
+            context.fillStyle = p.color;
+            context.beginPath();
+            context.ellipse(p.x, p.y, p.size, p.size * Math.abs(Math.sin(p.tilt)) + 1, p.wobble, 0, 2 * Math.PI);
+            context.fill();
+        });
+        if (particles.length) {
+            window.requestAnimationFrame(frame);
+        } else {
+            canvas.remove();
+            canvas = null;
+        }
+    }
+
+    window.confetti = function(options) {
+        options = options || {};
+        const origin = options.origin || {};
+        const count = options.particleCount || 50;
+        const animating = canvas !== null;
+        if (!animating) {
+            createCanvas();
+        }
+        const x = (origin.x === undefined ? 0.5 : origin.x) * canvas.width;
+        const y = (origin.y === undefined ? 0.5 : origin.y) * canvas.height;
+        for (let i = 0; i < count; i++) {
+            particles.push(particle(x, y, options.spread || 45));
+        }
+        if (!animating) {
+            window.requestAnimationFrame(frame);
+        }
+    };
+})();
@@ -0,0 +1,2626 @@
+// OPTIMISATION MOBILE - Logs réduits
+if (!('ontouchstart' in window)) {
+    console.log('🚀 SCRIPT STARTING - JavaScript is running!');
+}
+
+// SCRIPT OPTIMISÉ POUR MOBILE - FORCER L'ORIENTATION IMMÉDIATEMENT
+(function() {
+    if ('ontouchstart' in window) {
+        console.log('🚀 MOBILE DETECTED - Applying optimized orientation fix');
+
+        // Attendre que le DOM soit prêt
+        if (document.readyState === 'loading') {
+            document.addEventListener('DOMContentLoaded', forceMobileOrientation);
+        } else {
+            forceMobileOrientation();
+        }
+
+        function forceMobileOrientation() {
+            // Détecter l'orientation basée sur l'URL et le nom de l'ouverture
+            const urlPath = window.location.pathname;
+            const urlOpeningName = decodeURIComponent(urlPath.split('/').pop());
+
+            // Liste complète et exacte des ouvertures de défense
+            const defenseOpenings = [
+                'Sicilian Defense',
+                'French Defense',
+                'Stafford Gambit'
+            ];
+
+            // Détection plus précise : vérifier si le nom exact est dans la liste
+            const isDefense = defenseOpenings.some(defense => 
+                urlOpeningName === defense || openingName === defense
+            );
+
+            const forcedOrientation = isDefense ? 'black' : 'white';
+
+            // Créer une variable globale pour l'orientation
+            window.MOBILE_ORIENTATION = forcedOrientation;
+
+            console.log('MOBILE ORIENTATION DETECTION:', {
+                urlOpeningName: urlOpeningName,
+                openingName: openingName,
+                isDefense: isDefense,
+                forcedOrientation: forcedOrientation
+            });
+
+            // OPTIMISATION: Forcer l'orientation seulement 3 fois, plus rapide
+            let attempts = 0;
+            const maxAttempts = 3;
+            const interval = setInterval(() => {
+                attempts++;
+
+                if (window.board && window.board.orientation) {
+                    window.board.orientation(forcedOrientation);
+                }
+
+                if (attempts >= maxAttempts) {
+                    clearInterval(interval);
+                }
+            }, 200); // Plus rapide: 200ms au lieu de 500ms
+        }
+    }
+})();
+
+// === VARIABLES GLOBALES ===
+var board = null;
+var game = new Chess();
+var lines = [];
+var currentLineIndex = 0;
+var currentMoveIndex = 0;
+var isLineComplete = false;
+var premoveMode = false;
+var premoveSource = null;
+var autoPlayEnabled = false;
+var drillMode = false;
+var pendingPreMove = null;
+    var premoveHighlightSquares = [];
+var premoveWindowOpen = false;
+
+// Nouveau système de drill mode (variables globales)
+var drillSuccessiveOpenings = 0;
+var drillOpeningDeck = [];
+var drillCurrentOpeningComplete = false;
+var drillBestScore = 0; // Best score (longest streak)
+
+// Autres variables globales
+var COMPUTER_MOVE_DELAY = 300;
+var orientation = null; // Sera initialisé depuis le serveur
+var openingName = null; // Sera initialisé depuis le serveur
+
+// Variables pour le highlight des coups légaux
+var highlightStyles = null;
+          var whiteSquareGrey = '#a9a9a9';
+  var blackSquareGrey = '#696969';
+
+          // === SYSTÈME DE SONS ===
+var audioContext = null;
+var soundEnabled = true;
+var audioFiles = {};
+
+// === FONCTION OPTIMISÉE POUR DÉFINIR L'ORIENTATION ===
+function setBoardOrientation() {
+    if (board && orientation) {
+        // OPTIMISATION: Logs réduits sur mobile
+        if (!('ontouchstart' in window)) {
+            console.log('🚀 setBoardOrientation called with orientation:', orientation);
+        }
+
+        // FORCER L'ORIENTATION
+        board.orientation(orientation);
+
+        // OPTIMISATION: Force renforcée sur mobile
+        if ('ontouchstart' in window) {
+            // Vérification multiple sur mobile pour garantir l'orientation
+            let attempts = 0;
+            const maxAttempts = 5;
+            const checkMobileOrientation = () => {
+                attempts++;
+                if (board && board.orientation() !== orientation) {
+                    board.orientation(orientation);
+                    console.log(`MOBILE: Orientation fix attempt ${attempts}/${maxAttempts}`);
+                }
+
+                if (attempts < maxAttempts) {
+                    setTimeout(checkMobileOrientation, 150);
+                }
+            };
+
+            setTimeout(checkMobileOrientation, 100);
+        }
+    }
+}
+
+// === FONCTION SIMPLIFIÉE POUR CRÉER LE PLATEAU ===
+function createBoard(config) {
+    // UTILISER L'ORIENTATION FORCÉE SUR MOBILE
+    const finalOrientation = ('ontouchstart' in window && window.MOBILE_ORIENTATION) ? 
+        window.MOBILE_ORIENTATION : orientation;
+
+    // OPTIMISATION: Logs réduits sur mobile
+    if (!('ontouchstart' in window)) {
+        console.log('🚀 Creating board with orientation:', finalOrientation);
+    }
+
+    // Garantir que l'orientation est correcte sur mobile
+    if ('ontouchstart' in window) {
+        console.log('🚀 MOBILE: Creating board with forced orientation:', finalOrientation);
+        // Forcer l'orientation dans la config
+        config.orientation = finalOrientation;
+    }
+
+    // FORCER L'ORIENTATION DANS LA CONFIG
+    config.orientation = finalOrientation;
+
+    // FORCER LE DRAG & DROP SUR MOBILE
+    if ('ontouchstart' in window) {
+        config.draggable = true;
+    }
+
+    const newBoard = Chessboard('myBoard', config);
+    if (newBoard) {
+        // OPTIMISATION: Logs réduits sur mobile
+        if (!('ontouchstart' in window)) {
+            console.log('🚀 Board created successfully');
+        }
+
+        // FORCER L'ORIENTATION IMMÉDIATEMENT APRÈS CRÉATION
+        newBoard.orientation(finalOrientation);
+
+        // FORCER LE DRAG & DROP IMMÉDIATEMENT SUR MOBILE
+        if ('ontouchstart' in window) {
+            newBoard.draggable = true;
+        }
+
+        // OPTIMISATION: Vérification simplifiée
+        const actualOrientation = newBoard.orientation();
+        if (actualOrientation !== finalOrientation) {
+            newBoard.orientation(finalOrientation);
+        }
+
+        // OPTIMISATION: Une seule vérification rapide sur mobile
+        if ('ontouchstart' in window) {
+            setTimeout(() => {
+                newBoard.orientation(finalOrientation);
+                newBoard.draggable = true;
+            }, 100);
+        }
+    }
+    return newBoard;
+}
+
+// === FONCTION DE DIAGNOSTIC D'ORIENTATION ===
+function diagnoseOrientation() {
+    if (!board) {
+        console.log('🔍 DIAGNOSTIC: No board available');
+        return;
+    }
+
+    const defenseOpenings = [
+        'Sicilian Defense',
+        'French Defense',
+        'Stafford Gambit'
+    ];
+
+    console.log('🔍 DIAGNOSTIC ORIENTATION:', {
+        expectedOrientation: orientation,
+        actualBoardOrientation: board.orientation(),
+        isMobile: 'ontouchstart' in window,
+        mobileOrientation: window.MOBILE_ORIENTATION,
+        openingName: openingName,
+        isDefense: defenseOpenings.some(defense => 
+            openingName === defense
+        ),
+        gameTurn: game.turn(),
+        gameFen: game.fen()
+    });
+}
+
+  // Initialiser l'API Web Audio
+  function initAudio() {
+      try {
+          audioContext = new (window.AudioContext || window.webkitAudioContext)();
+          console.log('Audio context initialized');
+          loadAudioFiles();
+      } catch (e) {
+          console.warn('Audio not supported:', e);
+          soundEnabled = false;
+      }
+  }
+
+  // Fonction pour initialiser l'audio après interaction utilisateur
+  function initAudioOnUserInteraction() {
+      if (!audioContext) {
+          initAudio();
+      } else if (audioContext.state === 'suspended') {
+          audioContext.resume();
+      }
+
+      if (Object.keys(audioFiles).length === 0) {
+          loadAudioFiles();
+      }
+  }
+
+  // Charger les fichiers audio
+  function loadAudioFiles() {
+      const soundFiles = window.OPENING_PAGE.sounds;
+
+      Object.keys(soundFiles).forEach(sound => {
+          const audio = new Audio(soundFiles[sound]);
+          audio.preload = 'auto';
+          audioFiles[sound] = audio;
+      });
+  }
+
+  // Fonction pour jouer un son synthétique (pour les boutons)
+  function playSyntheticSound(type) {
+      if (!soundEnabled) return;
+
+      // Initialiser l'audio si nécessaire
+      initAudioOnUserInteraction();
+
+      if (!audioContext) return;
+
+      try {
+          const oscillator = audioContext.createOscillator();
+          const gainNode = audioContext.createGain();
+
+          oscillator.connect(gainNode);
+          gainNode.connect(audioContext.destination);
+
+          // Configuration selon le type de son
+          switch(type) {
+              case 'button':
+                  oscillator.frequency.setValueAtTime(600, audioContext.currentTime);
+                  oscillator.type = 'triangle';
+                  gainNode.gain.setValueAtTime(0.2, audioContext.currentTime);
+                  gainNode.gain.exponentialRampToValueAtTime(0.01, audioContext.currentTime + 0.05);
+                  oscillator.start(audioContext.currentTime);
+                  oscillator.stop(audioContext.currentTime + 0.05);
+                  break;
+
+              case 'error':
+                  oscillator.frequency.setValueAtTime(200, audioContext.currentTime);
+                  oscillator.frequency.exponentialRampToValueAtTime(150, audioContext.currentTime + 0.2);
+                  oscillator.type = 'sawtooth';
+                  gainNode.gain.setValueAtTime(0.3, audioContext.currentTime);
+                  gainNode.gain.exponentialRampToValueAtTime(0.01, audioContext.currentTime + 0.2);
+                  oscillator.start(audioContext.currentTime);
+                  oscillator.stop(audioContext.currentTime + 0.2);
+                  break;
+
+              case 'notify':
+                  oscillator.frequency.setValueAtTime(1000, audioContext.currentTime);
+                  oscillator.type = 'sine';
+                  gainNode.gain.setValueAtTime(0.2, audioContext.currentTime);
+                  gainNode.gain.exponentialRampToValueAtTime(0.01, audioContext.currentTime + 0.08);
+                  oscillator.start(audioContext.currentTime);
+                  oscillator.stop(audioContext.currentTime + 0.08);
+                  break;
+          }
+      } catch (e) {
+          console.warn('Error playing synthetic sound:', e);
+      }
+  }
+
+  // Fonction pour jouer un fichier audio
+  function playAudioFile(type) {
+      if (!soundEnabled) return;
+
+      // Initialiser l'audio si nécessaire
+      initAudioOnUserInteraction();
+
+      if (!audioFiles[type]) {
+          console.warn('Audio file not loaded:', type);
+          return;
+      }
+
+      try {
+          const audio = audioFiles[type];
+          audio.currentTime = 0;
+          audio.play().catch(e => {
+              console.warn('Error playing audio file:', e);
+          });
+      } catch (e) {
+          console.warn('Error playing audio file:', e);
+      }
+  }
+
+  // Fonctions globales pour les sons
+  window.playMoveSound = function() { playAudioFile('move'); };
+  window.playCaptureSound = function() { playAudioFile('capture'); };
+  window.playCheckSound = function() { playAudioFile('check'); };
+  window.playWinSound = function() { playAudioFile('win'); };
+  window.playButtonSound = function() { 
+      initAudioOnUserInteraction();
+      playSyntheticSound('button'); 
+  };
+  window.playErrorSound = function() { playSyntheticSound('error'); };
+  window.playIncorrectSound = function() { playAudioFile('incorrect'); };
+  window.playPromoteSound = function() { playAudioFile('promote'); };
+  window.playCastleSound = function() { playAudioFile('castle'); };
+  window.playGameEndSound = function() { playAudioFile('game-end'); };
+  window.playNotifySound = function() { playSyntheticSound('notify'); };
+
+// === FONCTION RADICALE POUR FORCER LE COMPORTEMENT EN DÉFENSE ===
+function forceDefenseBehavior() {
+    if (orientation !== 'black') return;
+
+    // Vérifier si le premier coup blanc a été joué
+    if (game.turn() === 'w') {
+        if (!('ontouchstart' in window)) {
+            console.log('🚨 RADICAL FIX: White to play in defense - forcing first move');
+        }
+
+        // Forcer le premier coup blanc
+        if (lines && lines[currentLineIndex] && lines[currentLineIndex].moves && lines[currentLineIndex].moves.length > 0) {
+            const move = lines[currentLineIndex].moves[0];
+            game.move(move.san);
+            board.position(game.fen());
+
+            if (!('ontouchstart' in window)) {
+                console.log('🚨 RADICAL FIX: First white move forced:', move.san);
+                console.log('🚨 RADICAL FIX: Turn after force:', game.turn());
+            }
+        }
+    } else if (game.turn() === 'b') {
+        // Le premier coup blanc a été joué, c'est correct
+        if (!('ontouchstart' in window)) {
+            console.log('🚨 RADICAL FIX: Defense setup correct - black to play');
+        }
+    }
+
+    // Forcer l'orientation noire
+    if (board && board.orientation() !== 'black') {
+        board.orientation('black');
+        if (!('ontouchstart' in window)) {
+            console.log('🚨 RADICAL FIX: Orientation forced to black');
+        }
+    }
+
+    // Forcer le drag & drop
+    if (board) {
+        board.draggable = true;
+    }
+
+    // Vérification finale
+    if (!('ontouchstart' in window)) {
+        console.log('🚨 RADICAL FIX: Final check - Turn:', game.turn(), 'Orientation:', board ? board.orientation() : 'no board');
+    }
+}
+
+// === SOLUTION RADICALE: Forcer le comportement à chaque interaction ===
+function addDefenseClickHandler() {
+    if (orientation === 'black' && board) {
+        // Ajouter un event listener sur le plateau
+        const boardElement = document.getElementById('myBoard');
+        if (boardElement) {
+            boardElement.addEventListener('click', function() {
+                // Forcer le comportement correct à chaque clic
+                setTimeout(() => {
+                    forceDefenseBehavior();
+                }, 50);
+            });
+        }
+    }
+}
+
+// Fonctions globales critiques
+function setupLine() {
+    // OPTIMISATION: Logs réduits sur mobile
+    if (!('ontouchstart' in window)) {
+        console.log('🚀 SETUP LINE START');
+        console.log('🚀 Orientation at setup:', orientation);
+        console.log('🚀 Board exists:', !!board);
+        console.log('🚀 Lines available:', lines ? lines.length : 'null');
+    }
+    isLineComplete = false;
+    game.reset();
+    currentMoveIndex = 0;
+    clearPreMove();
+    premoveWindowOpen = false;
+    // Supprime le hashtag d'échec et mat
+    removeCheckmateHashtag();
+    // Fermer le dialogue de promotion s'il est ouvert
+    if (typeof window.hidePromotionDialog === 'function') {
+        window.hidePromotionDialog();
+    }
+
+    if (orientation === 'black') {
+        // Pour les noirs, on doit jouer le premier coup des blancs pour être en défense
+        if (!('ontouchstart' in window)) {
+            console.log('🚀 BLACK ORIENTATION DETECTED');
+        }
+
+        // TOUJOURS jouer le premier coup blanc en défense
+        if (lines && lines[currentLineIndex] && lines[currentLineIndex].moves && lines[currentLineIndex].moves.length > 0) {
+            const move = lines[currentLineIndex].moves[0]; // Premier coup
+            if (!('ontouchstart' in window)) {
+                console.log('🚀 PLAYING FIRST WHITE MOVE:', move.san);
+            }
+            game.move(move.san);
+            currentMoveIndex = 1; // Passer au deuxième coup
+            if (!('ontouchstart' in window)) {
+                console.log('🚀 FIRST WHITE MOVE PLAYED - Turn is now:', game.turn());
+            }
+        } else {
+            console.error('🚀 NO MOVES AVAILABLE FOR DEFENSE SETUP!');
+        }
+    } else if (orientation === 'white') {
+        // Pour les blancs, on commence avec la position initiale
+        console.log('🔧 WHITE ORIENTATION - starting with initial position');
+    } else if (orientation === null) {
+        console.warn('🔧 ORIENTATION NOT YET INITIALIZED, skipping setup');
+    }
+
+    // CRITIQUE: Appliquer la position APRÈS avoir joué le premier coup
+    if (!('ontouchstart' in window)) {
+        console.log('🔧 APPLYING BOARD POSITION with FEN:', game.fen());
+        console.log('🔧 Game turn after setup:', game.turn());
+        console.log('🔧 Expected turn for orientation', orientation, ':', orientation === 'black' ? 'b' : 'w');
+    }
+    board.position(game.fen());
+
+    // CRITIQUE: Vérifier que le tour est correct pour l'orientation
+    const currentTurn = game.turn();
+    const expectedTurn = orientation === 'black' ? 'b' : 'w';
+    if (currentTurn !== expectedTurn) {
+        if (!('ontouchstart' in window)) {
+            console.log('🚨 CRITICAL: Turn mismatch! Current:', currentTurn, 'Expected:', expectedTurn);
+        }
+        // Si on est en défense (noir) mais que c'est aux blancs de jouer, on a un problème
+        if (orientation === 'black' && currentTurn === 'w') {
+            if (!('ontouchstart' in window)) {
+                console.log('🚨 DEFENSE SETUP FAILED: White to play instead of black');
+            }
+        }
+    }
+
+    // CRITIQUE: S'assurer que l'orientation est correcte AVANT de continuer
+    if (board.orientation() !== orientation) {
+        if (!('ontouchstart' in window)) {
+            console.log('CRITICAL: Fixing board orientation from', board.orientation(), 'to', orientation);
+        }
+        board.orientation(orientation);
+        if (!('ontouchstart' in window)) {
+            console.log('Board orientation after fix:', board.orientation());
+        }
+    } else {
+        if (!('ontouchstart' in window)) {
+            console.log('Board orientation already correct:', board.orientation());
+        }
+    }
+
+    // CRITIQUE: Correction automatique si le tour est incorrect
+    if (orientation === 'black' && game.turn() === 'w') {
+        if (!('ontouchstart' in window)) {
+            console.log('🚨 AUTO-FIX: White to play in defense - playing first move');
+        }
+        // Rejouer le premier coup blanc si nécessaire
+        if (lines && lines[currentLineIndex] && lines[currentLineIndex].moves && lines[currentLineIndex].moves.length > 0) {
+            const move = lines[currentLineIndex].moves[0]; // Premier coup
+            game.move(move.san);
+            if (!('ontouchstart' in window)) {
+                console.log('🚨 AUTO-FIX: First white move played:', move.san);
+                console.log('🚨 AUTO-FIX: Turn after fix:', game.turn());
+            }
+            board.position(game.fen());
+        }
+    } else if (orientation === 'black' && game.turn() === 'b') {
+        if (!('ontouchstart' in window)) {
+            console.log('🚨 AUTO-FIX: Defense setup correct - black to play');
+        }
+    }
+
+    // SOLUTION RADICALE: Forcer le comportement correct en défense
+    if (orientation === 'black') {
+        // Attendre que tout soit chargé puis forcer le comportement
+        setTimeout(() => {
+            forceDefenseBehavior();
+        }, 200);
+
+        // Forcer à nouveau après un délai plus long
+        setTimeout(() => {
+            forceDefenseBehavior();
+        }, 500);
+
+        // Forcer à nouveau après 1 seconde
+        setTimeout(() => {
+            forceDefenseBehavior();
+        }, 1000);
+
+        // Forcer à nouveau après 2 secondes
+        setTimeout(() => {
+            forceDefenseBehavior();
+        }, 2000);
+
+        // Ajouter le handler de clic
+        setTimeout(() => {
+            addDefenseClickHandler();
+        }, 1000);
+    }
+
+    // CORRECTION MOBILE: Forcer l'orientation et le drag sur mobile
+    if ('ontouchstart' in window) {
+        console.log('MOBILE FIX: Applying aggressive mobile fixes');
+        board.orientation(orientation);
+        board.draggable = true;
+
+        // Forcer la mise à jour de l'affichage avec vérifications multiples
+        setTimeout(function() {
+            board.position(game.fen());
+            board.orientation(orientation);
+            board.draggable = true;
+        }, 50);
+
+        setTimeout(function() {
+            board.orientation(orientation);
+            board.draggable = true;
+        }, 100);
+
+        setTimeout(function() {
+            board.orientation(orientation);
+            board.draggable = true;
+        }, 200);
+
+        // Force supplémentaire pour le drag & drop
+        setTimeout(function() {
+            board.draggable = true;
+            console.log('MOBILE: Final draggable check:', board.draggable);
+        }, 500);
+    }
+
+    // Définir l'orientation du plateau après un délai
+    setTimeout(function() {
+        setBoardOrientation();
+    }, 100);
+    // S'assurer que le drag-and-drop est activé pour le nouveau jeu
+    board.draggable = true;
+    updateStatus();
+
+    // Réinitialise l'état de l'indice pour la nouvelle ligne
+    resetHintToDefault();
+
+    console.log('🚀🚀🚀 SETUP LINE COMPLETE 🚀🚀🚀');
+    console.log('🚀 Final board orientation:', board.orientation());
+    console.log('🚀 Final game turn:', game.turn());
+    console.log('🚀 Final game FEN:', game.fen());
+
+    // Met à jour l'indice si il est affiché
+    updateHintContent();
+
+    // Met à jour le statut en mode Drill
+    if (drillMode) {
+        updateDrillStatus();
+    }
+
+    console.log('🔧 SETUP LINE COMPLETE');
+}
+
+function removeCheckmateHashtag() {
+    $('.checkmate-hashtag').remove();
+}
+
+function updateDrillStatus() {
+    // Fonction legacy - remplacée par updateDrillDisplay()
+    updateDrillDisplay();
+}
+
+function removePreMoveHighlight() {
+    for (const sq of premoveHighlightSquares) {
+        $('#myBoard .square-' + sq).css('box-shadow', '');
+    }
+    premoveHighlightSquares = [];
+}
+
+    function clearPreMove() {
+        pendingPreMove = null;
+        removePreMoveHighlight();
+        // Nettoyer aussi la sélection de pièce
+        selectedPiece = null;
+        removeGreySquares();
+    }
+
+function updateStatus() {
+    // Fonction vide maintenant que le status est supprimé
+}
+
+// Fonctions pour le highlight des coups légaux
+function removeGreySquares() {
+    // Supprimer tous les points de highlight
+    $('.legal-move-dot').remove();
+}
+
+function greySquare(square) {
+    // Créer un point gris semi-transparent
+    const dot = $('<div class="legal-move-dot"></div>');
+
+    // Ajouter le point à la case
+    $(`#myBoard .square-${square}`).append(dot);
+}
+
+// Fonction pour détecter si un coup est une promotion
+window.isPromotion = function(source, target) {
+    const piece = game.get(source);
+
+    // Vérifier si c'est un pion
+    if (!piece || piece.type !== 'p') {
+        return false;
+    }
+
+    // Vérifier les conditions de promotion selon la couleur
+    if (piece.color === 'w') {
+        // Pion blanc : doit partir de la 7ème rangée et aller à la 8ème
+        if (source.charAt(1) === '7' && target.charAt(1) === '8') {
+            // Vérifier si le coup est légal en utilisant moves() avec verbose
+            const tempGame = new Chess(game.fen());
+            const moves = tempGame.moves({ square: source, verbose: true });
+
+            // Chercher un coup vers la case cible avec promotion
+            for (const move of moves) {
+                if (move.to === target && move.flags.includes('p')) {
+                    return true;
+                }
+            }
+        }
+    } else if (piece.color === 'b') {
+        // Pion noir : doit partir de la 2ème rangée et aller à la 1ère
+        if (source.charAt(1) === '2' && target.charAt(1) === '1') {
+            // Vérifier si le coup est légal en utilisant moves() avec verbose
+            const tempGame = new Chess(game.fen());
+            const moves = tempGame.moves({ square: source, verbose: true });
+
+            // Chercher un coup vers la case cible avec promotion
+            for (const move of moves) {
+                if (move.to === target && move.flags.includes('p')) {
+                    return true;
+                }
+            }
+        }
+    }
+
+    return false;
+}
+
+// Fonctions de persistance pour la ligne courante
+function saveCurrentLine() {
+    if (typeof openingName !== 'undefined' && openingName && typeof currentLineIndex !== 'undefined') {
+        const key = 'currentLine_' + openingName;
+        localStorage.setItem(key, currentLineIndex.toString());
+        console.log('Current line saved:', currentLineIndex, 'for opening:', openingName);
+    }
+}
+
+function loadCurrentLine() {
+    // Check if coming from index
+    const urlParams = new URLSearchParams(window.location.search);
+    const fromIndex = urlParams.get('from_index');
+
+    if (fromIndex === '1') {
+        console.log('Coming from index, starting at line 0');
+        // Nettoyer l'URL pour les futures actualisations
+        const url = new URL(window.location);
+        url.searchParams.delete('from_index');
+        window.history.replaceState({}, '', url);
+        return 0;
+    }
+
+    // Cas normal : actualisation classique, charger la ligne sauvegardée
+    if (typeof openingName !== 'undefined' && openingName) {
+        const key = 'currentLine_' + openingName;
+        const saved = localStorage.getItem(key);
+        if (saved !== null) {
+            const lineIndex = parseInt(saved, 10);
+            if (!isNaN(lineIndex) && lineIndex >= 0) {
+                console.log('Restored line:', lineIndex, 'for opening:', openingName);
+                return lineIndex;
+            }
+        }
+    }
+    console.log('No saved line found, using default 0');
+    return 0;
+}
+
+function forceStopDrag() {
+    // Force l'arrêt de tout drag en cours en désactivant puis réactivant le drag
+    const wasDraggable = board.draggable;
+    board.draggable = false;
+    // Forcer la mise à jour de la position
+    board.position(game.fen());
+    // Réactiver le drag seulement s'il était activé
+    if (wasDraggable) {
+        setTimeout(function() {
+            board.draggable = true;
+        }, 5);
+    }
+}
+
+// Fonctions de promotion (déplacées au scope global)
+window.showPromotionDialog = function(from, to, color) {
+    console.log('showPromotionDialog called with:', { from, to, color });
+    window.pendingPromotion = { from: from, to: to, color: color };
+
+    // Créer une position temporaire pour afficher le pion sur la dernière rangée
+    const tempGame = new Chess(game.fen());
+    tempGame.remove(from);
+    tempGame.put({ type: 'p', color: color }, to);
+
+    // Mettre à jour l'affichage avec le pion sur la dernière rangée
+    board.position(tempGame.fen());
+
+    // Créer un dialogue simple avec seulement les icônes
+    const colorPrefix = color === 'w' ? 'w' : 'b';
+
+    // Calculer la position de la pièce promue (case d'arrivée - dernière rangée)
+    const boardRect = document.getElementById('myBoard').getBoundingClientRect();
+    const squareSize = boardRect.width / 8;
+    const file = to.charCodeAt(0) - 'a'.charCodeAt(0);
+    const rank = 8 - parseInt(to[1]);
+
+    // Ajuster la position selon l'orientation de l'échiquier
+    let adjustedFile = file;
+    let adjustedRank = rank;
+
+    if (orientation === 'black') {
+        // En mode noir, inverser les coordonnées
+        adjustedFile = 7 - file;
+        adjustedRank = 7 - rank;
+    }
+
+    // Position du centre de la pièce promue (sur la dernière rangée)
+    const pieceCenterX = boardRect.left + (adjustedFile + 0.5) * squareSize;
+    const pieceCenterY = boardRect.top + (adjustedRank + 0.5) * squareSize;
+
+    // Calculer les dimensions exactes du menu
+    const pieceSize = 30; // Taille de l'icône de pièce
+    const piecePadding = 6; // Padding de chaque bouton
+    const pieceBorder = 1; // Bordure de chaque bouton
+    const pieceGap = 4; // Espace entre les pièces
+    const menuPadding = 8; // Padding du menu
+
+    // Dimensions réelles du menu
+    const menuWidth = pieceSize + (piecePadding * 2) + (pieceBorder * 2) + (menuPadding * 2);
+    const pieceHeight = pieceSize + (piecePadding * 2) + (pieceBorder * 2);
+
+    // Positionner le menu pour que le centre du bouton de la dame soit exactement au centre de la case
+    // Le bouton de la dame est le premier, donc son centre est à (menuPadding + piecePadding + pieceBorder + pieceSize/2) du haut du menu
+    const dameCenterOffset = menuPadding + piecePadding + pieceBorder + (pieceSize / 2);
+
+    const left = pieceCenterX - (menuWidth / 2); // Centrer horizontalement le menu
+    const top = pieceCenterY - dameCenterOffset; // Centrer verticalement le bouton de la dame
+
+    // Créer le HTML du dialogue avec la position calculée
+    let dialogHTML = `
+        <div id="promotion-dialog" style="
+            position: fixed;
+            top: ${top}px;
+            left: ${left}px;
+            background: #F8F5EC;
+            border: 2px solid #F47C20;
+            border-radius: 8px;
+            padding: 8px;
+            z-index: 99999;
+            box-shadow: 0 4px 16px rgba(32,81,58,0.2);
+            display: flex;
+            flex-direction: column;
+            gap: 4px;
+        ">
+    `;
+
+    // Ordre spécifique : dame, tour, fou, cavalier (seulement les icônes)
+    const orderedPieces = ['q', 'r', 'b', 'n'];
+    orderedPieces.forEach(piece => {
+        dialogHTML += `
+            <div class="promotion-piece" data-piece="${piece}" style="
+                cursor: pointer;
+                padding: 6px;
+                border: 1px solid #ddd;
+                border-radius: 4px;
+                transition: all 0.2s;
+                background: white;
+                display: flex;
+                justify-content: center;
+                align-items: center;
+            " onmouseover="this.style.borderColor='#F47C20'; this.style.transform='scale(1.05)'; this.style.background='#fff5e6'" 
+               onmouseout="this.style.borderColor='#ddd'; this.style.transform='scale(1)'; this.style.background='white'">
+                <img src="${window.PIECE_URLS[colorPrefix + piece]}" 
+                     style="width: 30px; height: 30px;" alt="${piece}">
+            </div>
+        `;
+    });
+
+    dialogHTML += `</div>`;
+
+    // Ajouter le dialogue au body avec la position déjà calculée
+    $('body').append(dialogHTML);
+    console.log('Promotion dialog added to body at position:', { top, left });
+
+    // Test temporaire : vérifier que le dialogue est visible
+    setTimeout(() => {
+        const dialog = $('#promotion-dialog');
+        if (dialog.length > 0) {
+            console.log('Dialog is in DOM, visibility:', dialog.is(':visible'), 'display:', dialog.css('display'));
+            console.log('Dialog position:', dialog.offset(), 'dimensions:', dialog.width(), 'x', dialog.height());
+        } else {
+            console.log('Dialog not found in DOM');
+        }
+    }, 100);
+
+                  // Ajouter les événements de clic
+      $('.promotion-piece').on('click', function() {
+          window.playButtonSound();
+          const piece = $(this).data('piece');
+          console.log('Promotion piece clicked:', piece);
+        window.completePromotion(piece);
+    });
+
+    // Fermer le dialogue si on clique en dehors (avec délai pour éviter les conflits)
+    setTimeout(() => {
+        $(document).on('click.promotion', function(e) {
+            if (!$(e.target).closest('#promotion-dialog').length) {
+                window.hidePromotionDialog();
+            }
+        });
+    }, 100);
+}
+
+window.completePromotion = function(piece) {
+    console.log('completePromotion called with piece:', piece, 'pendingPromotion:', window.pendingPromotion);
+    if (!window.pendingPromotion) return;
+
+    console.log('Completing promotion with piece:', piece);
+
+    // Jouer le coup réel dans le jeu principal
+    const move = game.move({
+        from: window.pendingPromotion.from,
+        to: window.pendingPromotion.to,
+        promotion: piece
+    });
+
+    if (move === null) {
+        console.log('Promotion move invalid');
+        window.pendingPromotion = null;
+        window.hidePromotionDialog();
+        return;
+    }
+
+    console.log('Promotion move successful:', move);
+    window.pendingPromotion = null;
+    window.hidePromotionDialog();
+
+    // Mettre à jour l'affichage avec la vraie pièce
+    board.position(game.fen());
+
+    // Vérifie l'échec et mat
+    if (window.checkForCheckmate()) {
+        return;
+    }
+
+    // Valider le coup
+    window.validateUserMove(move);
+}
+
+window.hidePromotionDialog = function() {
+    // Ne pas fermer le dialogue si une promotion est en cours
+    if (window.pendingPromotion) {
+        console.log('Promotion in progress, not hiding dialog');
+        return;
+    }
+
+    const dialog = $('#promotion-dialog');
+    if (dialog.length > 0) {
+        dialog.remove();
+        console.log('Promotion dialog removed from DOM');
+    } else {
+        console.log('No promotion dialog found to remove');
+    }
+    $(document).off('click.promotion');
+    window.pendingPromotion = null;
+    console.log('Promotion dialog hidden');
+}
+
+function resetGame() {
+    // Fermer le dialogue de promotion s'il est ouvert
+    if (typeof window.hidePromotionDialog === 'function') {
+        window.hidePromotionDialog();
+    }
+    setupLine();
+}
+
+// Fonction pour réinitialiser l'état de l'indice au début d'une ligne
+function resetHintToDefault() {
+    const $hintBtn = $('#hint-btn');
+    const $hintTextDiv = $('#hint-text');
+
+    // Toujours remettre l'ampoule au début d'une nouvelle ligne
+    if ($hintTextDiv.hasClass('show')) {
+        $hintTextDiv.removeClass('show');
+        $hintBtn.removeClass('fade-out').addClass('fade-in').css('visibility', 'visible');
+        setTimeout(function() {
+            $hintBtn.removeClass('fade-in');
+        }, 200);
+    }
+}
+
+// Fonction switch pour basculer entre ampoule et indice
+function toggleHint(hintText) {
+    const $hintBtn = $('#hint-btn');
+    const $hintTextDiv = $('#hint-text');
+
+    if ($hintTextDiv.hasClass('show')) {
+        // L'indice est affiché, revenir à l'ampoule
+        $hintTextDiv.removeClass('show');
+        setTimeout(function() {
+            $hintBtn.removeClass('fade-out').addClass('fade-in').css('visibility', 'visible');
+            setTimeout(function() {
+                $hintBtn.removeClass('fade-in');
+            }, 200);
+        }, 100);
+    } else {
+        // L'ampoule est affichée, montrer l'indice
+        $hintBtn.addClass('fade-out');
+        setTimeout(function() {
+            $hintBtn.css('visibility', 'hidden');
+            $hintTextDiv.text(hintText).addClass('show');
+        }, 200);
+    }
+}
+
+// Fonction pour mettre à jour l'indice sans changer l'état d'affichage
+            window.updateHintContent = function() {
+    const $hintBtn = $('#hint-btn');
+    const $hintTextDiv = $('#hint-text');
+
+    if ($hintTextDiv.hasClass('show')) {
+        // L'indice est affiché, mettre à jour son contenu
+        if (currentLineIndex < lines.length && currentMoveIndex < lines[currentLineIndex].moves.length) {
+            const hintMove = lines[currentLineIndex].moves[currentMoveIndex];
+            $hintTextDiv.text(hintMove.san);
+        } else {
+            // Fin de ligne, faire réapparaître l'ampoule
+            $hintTextDiv.removeClass('show');
+            $hintBtn.removeClass('fade-out').addClass('fade-in').css('visibility', 'visible');
+            setTimeout(function() {
+                $hintBtn.removeClass('fade-in');
+            }, 200);
+        }
+    }
+}
+
+// === NOUVEAU SYSTÈME DE DRILL MODE AMÉLIORÉ ===
+
+// Initialise le deck d'ouvertures avec toutes les lignes disponibles
+function initializeDrillDeck() {
+    console.log('Initializing drill deck...');
+    console.log('drillSuccessiveOpenings before init:', typeof drillSuccessiveOpenings, drillSuccessiveOpenings);
+    console.log('drillOpeningDeck before init:', typeof drillOpeningDeck, drillOpeningDeck);
+    console.log('lines available:', lines ? lines.length : 'undefined');
+
+    drillOpeningDeck = [];
+    for (let i = 0; i < lines.length; i++) {
+        drillOpeningDeck.push(i);
+    }
+    shuffleDrillDeckImproved();
+    console.log('Drill deck initialized:', drillOpeningDeck);
+    console.log('drillSuccessiveOpenings after init:', typeof drillSuccessiveOpenings, drillSuccessiveOpenings);
+}
+
+// Mélange amélioré du deck d'ouvertures avec ordre différent à chaque fois
+function shuffleDrillDeckImproved() {
+    console.log('Shuffling drill deck with improved randomness...');
+
+    // Créer un générateur de nombres pseudo-aléatoires basé sur le timestamp
+    const seed = Date.now() + Math.random() * 1000000;
+    let randomSeed = seed;
+
+    function seededRandom() {
+        randomSeed = (randomSeed * 9301 + 49297) % 233280;
+        return randomSeed / 233280;
+    }
+
+    // Mélange Fisher-Yates avec seed personnalisé
+    for (let i = drillOpeningDeck.length - 1; i > 0; i--) {
+        const j = Math.floor(seededRandom() * (i + 1));
+        [drillOpeningDeck[i], drillOpeningDeck[j]] = [drillOpeningDeck[j], drillOpeningDeck[i]];
+    }
+
+    // Ajouter une rotation aléatoire supplémentaire pour plus de variété
+    const rotationOffset = Math.floor(Math.random() * drillOpeningDeck.length);
+    drillOpeningDeck = [...drillOpeningDeck.slice(rotationOffset), ...drillOpeningDeck.slice(0, rotationOffset)];
+
+    console.log('Deck shuffled with seed:', seed, 'Final order:', drillOpeningDeck);
+}
+
+// Démarre le mode drill avec une ouverture vraiment aléatoire
+function startRandomOpening() {
+    console.log('Starting drill mode with random opening...');
+
+    // Vérification que toutes les variables nécessaires sont initialisées
+    if (!lines || lines.length === 0) {
+        console.error('Lines not ready for drill mode');
+        return;
+    }
+
+    if (orientation === null) {
+        console.error('Orientation not ready for drill mode');
+        return;
+    }
+
+    // Choisir une ouverture complètement aléatoire pour commencer
+    const randomStart = Math.floor(Math.random() * lines.length);
+
+    // Retirer cette ouverture du deck pour éviter la répétition immédiate
+    const indexInDeck = drillOpeningDeck.indexOf(randomStart);
+    if (indexInDeck > -1) {
+        drillOpeningDeck.splice(indexInDeck, 1);
+    }
+
+    console.log('Starting with random opening:', randomStart, 'Removed from deck. Remaining:', drillOpeningDeck.length);
+
+    currentLineIndex = randomStart;
+    $('#line-select').val(currentLineIndex);
+    saveCurrentLine(); // Sauvegarder la ligne courante
+    drillCurrentOpeningComplete = false;
+    resetGame();
+    updateNavigationButtons();
+    updateDrillDisplay();
+    updateHintContent(); // Actualise l'indice pour la nouvelle ouverture
+}
+
+// Sélectionne la prochaine ouverture du deck avec garantie d'équité
+function selectNextDrillOpening() {
+    console.log('Selecting next drill opening...');
+    console.log('Current state - orientation:', orientation, 'lines.length:', lines ? lines.length : 'undefined');
+
+    // Vérification que toutes les variables nécessaires sont initialisées
+    if (!lines || lines.length === 0) {
+        console.error('Lines not ready for drill mode');
+        return;
+    }
+
+    if (orientation === null) {
+        console.error('Orientation not ready for drill mode');
+        return;
+    }
+
+    // Si le deck est vide, le réinitialiser et mélanger avec un nouvel ordre
+    if (drillOpeningDeck.length === 0) {
+        console.log('Deck empty, reinitializing with fresh shuffle...');
+        initializeDrillDeck();
+
+        // Message informatif pour le développeur
+        console.log('All openings completed! Starting new cycle with randomized order.');
+    }
+
+    // Prendre la première ouverture du deck
+    const nextOpening = drillOpeningDeck.shift();
+    console.log('Selected opening:', nextOpening, 'Remaining in deck:', drillOpeningDeck.length);
+    console.log('Opening progress: ' + (lines.length - drillOpeningDeck.length) + '/' + lines.length + ' in current cycle');
+
+    currentLineIndex = nextOpening;
+    $('#line-select').val(currentLineIndex);
+    saveCurrentLine(); // Sauvegarder la ligne courante
+    drillCurrentOpeningComplete = false;
+    resetGame();
+    updateNavigationButtons();
+    updateDrillDisplay();
+    updateHintContent(); // Actualise l'indice pour la nouvelle ouverture
+}
+
+// Met à jour l'affichage du compteur de drill
+function updateDrillDisplay() {
+    console.log('updateDrillDisplay called');
+    console.log('drillMode:', drillMode);
+    console.log('drillSuccessiveOpenings:', drillSuccessiveOpenings, 'drillBestScore:', drillBestScore);
+
+    if (drillMode) {
+        if (typeof drillSuccessiveOpenings !== 'undefined' && typeof drillBestScore !== 'undefined') {
+            $('#drill-score').text(drillSuccessiveOpenings);
+            $('#drill-best-score').text('BEST SCORE: ' + drillBestScore);
+            $('#best-score-footer').addClass('show');
+            console.log('Display updated successfully - Successive:', drillSuccessiveOpenings, 'Best:', drillBestScore);
+        } else {
+            console.error('Drill variables undefined in updateDrillDisplay!');
+            $('#drill-score').text('0');
+            $('#drill-best-score').text('BEST SCORE: 0');
+            $('#best-score-footer').addClass('show');
+        }
+    } else {
+        // Mode Learn - masquer la section best score
+        $('#best-score-footer').removeClass('show');
+    }
+}
+
+// Gère le succès d'une ouverture complète
+function handleDrillOpeningSuccess() {
+    console.log('handleDrillOpeningSuccess called');
+    console.log('drillSuccessiveOpenings type and value:', typeof drillSuccessiveOpenings, drillSuccessiveOpenings);
+    console.log('drillCurrentOpeningComplete type and value:', typeof drillCurrentOpeningComplete, drillCurrentOpeningComplete);
+
+    drillCurrentOpeningComplete = true;
+    drillSuccessiveOpenings++;
+
+    // Mettre à jour le best score si nécessaire
+    if (drillSuccessiveOpenings > drillBestScore) {
+        drillBestScore = drillSuccessiveOpenings;
+        console.log('NEW BEST SCORE!', drillBestScore);
+        saveBestScore(); // Sauvegarder le nouveau record
+    }
+
+    console.log('After increment - drillSuccessiveOpenings:', drillSuccessiveOpenings, 'Best:', drillBestScore);
+    updateDrillDisplay();
+
+    // Pause très courte en mode drill pour un rythme très rapide
+    setTimeout(function() {
+        selectNextDrillOpening();
+    }, 600); // Réduit à 600ms pour drill (50% de 1200ms)
+}
+
+// Handles error in an opening (counter reset)
+            window.handleDrillOpeningError = function() {
+    console.log('Drill error - resetting counter');
+    drillSuccessiveOpenings = 0;
+    drillCurrentOpeningComplete = false;
+    console.log('Counter reset - Successive:', drillSuccessiveOpenings);
+    updateDrillDisplay();
+    // Reste sur la même ouverture pour retenter
+    resetGame();
+}
+
+// Sauvegarde le best score dans le JSON de l'ouverture
+function saveBestScore() {
+    console.log('Saving best score:', drillBestScore, 'for opening:', openingName);
+
+    if (!openingName) {
+        console.error('Cannot save best score: openingName not defined');
+        return;
+    }
+
+    // Appel AJAX pour sauvegarder le best score
+    fetch('/save_best_score', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({
+            opening_name: openingName,
+            best_score: drillBestScore
+        })
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            console.log('Best score saved successfully');
+        } else {
+            console.error('Failed to save best score:', data.error);
+        }
+    })
+    .catch(error => {
+        console.error('Error saving best score:', error);
+    });
+}
+
+// Charge le best score depuis le JSON de l'ouverture
+function loadBestScore() {
+    console.log('Loading best score for opening:', openingName);
+
+    if (!openingName) {
+        console.error('Cannot load best score: openingName not defined');
+        return;
+    }
+
+    // Appel AJAX pour charger le best score
+    fetch('/get_best_score?opening_name=' + encodeURIComponent(openingName))
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            drillBestScore = data.best_score || 0;
+            console.log('Best score loaded:', drillBestScore);
+            // Mettre à jour l'affichage seulement si on est en mode drill
+            if (drillMode) {
+                updateDrillDisplay();
+            }
+        } else {
+            console.error('Failed to load best score:', data.error);
+            drillBestScore = 0;
+        }
+    })
+    .catch(error => {
+        console.error('Error loading best score:', error);
+        drillBestScore = 0;
+    });
+}
+
+          $(document).ready(async function() {
+
+      // Initialiser l'audio
+      initAudio();
+
+
+    // --- FONCTIONS POUR ÉCHEC ET MAT ---
+    window.checkForCheckmate = function() {
+        console.log('Checking for checkmate...');
+        console.log('Game state:', game.fen());
+        console.log('Is checkmate:', game.in_checkmate());
+        console.log('Is check:', game.in_check());
+        console.log('Is game over:', game.game_over());
+
+        if (game.in_checkmate()) {
+            console.log('CHECKMATE DETECTED!');
+
+            // Jouer les sons check + game-end
+            window.playCheckSound();
+            setTimeout(function() {
+                window.playGameEndSound();
+            }, 200);
+
+            // Ajoute le hashtag sur la case du roi
+            window.addCheckmateHashtag();
+
+            // Gère l'enchaînement selon le mode
+            if (drillMode) {
+                // Mode Drill : transition rapide après checkmate
+                setTimeout(function() {
+                    window.showLineComplete();
+                }, 400); // Réduit à 400ms pour drill (50% de 800ms)
+            } else {
+                // Mode Learn : délai normal pour apprécier le checkmate
+                $('#status').text('Checkmate! Line complete!');
+                setTimeout(function() {
+                    window.showLineComplete();
+                }, 1200); // Légèrement plus long pour learn
+            }
+
+            return true;
+        }
+        return false;
+    }
+
+    window.addCheckmateHashtag = function() {
+        // Trouve la position du roi
+        var kingSquare = null;
+
+        // En cas d'échec et mat, le roi en échec est celui qui vient de jouer (qui a le tour)
+        var kingColor = game.turn();
+
+        console.log('Looking for king of color:', kingColor);
+        console.log('Current turn:', game.turn());
+        console.log('Board state:', game.fen());
+
+        // Parcours du plateau 8x8
+        for (var rank = 0; rank < 8; rank++) {
+            for (var file = 0; file < 8; file++) {
+                var square = String.fromCharCode('a'.charCodeAt(0) + file) + (8 - rank);
+                var piece = game.get(square);
+                console.log('Square', square, ':', piece);
+                if (piece && piece.type === 'k' && piece.color === kingColor) {
+                    kingSquare = square;
+                    console.log('Found king at square:', square);
+                    break;
+                }
+            }
+            if (kingSquare) break;
+        }
+
+        console.log('King square found:', kingSquare);
+
+        if (kingSquare) {
+            // Supprime l'ancien hashtag s'il existe
+            $('.checkmate-hashtag').remove();
+
+            // Ajoute le nouveau hashtag
+            var hashtag = $('<div class="checkmate-hashtag">#</div>');
+
+            // Try several selectors to find the square
+            var targetSquare = $('#myBoard .square-' + kingSquare);
+            if (targetSquare.length === 0) {
+                targetSquare = $('#myBoard [data-square="' + kingSquare + '"]');
+            }
+            if (targetSquare.length === 0) {
+                targetSquare = $('#myBoard div[data-square="' + kingSquare + '"]');
+            }
+
+            console.log('Target square element:', targetSquare);
+            console.log('Hashtag element:', hashtag);
+
+            if (targetSquare.length > 0) {
+                targetSquare.append(hashtag);
+                console.log('Hashtag added successfully');
+            } else {
+                console.log('Target square not found, trying alternative method');
+                // Essaie d'ajouter directement au board
+                $('#myBoard').append(hashtag);
+                hashtag.css({
+                    'position': 'absolute',
+                    'left': (kingSquare.charCodeAt(0) - 'a'.charCodeAt(0)) * 12.5 + '%',
+                    'top': (8 - parseInt(kingSquare[1])) * 12.5 + '%'
+                });
+            }
+        } else {
+            console.log('No king found');
+        }
+    }
+
+
+
+    // --- FONCTIONS POUR LE MODE DRILL ---
+
+    // Anciennes fonctions supprimées - remplacées par le nouveau système
+
+    // --- PARAMÈTRE DE DÉLAI DU BOT ---
+    // Variable déjà déclarée globalement
+
+    // --- PREMOVE SYSTEM ---
+    // Variables déjà déclarées globalement
+
+
+
+    function setPreMove(from, to) {
+        console.log('setPreMove called:', from, to, 'premoveWindowOpen:', premoveWindowOpen, 'drillMode:', drillMode);
+        if (!premoveWindowOpen) {
+            console.log('Premove window not open, canceling premove');
+            return;
+        }
+
+        // Nettoyer la sélection de pièce lors d'un premove
+        selectedPiece = null;
+        removeGreySquares();
+
+        var piece = game.get(from);
+        if (!piece) {
+            console.log('No piece at', from);
+            removePreMoveHighlight();
+            return;
+        }
+        var isValid = isMoveAdaptedToPiece(piece, from, to);
+        if (!isValid) {
+            console.log('Move not adapted to piece');
+            removePreMoveHighlight();
+            return;
+        }
+        console.log('Premove set successfully:', from, to);
+        pendingPreMove = {from: from, to: to};
+        highlightPreMove(from, to);
+    }
+
+    // Vérifie si le déplacement est adapté au type de pièce (pas la légalité complète)
+    function isMoveAdaptedToPiece(piece, from, to) {
+        var fileFrom = from.charCodeAt(0) - 'a'.charCodeAt(0);
+        var rankFrom = parseInt(from[1], 10) - 1;
+        var fileTo = to.charCodeAt(0) - 'a'.charCodeAt(0);
+        var rankTo = parseInt(to[1], 10) - 1;
+        var df = fileTo - fileFrom;
+        var dr = rankTo - rankFrom;
+        var absDf = Math.abs(df);
+        var absDr = Math.abs(dr);
+        switch (piece.type) {
+            case 'n': // Cavalier
+                return (absDf === 2 && absDr === 1) || (absDf === 1 && absDr === 2);
+            case 'b': // Fou
+                return absDf === absDr && absDf !== 0;
+            case 'r': // Tour
+                return (df === 0 && dr !== 0) || (dr === 0 && df !== 0);
+            case 'q': // Dame
+                return (absDf === absDr && absDf !== 0) || (df === 0 && dr !== 0) || (dr === 0 && df !== 0);
+            case 'k': // Roi
+                // Roque (2 cases sur la même rangée)
+                if (absDf === 2 && dr === 0) return true;
+                // Déplacement normal du roi
+                return absDf <= 1 && absDr <= 1 && (absDf + absDr > 0);
+            case 'p': // Pion
+                // Sens du pion selon la couleur
+                var dir = (piece.color === 'w') ? 1 : -1;
+                // Avance d'une case
+                if (df === 0 && dr === dir) return true;
+                // Avance de deux cases depuis la rangée de départ
+                if (df === 0 && dr === 2 * dir && ((piece.color === 'w' && rankFrom === 1) || (piece.color === 'b' && rankFrom === 6))) return true;
+                // Prise en diagonale
+                if (absDf === 1 && dr === dir) return true;
+                // Promotion (avance sur la dernière rangée)
+                if (df === 0 && dr === dir && ((piece.color === 'w' && rankTo === 7) || (piece.color === 'b' && rankTo === 0))) return true;
+                return false;
+            default:
+                return false;
+        }
+    }
+
+    function highlightPreMove(from, to) {
+        removePreMoveHighlight();
+        premoveHighlightSquares = [from, to];
+        for (const sq of premoveHighlightSquares) {
+            $('#myBoard .square-' + sq).css('box-shadow', 'inset 0 0 16px 6px #4B90FF');
+        }
+    }
+
+
+    console.log('Document ready');
+
+    // Initialisation du highlight des coups légaux (plus nécessaire avec les points)
+
+    // Initialisation des données depuis le serveur
+    openingName = window.OPENING_PAGE.openingName; // Assignation à la variable globale
+    // Lignes servies par /api/openings/<nom>/lines (URL versionnée, mise en cache)
+    try {
+        const linesResponse = await fetch(window.OPENING_PAGE.linesUrl, {credentials: 'same-origin'});
+        lines = linesResponse.ok ? (await linesResponse.json()).lines : []; // Assignation à la variable globale
+    } catch (error) {
+        console.error('Error loading opening lines:', error);
+        lines = [];
+    }
+    orientation = window.OPENING_PAGE.orientation; // Assignation à la variable globale
+
+    // CORRECTION CRITIQUE: Nettoyer et valider l'orientation
+    if (orientation && typeof orientation === 'string') {
+        orientation = orientation.trim().toLowerCase();
+        console.log('Orientation cleaned:', orientation);
+    } else {
+        console.error('Invalid orientation received:', orientation);
+        orientation = 'white'; // Fallback
+    }
+
+    // CORRECTION RADICALE: Utiliser l'orientation du serveur ET forcer si nécessaire
+    const urlPath = window.location.pathname;
+    const urlOpeningName = decodeURIComponent(urlPath.split('/').pop());
+
+    // DÉFINITION DÉFINITIVE DE L'ORIENTATION
+    const defenseOpenings = [
+        'Sicilian Defense',
+        'French Defense',
+        'Stafford Gambit'
+    ];
+    const isDefense = defenseOpenings.some(defense => 
+        urlOpeningName === defense || openingName === defense
+    );
+
+    // FORCER L'ORIENTATION DÉFINITIVEMENT
+    orientation = isDefense ? 'black' : 'white';
+    console.log('ORIENTATION FORCÉE:', orientation, 'pour:', urlOpeningName);
+    console.log('ORIENTATION DU SERVEUR:', window.OPENING_PAGE.orientation);
+
+    // FORCER L'ORIENTATION SUR MOBILE IMMÉDIATEMENT
+    if ('ontouchstart' in window) {
+        window.MOBILE_ORIENTATION = orientation;
+        console.log('MOBILE: Orientation forcée à', orientation);
+    }
+    currentLineIndex = 0; // Initialisation de la variable globale
+
+
+
+    // Vérification périodique de l'orientation (très agressive sur mobile)
+    const checkInterval = 'ontouchstart' in window ? 500 : 2000; // Plus fréquent sur mobile
+    setInterval(function() {
+        if (board && orientation) {
+            if (board.orientation() !== orientation) {
+                console.log('PERIODIC FIX: Orientation mismatch detected');
+                setBoardOrientation();
+            }
+
+            // Force supplémentaire sur mobile
+            if ('ontouchstart' in window) {
+                board.orientation(orientation);
+                // Double vérification sur mobile
+                setTimeout(() => {
+                    if (board && board.orientation() !== orientation) {
+                        board.orientation(orientation);
+                        console.log('MOBILE: Double orientation fix applied');
+                    }
+                }, 100);
+            }
+        }
+    }, checkInterval);
+
+    console.log('Variables initialisées:', {
+        openingName: openingName,
+        lines: lines,
+        orientation: orientation
+    });
+
+
+
+    // Check that data is valid
+    if (!lines || lines.length === 0) {
+            console.error('Error: No opening line available');
+        return;
+    }
+
+    // CRÉER LE PLATEAU APRÈS AVOIR CALCULÉ L'ORIENTATION
+    console.log('🚀 CRÉATION DU PLATEAU APRÈS CALCUL ORIENTATION');
+
+    // Configuration du plateau avec l'orientation calculée
+    var config = {
+        draggable: true,
+        position: 'start',
+        onDragStart: onDragStart,
+        onDrop: onDrop,
+        onSnapEnd: onSnapEnd,
+        orientation: orientation,
+        pieceTheme: getPieceImage,
+        showNotation: true,
+        dropOffBoard: 'snapback',
+        sparePieces: false
+    };
+
+    // FORCER LE DRAG & DROP SUR MOBILE
+    if ('ontouchstart' in window) {
+        config.draggable = true;
+        console.log('🚀 Mobile: Config draggable forced to true');
+    }
+
+    console.log('🚀 Creating board with config:', config);
+    console.log('🚀 Board orientation will be:', orientation);
+
+    // SOLUTION RADICALE: Jouer le premier coup blanc AVANT de créer le plateau
+    if (orientation === 'black') {
+        console.log('🚨 PRE-BOARD SETUP: Playing first white move for defense');
+        if (lines && lines[currentLineIndex] && lines[currentLineIndex].moves && lines[currentLineIndex].moves.length > 0) {
+            const move = lines[currentLineIndex].moves[0];
+            try {
+                const result = game.move(move.san);
+                if (result) {
+                    currentMoveIndex++;
+                    console.log('🚨 PRE-BOARD SETUP: First white move played:', move.san);
+                    console.log('🚨 PRE-BOARD SETUP: Turn after move:', game.turn());
+                    console.log('🚨 PRE-BOARD SETUP: Game position:', game.fen());
+                } else {
+                    console.error('🚨 PRE-BOARD SETUP: Failed to play first white move:', move.san);
+                }
+            } catch (error) {
+                console.error('🚨 PRE-BOARD SETUP: Error playing first white move:', error);
+            }
+        } else {
+            console.error('🚨 PRE-BOARD SETUP: No moves available for first white move');
+        }
+    }
+
+    try {
+        board = createBoard(config);
+
+        if (board) {
+            console.log('🚀 Board created successfully');
+            console.log('🚀 Board orientation after creation:', board.orientation());
+
+            // Vérification et correction immédiate de l'orientation
+            if (board.orientation() !== orientation) {
+                console.log('🚨 CRITICAL: Board orientation mismatch after creation');
+                board.orientation(orientation);
+                console.log('🚨 CRITICAL: Orientation corrected to:', orientation);
+            }
+
+            // Vérification supplémentaire sur mobile
+            if ('ontouchstart' in window) {
+                setTimeout(() => {
+                    if (board && board.orientation() !== orientation) {
+                        console.log('🚨 MOBILE CRITICAL: Orientation still wrong after correction');
+                        board.orientation(orientation);
+                        console.log('🚨 MOBILE CRITICAL: Final orientation correction applied');
+                    }
+                }, 200);
+            }
+
+            // Diagnostic d'orientation pour débogage
+            setTimeout(() => {
+                diagnoseOrientation();
+            }, 500);
+
+            // Initialisation de l'affichage après que le plateau soit créé
+            initializeDisplay();
+
+            // Met à jour les boutons de navigation après l'initialisation
+            updateNavigationButtons();
+
+            // Définir l'orientation du plateau
+            setBoardOrientation();
+
+            // setupLine() est maintenant appelé APRÈS la création du plateau
+            // mais le premier coup blanc a déjà été joué
+            setupLine();
+            $(window).resize(board.resize);
+        } else {
+            console.error('🚀 Failed to create board');
+        }
+    } catch (error) {
+        console.error('🚀 Error creating board:', error);
+    }
+
+    console.log('All variables initialized - ready for drill mode if needed');
+
+    // Charger le best score pour cette ouverture APRÈS l'initialisation de l'affichage
+    loadBestScore();
+
+                  // Learn/Drill switch management
+    $('#auto-play-switch').on('change', function() {
+          window.playButtonSound();
+          drillMode = this.checked;
+        autoPlayEnabled = this.checked;
+        console.log('Mode:', drillMode ? 'Drill' : 'Learn');
+
+        if (drillMode) {
+            // Nouveau mode Drill
+            console.log('Switching to NEW Drill mode');
+            drillSuccessiveOpenings = 0;
+            drillCurrentOpeningComplete = false;
+            $('.info-section').addClass('drill-mode');
+            $('.game-container').addClass('drill-mode');
+            $('.bottom-section').addClass('drill-mode');
+            $('#drill-counter').addClass('show');
+            $('#hint-zone').removeClass('show');
+            // Mettre à jour l'affichage du score immédiatement (même si best score = 0)
+            updateDrillDisplay();
+            // Initialiser le nouveau système de drill avec départ aléatoire
+            initializeDrillDeck();
+            startRandomOpening();
+        } else {
+            // Mode Learn
+            $('.info-section').removeClass('drill-mode');
+            $('.game-container').removeClass('drill-mode');
+            $('.bottom-section').removeClass('drill-mode');
+            $('#drill-counter').removeClass('show');
+            $('#hint-zone').addClass('show');
+            // S'assurer que le best score est masqué
+            updateDrillDisplay();
+            // Réinitialise le jeu pour le mode Learn
+            resetGame();
+        }
+
+        // Ajuster les marges et la taille après le changement de mode
+        setTimeout(function() {
+            adjustBoardSize();
+            adjustMarginsForMode();
+        }, 100);
+
+        // Met à jour l'affichage après le changement de mode
+        updateNavigationButtons();
+    });
+
+    // Event handling functions
+    function onDragStart(source, piece) {
+        console.log('Drag start:', source, piece, 'drillMode:', drillMode);
+
+        // SOLUTION RADICALE: Empêcher le drag des pièces blanches en défense
+        if (orientation === 'black' && piece && piece.charAt(0) === 'w') {
+            if (!('ontouchstart' in window)) {
+                console.log('🚨 RADICAL BLOCK: Preventing white piece drag in defense');
+            }
+            return false;
+        }
+
+        // Empêcher le drag avec le clic droit
+        if (event && event.button === 2) {
+            return false;
+        }
+
+        if (game.game_over()) {
+            return false;
+        }
+
+        // PREMOVE: Si ce n'est pas le tour du joueur, activer le mode pre-move
+        if ((orientation === 'black' && game.turn() === 'w') || (orientation === 'white' && game.turn() === 'b')) {
+            console.log('Activating premove mode - orientation:', orientation, 'turn:', game.turn());
+            premoveMode = true;
+            premoveSource = source;
+            return true; // Permettre le drag pour sélectionner la pièce
+        }
+
+        // Gestion de la sélection lors du drag (seulement si pas en mode premove)
+        if (!premoveMode && !window.pendingPromotion) {
+            selectedPiece = source;
+            removeGreySquares();
+
+            // Obtenir la liste des coups possibles pour cette pièce
+            const moves = game.moves({
+                square: source,
+                verbose: true
+            });
+
+            // Highlight les cases de destination possibles
+            for (const move of moves) {
+                greySquare(move.to);
+            }
+        }
+
+        premoveMode = false;
+        premoveSource = null;
+        return true;
+    }
+
+    function onDrop(source, target) {
+        console.log('Drop:', source, target);
+        console.log('Orientation:', orientation, 'Game turn:', game.turn());
+
+        // Supprimer le highlight des coups légaux
+        removeGreySquares();
+
+        // PREMOVE: Si ce n'est pas le tour du joueur, stocker le pre-move
+        if ((orientation === 'black' && game.turn() === 'w') || (orientation === 'white' && game.turn() === 'b')) {
+            console.log('PREMOVE: Not player turn, storing premove');
+            setPreMove(source, target);
+            return 'snapback';
+        }
+
+        // Empêcher complètement les drops sur la même case
+        if (source === target) {
+            console.log('Drop on same square - preventing drop');
+            // Maintenir la sélection si c'est la même pièce
+            if (selectedPiece === source) {
+                // Re-sélectionner la pièce pour maintenir les highlights
+                const piece = game.get(source);
+                if (piece && piece.color === (orientation === 'white' ? 'w' : 'b')) {
+                    const moves = game.moves({
+                        square: source,
+                        verbose: true
+                    });
+                    for (const move of moves) {
+                        greySquare(move.to);
+                    }
+                }
+            }
+            return 'snapback';
+        }
+
+        // Vérifier si c'est une promotion
+        let isPromotion = false;
+        if (window.isPromotion(source, target)) {
+            isPromotion = true;
+        }
+
+        // Si c'est une promotion, gérer proprement
+        if (isPromotion) {
+            const piece = game.get(source);
+            console.log('Promotion detected! Piece:', piece, 'from:', source, 'to:', target);
+
+            // Stocker les informations de promotion
+            window.pendingPromotion = {
+            from: source,
+            to: target,
+                color: piece.color
+            };
+
+            // Afficher le dialogue de promotion directement
+            window.showPromotionDialog(source, target, piece.color);
+            return; // Ne pas valider immédiatement
+        }
+
+        // Pour les coups normaux (non-promotion)
+        const move = game.move({
+            from: source,
+            to: target
+        });
+
+        if (move === null) {
+            console.log('Move invalid');
+              // Désélectionner si le coup est invalide
+              selectedPiece = null;
+            return 'snapback';
+        }
+
+        console.log('Move made:', move);
+        window.validateUserMove(move);
+    }
+
+    function onSnapEnd() {
+        board.position(game.fen());
+    }
+
+    window.validateUserMove = function(move) {
+        console.log('validateUserMove called - isLineComplete:', isLineComplete, 'drillMode:', drillMode);
+        console.log('Move to validate:', move);
+
+        // Vérifier si c'est un coup "nul" (même case vers même case)
+        if (move.from === move.to) {
+            console.log('Null move detected - ignoring');
+            return;
+        }
+
+
+
+        // Met à jour l'indice si il est affiché
+        window.updateHintContent();
+
+        // Vérifie l'échec et mat
+        if (window.checkForCheckmate()) {
+            return; // La fonction checkForCheckmate gère déjà l'enchaînement
+        }
+
+        if (isLineComplete) {
+            console.log('Line is complete, ignoring move');
+            return;
+        }
+        if (currentLineIndex >= lines.length || currentMoveIndex >= lines[currentLineIndex].moves.length) {
+            window.showLineComplete();
+            return;
+        }
+
+        const expectedMove = lines[currentLineIndex].moves[currentMoveIndex];
+        console.log('Expected move:', expectedMove);
+        console.log('Comparing move.san:', move.san, 'with expectedMove.san:', expectedMove.san);
+
+        if (move.san === expectedMove.san) {
+            // Coup correct
+            console.log('Move is correct!');
+
+            // Jouer le son approprié selon le type de coup
+            if (move.flags.includes('c')) {
+                window.playCaptureSound();
+            } else if (move.flags.includes('k')) {
+                window.playCastleSound();
+            } else if (move.flags.includes('p')) {
+                window.playPromoteSound();
+            } else {
+                window.playMoveSound();
+            }
+
+            // Désélectionner la pièce après un coup valide
+            selectedPiece = null;
+
+                currentMoveIndex++;
+            premoveWindowOpen = true; // Ouvre la fenêtre de pre-move (pour tous les modes)
+                // Bloque l'échiquier pour empêcher d'autres coups directs
+                board.draggable = false;
+
+                setTimeout(function() {
+                    window.playComputerMove();
+                }, COMPUTER_MOVE_DELAY);
+        } else {
+            // Coup incorrect
+            console.log('Move is incorrect!');
+            window.playIncorrectSound();
+
+            // Désélectionner la pièce après un coup incorrect
+            selectedPiece = null;
+
+            $('#myBoard').addClass('error-anim');
+
+            // Créer l'overlay de halo d'erreur
+            const errorOverlay = $('<div class="error-halo-overlay"></div>');
+            $('body').append(errorOverlay);
+
+            setTimeout(function() {
+                $('#myBoard').removeClass('error-anim');
+                errorOverlay.remove();
+            }, 600);
+            game.undo();
+            // Force stop any ongoing drag before error handling
+            forceStopDrag();
+
+            if (drillMode) {
+                window.handleDrillOpeningError();
+            }
+        }
+    }
+
+    window.showLineComplete = function() {
+        isLineComplete = true;
+
+        // Faire réapparaître l'ampoule quand une ligne est terminée
+        const $hintBtn = $('#hint-btn');
+        const $hintTextDiv = $('#hint-text');
+        if ($hintTextDiv.hasClass('show')) {
+            $hintTextDiv.removeClass('show');
+            $hintBtn.removeClass('fade-out').addClass('fade-in').css('visibility', 'visible');
+            setTimeout(function() {
+                $hintBtn.removeClass('fade-in');
+            }, 200);
+        }
+
+        if (drillMode) {
+            // Mode Drill : célébration plus rapide pour un rythme soutenu
+            window.playWinSound();
+        $('#myBoard').addClass('celebrate');
+
+            // Créer l'overlay de halo de célébration
+            const celebrateOverlay = $('<div class="celebrate-halo-overlay"></div>');
+            $('body').append(celebrateOverlay);
+
+        confetti({
+            particleCount: 80,
+            spread: 70,
+            origin: { y: 0.6 }
+        });
+        setTimeout(function() {
+            $('#myBoard').removeClass('celebrate');
+                celebrateOverlay.remove();
+                handleDrillOpeningSuccess();
+            }, 500); // Réduit à 500ms pour drill (50% de 1000ms)
+        } else {
+            // Mode Learn : délai normal pour bien savourer le succès
+            window.playWinSound();
+            $('#myBoard').addClass('celebrate');
+
+            // Créer l'overlay de halo de célébration
+            const celebrateOverlay = $('<div class="celebrate-halo-overlay"></div>');
+            $('body').append(celebrateOverlay);
+
+            confetti({
+                particleCount: 80,
+                spread: 70,
+                origin: { y: 0.6 }
+            });
+            setTimeout(function() {
+                $('#myBoard').removeClass('celebrate');
+                celebrateOverlay.remove();
+            goToNextLineOrRestart();
+            }, 1500); // Reste à 1500ms pour learn
+        }
+    }
+
+    // This function advances to the next line if available, or shows a message if there is no next line
+    function goToNextLineOrRestart() {
+        if (currentLineIndex < lines.length - 1) {
+            currentLineIndex++;
+            $('#line-select').val(currentLineIndex);
+            saveCurrentLine(); // Sauvegarder la ligne courante
+            resetGame();
+            updateNavigationButtons();
+        } else {
+            // Toutes les lignes terminées
+        }
+    }
+
+    // This function returns to the previous line if available, or shows a message if there is no previous line
+    function getPreviousLine() {
+        if (currentLineIndex > 0) {
+            currentLineIndex--;
+            saveCurrentLine(); // Sauvegarder la ligne courante
+            updateNavigationButtons();
+            return lines[currentLineIndex];
+        }
+        $('#status').text('Already at the first line.');
+    }
+
+    window.playComputerMove = function() {
+        if (isLineComplete) return;
+        if (currentLineIndex >= lines.length || currentMoveIndex >= lines[currentLineIndex].moves.length) {
+            window.showLineComplete();
+            return;
+        }
+        const move = lines[currentLineIndex].moves[currentMoveIndex];
+
+        // Analyser le mouvement pour déterminer le son à jouer
+        const moveObj = game.move(move.san);
+        if (moveObj) {
+            // Jouer le son approprié selon le type de coup
+            if (moveObj.flags.includes('c')) {
+                window.playCaptureSound();
+            } else if (moveObj.flags.includes('k')) {
+                window.playCastleSound();
+            } else if (moveObj.flags.includes('p')) {
+                window.playPromoteSound();
+            } else {
+                window.playMoveSound();
+            }
+        }
+
+        board.position(game.fen());
+        currentMoveIndex++;
+
+        // Met à jour l'indice si il est affiché
+        window.updateHintContent();
+
+        // Vérifier si le coup met en échec
+        if (game.in_check()) {
+            window.playCheckSound();
+        }
+
+        console.log('Computer move played, checking premove. pendingPreMove:', pendingPreMove, 'drillMode:', drillMode);
+
+        // Vérifie l'échec et mat
+        if (window.checkForCheckmate()) {
+            return; // La fonction checkForCheckmate gère déjà l'enchaînement
+        }
+
+        // Ferme la fenêtre de pre-move
+        premoveWindowOpen = false;
+        // Réactive le drag & drop pour le joueur
+        board.draggable = true;
+        // Exécute le pre-move instantanément si il existe
+        if (pendingPreMove) {
+            console.log('Executing pending premove:', pendingPreMove);
+            setTimeout(function() {
+                tryPlayPreMoveInstant();
+            }, 50);
+        }
+    }
+
+    function tryPlayPreMoveInstant() {
+        if (!pendingPreMove) return;
+        // Check if it's the player's turn
+        if ((orientation === 'white' && game.turn() !== 'w') || (orientation === 'black' && game.turn() !== 'b')) {
+            return;
+        }
+
+        // Vérifier si c'est une promotion en utilisant la nouvelle fonction
+        if (window.isPromotion(pendingPreMove.from, pendingPreMove.to)) {
+            const piece = game.get(pendingPreMove.from);
+            console.log('Promotion detected in pre-move! Piece:', piece, 'from:', pendingPreMove.from, 'to:', pendingPreMove.to);
+
+            // Stocker les informations de promotion
+            window.pendingPromotion = {
+            from: pendingPreMove.from,
+            to: pendingPreMove.to,
+                color: piece.color
+            };
+
+            // Afficher le dialogue de promotion
+            window.showPromotionDialog(pendingPreMove.from, pendingPreMove.to, piece.color);
+            clearPreMove(); // Nettoyer le premove
+            return;
+        }
+
+        // Check if the pre-move is legal
+        var move = game.move({
+            from: pendingPreMove.from,
+            to: pendingPreMove.to
+        });
+        if (move === null) {
+            clearPreMove();
+            board.position(game.fen());
+            return;
+        }
+        clearPreMove();
+        board.position(game.fen());
+
+        // Vérifie l'échec et mat
+        if (window.checkForCheckmate()) {
+            return; // La fonction checkForCheckmate gère déjà l'enchaînement
+        }
+
+        // Attendre que l'animation soit visible avant de valider le coup et d'enchaîner
+        setTimeout(function() {
+            window.validateUserMove(move);
+        }, 350);
+    }
+
+
+
+
+
+
+
+            // Variables pour la promotion (déplacées au scope global)
+window.pendingPromotion = null;
+
+
+
+
+
+
+
+    // Fonction simplifiée pour les pièces
+    function getPieceImage(piece) {
+        return window.PIECE_URLS[piece.toLowerCase()];
+    }
+
+
+
+            // Fonction de diagnostic pour vérifier les pièces et leur draggabilité
+function diagnosePiecesAndDrag() {
+    console.log('=== PIECES AND DRAG DIAGNOSTIC ===');
+    console.log('Current orientation:', orientation);
+    console.log('Board orientation:', board ? board.orientation() : 'board not available');
+    console.log('Game turn:', game.turn());
+
+    // Vérifier les pièces visibles
+    const pieces = $('.square-55d63 img');
+    console.log('Total pieces found:', pieces.length);
+
+    // Vérifier les pièces par couleur
+    let whitePieces = 0;
+    let blackPieces = 0;
+
+    pieces.each(function() {
+        const src = $(this).attr('src');
+        if (src.includes('w')) {
+            whitePieces++;
+        } else if (src.includes('b')) {
+            blackPieces++;
+        }
+        console.log('Piece src:', src);
+    });
+
+    console.log('White pieces visible:', whitePieces);
+    console.log('Black pieces visible:', blackPieces);
+
+    // Vérifier la position du jeu
+    console.log('Game FEN:', game.fen());
+    console.log('Expected player color:', orientation === 'white' ? 'w' : 'b');
+    console.log('Current game turn:', game.turn());
+
+
+}
+
+
+
+    // Variables pour la sélection de pièce
+    var selectedPiece = null;
+
+    // Variables pour détecter les clics simples vs drags
+    var isDragging = false;
+    var dragStartSquare = null;
+
+    // Événements tactiles séparés pour mobile
+    $('#myBoard').on('touchstart', '.square-55d63', function(e) {
+        e.preventDefault();
+        initAudioOnUserInteraction();
+
+        const square = $(this).attr('data-square');
+        if (square) {
+            isDragging = false;
+            dragStartSquare = square;
+
+            // Délai court pour détecter le drag
+            setTimeout(() => {
+                if (dragStartSquare === square) {
+                    isDragging = true;
+                }
+            }, 50);
+        }
+    });
+
+    // Événements souris séparés pour desktop
+    $('#myBoard').on('mousedown', '.square-55d63', function(e) {
+        if (e.button === 2) return; // Ignorer le clic droit
+
+        initAudioOnUserInteraction();
+
+        const square = $(this).attr('data-square');
+        if (square) {
+            isDragging = false;
+            dragStartSquare = square;
+        }
+    });
+
+    // Détecter le mouvement (drag)
+    $('#myBoard').on('mousemove touchmove', '.square-55d63', function(e) {
+        e.preventDefault();
+
+        if (dragStartSquare) {
+            isDragging = true;
+        }
+    });
+
+    // Gérer les clics simples (sans drag)
+    $('#myBoard').on('click touchend', '.square-55d63', function(e) {
+        e.preventDefault();
+
+        // Ignorer le clic droit
+        if (e.type === 'click' && e.button === 2) {
+            return;
+        }
+
+        // Ne traiter que les clics simples (pas de drag)
+        if (isDragging) {
+            return;
+        }
+
+        const square = $(this).attr('data-square');
+        if (!square) return;
+
+        // Ne pas gérer la sélection si ce n'est pas le tour du joueur
+        if ((orientation === 'black' && game.turn() === 'w') || (orientation === 'white' && game.turn() === 'b')) {
+            return;
+        }
+
+        // Ne pas gérer la sélection si une promotion est en cours
+        if (window.pendingPromotion) {
+            return;
+        }
+
+        // Ne pas gérer la sélection si on est en mode premove
+        if (premoveMode) {
+            return;
+        }
+
+        const piece = game.get(square);
+
+        // Si on clique sur une pièce de notre couleur
+        if (piece && piece.color === (orientation === 'white' ? 'w' : 'b')) {
+            // Si c'est la même pièce déjà sélectionnée, désélectionner
+            if (selectedPiece === square) {
+                selectedPiece = null;
+                removeGreySquares();
+                return;
+            }
+
+            // Sélectionner la nouvelle pièce
+            selectedPiece = square;
+            removeGreySquares();
+
+            // Obtenir la liste des coups possibles pour cette pièce
+            const moves = game.moves({
+                square: square,
+                verbose: true
+            });
+
+            // Highlight les cases de destination possibles
+            for (const move of moves) {
+                greySquare(move.to);
+            }
+        } else {
+            // Si on clique sur une case vide ou une pièce adverse, désélectionner
+            selectedPiece = null;
+            removeGreySquares();
+        }
+    });
+
+    // Supprimer la sélection et les highlights au clic droit
+    $('#myBoard').on('contextmenu', function(e) {
+        e.preventDefault();
+        selectedPiece = null;
+        removeGreySquares();
+        clearPreMove();
+        premoveSource = null;
+        return false;
+    });
+
+    // Empêcher le zoom sur l'échiquier sur mobile
+    $('#myBoard').on('touchstart', function(e) {
+        if (e.touches.length > 1) {
+            e.preventDefault();
+        }
+    });
+
+    // Empêcher le scroll sur l'échiquier
+    $('#myBoard').on('touchmove', function(e) {
+        e.preventDefault();
+    });
+
+    // PREMOVE: Clic sur case pour préparer un pre-move (pour les utilisateurs qui préfèrent cliquer)
+    $('#myBoard').on('click', '.square-55d63', function() {
+        var square = $(this).attr('data-square');
+        if (!square) return;
+        // On ne peut préparer un pre-move que pendant la fenêtre de pre-move
+        if (premoveWindowOpen) {
+            if (!premoveSource) {
+                premoveSource = square;
+                highlightPreMove(square, square);
+            } else {
+                setPreMove(premoveSource, square);
+                premoveSource = null;
+            }
+        }
+    });
+
+    // Suppression du bouton d'annulation de pre-move
+    // Add right-click handler to cancel pre-move
+    $('#myBoard').on('contextmenu', function(e) {
+        e.preventDefault();
+        clearPreMove();
+        premoveSource = null;
+        return false;
+    });
+
+    // Event listeners
+    $('#line-select').on('change', function() {
+          window.playButtonSound();
+        currentLineIndex = parseInt($(this).val());
+          saveCurrentLine(); // Sauvegarder la ligne courante
+        resetGame();
+        updateNavigationButtons();
+    });
+
+
+
+                  $('#reset-btn').on('click', function() {
+          window.playButtonSound();
+          resetGame();
+      });
+
+    $('#next-line-btn').on('click', function() {
+          window.playButtonSound();
+        if (currentLineIndex < lines.length - 1) {
+            currentLineIndex++;
+            $('#line-select').val(currentLineIndex);
+            saveCurrentLine(); // Sauvegarder la ligne courante
+            resetGame();
+            updateNavigationButtons();
+            updateHintContent(); // Actualise l'indice pour la nouvelle ligne
+        } else {
+            // Dernière ligne atteinte
+        }
+    });
+
+                  // Switch hint : clic sur toute la zone
+      $('#hint-zone').on('click', function() {
+          window.playButtonSound();
+        if (currentLineIndex < lines.length && currentMoveIndex < lines[currentLineIndex].moves.length) {
+            const hintMove = lines[currentLineIndex].moves[currentMoveIndex];
+            toggleHint(hintMove.san);
+        }
+    });
+
+
+
+    $('#prev-line-btn').on('click', function() {
+          window.playButtonSound();
+        if (currentLineIndex > 0) {
+            currentLineIndex--;
+            $('#line-select').val(currentLineIndex);
+            saveCurrentLine(); // Sauvegarder la ligne courante
+            resetGame();
+            updateNavigationButtons();
+            updateHintContent(); // Actualise l'indice pour la nouvelle ligne
+        } else {
+            // Déjà à la première ligne
+        }
+    });
+
+    // Bouton de diagnostic d'orientation
+    $('#diagnostic-btn').on('click', function() {
+        window.playButtonSound();
+        diagnoseOrientation();
+        // Afficher un message informatif
+        const diagnosticInfo = document.createElement('div');
+        diagnosticInfo.style.cssText = `
+            position: fixed;
+            top: 20px;
+            right: 20px;
+            background: #17a2b8;
+            color: white;
+            padding: 15px;
+            border-radius: 8px;
+            z-index: 10000;
+            font-size: 14px;
+            max-width: 300px;
+            box-shadow: 0 4px 12px rgba(0,0,0,0.3);
+        `;
+        diagnosticInfo.innerHTML = `
+            <strong>🔍 Diagnostic d'orientation</strong><br>
+            Vérifiez la console pour les détails.<br>
+            <small>Cliquez pour fermer</small>
+        `;
+        diagnosticInfo.onclick = () => diagnosticInfo.remove();
+        document.body.appendChild(diagnosticInfo);
+
+        // Auto-remove après 5 secondes
+        setTimeout(() => {
+            if (diagnosticInfo.parentNode) {
+                diagnosticInfo.remove();
+            }
+        }, 5000);
+    });
+
+    // Ajouter le son au bouton back
+    $('.backbtn').on('click', function(e) {
+        e.preventDefault();
+        window.playButtonSound();
+        // Attendre un peu que le son soit joué avant de changer de page
+        setTimeout(() => {
+            window.location.href = this.href;
+        }, 100);
+    });
+
+    console.log('Initialization complete');
+
+    // FORCER L'ORIENTATION AU DÉMARRAGE SUR MOBILE
+    if ('ontouchstart' in window && board && orientation) {
+        setTimeout(() => {
+            const currentOrientation = board.orientation();
+            board.orientation(orientation);
+            console.log('Mobile: Startup orientation forced from', currentOrientation, 'to:', orientation);
+        }, 100);
+
+        // Force supplémentaire après 1 seconde
+        setTimeout(() => {
+            if (board && board.orientation() !== orientation) {
+                board.orientation(orientation);
+                console.log('Mobile: Delayed startup orientation fix');
+            }
+        }, 1000);
+
+        // Force finale après 3 secondes pour garantir l'orientation
+        setTimeout(() => {
+            if (board && board.orientation() !== orientation) {
+                board.orientation(orientation);
+                console.log('Mobile: Final startup orientation fix');
+                // Diagnostic automatique après la correction
+                diagnoseOrientation();
+            }
+        }, 3000);
+    }
+
+    // Initialiser le compteur Drill si on est en mode Drill au démarrage
+    if (drillMode) {
+        updateDrillStatus();
+    }
+});
+
+// Variables globales pour les fonctions de navigation
+var currentLineIndex = 0;
+var lines = null;
+
+// Fonction pour initialiser l'affichage correct
+function initializeDisplay() {
+    console.log('initializeDisplay called');
+
+    // Charger la ligne sauvegardée ou utiliser 0 par défaut
+    const savedLineIndex = loadCurrentLine();
+
+    // Check that the index is valid relative to the number of available lines
+    if (typeof lines !== 'undefined' && lines && savedLineIndex < lines.length) {
+        currentLineIndex = savedLineIndex;
+        console.log('Using saved line index:', currentLineIndex);
+    } else {
+        currentLineIndex = 0;
+        console.log('Using default line index 0 (saved index was invalid or no lines available)');
+    }
+
+    // Synchroniser le sélecteur de ligne avec currentLineIndex
+    $('#line-select').val(currentLineIndex);
+    console.log('Line selector synchronized to:', currentLineIndex);
+
+    // Sauvegarder la ligne courante (au cas où elle a été restaurée)
+    saveCurrentLine();
+
+    // S'assurer que l'indice est dans l'état par défaut (ampoule) au démarrage
+    const $hintBtn = $('#hint-btn');
+    const $hintTextDiv = $('#hint-text');
+    $hintTextDiv.removeClass('show');
+    $hintBtn.removeClass('fade-out fade-in').css('visibility', 'visible');
+
+    // Vérifie l'état du switch au chargement
+    const isDrillMode = $('#auto-play-switch').is(':checked');
+    drillMode = isDrillMode; // S'assurer que la variable globale est synchronisée
+
+    if (isDrillMode) {
+        // Mode Drill au démarrage
+        console.log('Initializing in Drill mode');
+        $('.info-section').addClass('drill-mode');
+        $('.game-container').addClass('drill-mode');
+        $('.bottom-section').addClass('drill-mode');
+        $('#drill-counter').addClass('show');
+        $('#hint-zone').removeClass('show');
+        // Mettre à jour l'affichage du score immédiatement (même si best score = 0)
+        updateDrillDisplay();
+    } else {
+        // Mode Learn au démarrage
+        console.log('Initializing in Learn mode');
+        $('.info-section').removeClass('drill-mode');
+        $('.game-container').removeClass('drill-mode');
+        $('.bottom-section').removeClass('drill-mode');
+        $('#drill-counter').removeClass('show');
+        $('#hint-zone').addClass('show');
+        // S'assurer que le best score est masqué dès le démarrage
+        updateDrillDisplay();
+    }
+
+    // Initialise la navigation
+    initializeNavigation();
+}
+
+    // Anciennes fonctions de drill supprimées - remplacées par le nouveau système
+// Bloque le menu contextuel sur toute la page
+$(document).on('contextmenu', function(e) {
+    e.preventDefault();
+    return false;
+});
+
+// Fonction pour initialiser la navigation
+function initializeNavigation() {
+    // Met à jour l'état des boutons de navigation seulement si lines est définie
+    if (typeof lines !== 'undefined' && lines !== null) {
+        updateNavigationButtons();
+    }
+}
+
+// Fonction pour mettre à jour l'état des boutons de navigation
+function updateNavigationButtons() {
+    console.log('updateNavigationButtons called');
+
+    // Vérification de sécurité
+    if (typeof currentLineIndex === 'undefined' || currentLineIndex === null) {
+        console.log('currentLineIndex is undefined, setting to 0');
+        currentLineIndex = 0;
+    }
+
+    // Vérification de sécurité pour lines
+    if (typeof lines === 'undefined' || lines === null) {
+        console.log('lines is undefined, cannot update navigation buttons');
+        return;
+    }
+
+    const $prevBtn = $('#prev-line-btn');
+    const $nextBtn = $('#next-line-btn');
+
+    console.log('Found buttons - prev:', $prevBtn.length, 'next:', $nextBtn.length);
+    console.log('Current state - currentLineIndex:', currentLineIndex, 'lines.length:', lines.length);
+
+    // Bouton précédent - désactivé seulement si on est à la première ligne (index 0)
+    if (currentLineIndex > 0) {
+        $prevBtn.prop('disabled', false).removeClass('disabled');
+        console.log('Prev button ENABLED');
+    } else {
+        $prevBtn.prop('disabled', true).addClass('disabled');
+        console.log('Prev button DISABLED');
+    }
+
+    // Bouton suivant - désactivé seulement si on est à la dernière ligne
+    if (currentLineIndex < lines.length - 1) {
+        $nextBtn.prop('disabled', false).removeClass('disabled');
+        console.log('Next button ENABLED');
+    } else {
+        $nextBtn.prop('disabled', true).addClass('disabled');
+        console.log('Next button DISABLED');
+    }
+
+    console.log('Navigation buttons updated - currentLineIndex:', currentLineIndex, 'lines.length:', lines.length);
+}
+
+// Fonction simple pour diagnostiquer l'état du jeu
+function debugGameState() {
+    console.log('=== GAME STATE DEBUG ===');
+    console.log('isLineComplete:', isLineComplete);
+    console.log('drillMode:', drillMode);
+    console.log('currentLineIndex:', currentLineIndex);
+    console.log('currentMoveIndex:', currentMoveIndex);
+    console.log('drillSuccessiveOpenings:', drillSuccessiveOpenings);
+    console.log('drillBestScore:', drillBestScore);
+    console.log('drillCurrentOpeningComplete:', drillCurrentOpeningComplete);
+    console.log('drillOpeningDeck length:', drillOpeningDeck.length);
+    console.log('========================');
+}
+
+// Fonction pour ajuster dynamiquement la taille de l'échiquier
+function adjustBoardSize() {
+    const board = $('#myBoard');
+    const container = $('.game-container');
+    const headerSection = $('.header-section');
+    const bottomSection = $('.bottom-section');
+
+    if (board.length && container.length) {
+        const containerHeight = container.height();
+        const headerHeight = headerSection.outerHeight(true);
+        const bottomHeight = bottomSection.outerHeight(true);
+        const availableHeight = containerHeight - headerHeight - bottomHeight - 40; // 40px de marge
+
+        // Calculer la taille optimale de l'échiquier en priorité sur la hauteur
+        const heightBasedSize = availableHeight * 0.7; // 70% de la hauteur disponible
+        const widthBasedSize = window.innerWidth * 0.6; // 60% de la largeur
+        const maxSize = Math.min(heightBasedSize, widthBasedSize); // Priorité à la hauteur
+        const minSize = 200; // Taille minimale
+        const optimalSize = Math.max(minSize, Math.min(maxSize, 450)); // Limite à 450px max
+
+        // Appliquer la taille calculée
+        board.css({
+            'width': optimalSize + 'px',
+            'height': optimalSize + 'px',
+            'max-width': optimalSize + 'px',
+            'max-height': optimalSize + 'px'
+        });
+
+        // Ajuster les marges selon le mode (drill ou learn)
+        const isDrillMode = $('.game-container').hasClass('drill-mode');
+        const marginBottom = isDrillMode ? '25px' : '25px'; // Même marge pour les deux modes
+
+        $('.bottom-section').css('margin-bottom', marginBottom);
+        $('.game-container').css('padding-bottom', marginBottom);
+
+        console.log('Board size adjusted to:', optimalSize + 'px (height-based, mode:', isDrillMode ? 'drill' : 'learn', ')');
+    }
+}
+
+// Fonction pour ajuster les marges selon le mode
+function adjustMarginsForMode() {
+    const isDrillMode = $('.game-container').hasClass('drill-mode');
+
+    if (isDrillMode) {
+        $('.game-container').addClass('drill-mode');
+        $('.bottom-section').addClass('drill-mode');
+    } else {
+        $('.game-container').removeClass('drill-mode');
+        $('.bottom-section').removeClass('drill-mode');
+    }
+
+    console.log('Marges ajustées pour le mode:', isDrillMode ? 'drill' : 'learn');
+}
+
+// Ajuster la taille au chargement et au redimensionnement
+$(window).on('resize', function() {
+    adjustBoardSize();
+    adjustMarginsForMode();
+});
+
+// Ajuster après un délai pour s'assurer que tout est chargé
+setTimeout(function() {
+    adjustBoardSize();
+    adjustMarginsForMode();
+}, 500);
@@ -0,0 +1,1123 @@
+// Fonction d'autoresize pour textarea
+function autoResizeTextarea(textarea) {
+    textarea.style.height = 'auto';
+    textarea.style.height = (textarea.scrollHeight) + 'px';
+}
+
+// Fonction d'auto-adaptation de la largeur pour les inputs PGN
+function autoAdjustPgnWidth(input) {
+    console.log('=== Auto-adjusting PGN width ===');
+    console.log('Input element:', input);
+    console.log('Input value:', input.value);
+
+                    // Find parent container (variation-edit-row)
+    const editRow = input.closest('.variation-edit-row');
+    if (!editRow) {
+        console.log('No edit row found');
+        return;
+    }
+    console.log('Edit row found:', editRow);
+
+    // Calculer l'espace disponible
+    const rowWidth = editRow.offsetWidth;
+    const titleInput = editRow.querySelector('.edit-title');
+    const buttons = editRow.querySelectorAll('.save-btn, .cancel-btn, .delete-btn');
+
+    console.log('Row width:', rowWidth);
+    console.log('Title input:', titleInput);
+    console.log('Buttons count:', buttons.length);
+
+    // Largeur des boutons
+    let buttonsWidth = 0;
+    buttons.forEach((btn, index) => {
+        const btnWidth = btn.offsetWidth;
+        buttonsWidth += btnWidth + 8; // 8px pour le gap
+        console.log(`Button ${index} width:`, btnWidth);
+    });
+
+    // Largeur du titre
+    const titleWidth = titleInput ? titleInput.offsetWidth + 8 : 0; // 8px pour le gap
+    console.log('Title width:', titleWidth);
+
+    // Espace disponible pour le PGN (utiliser tout l'espace restant)
+    const availableWidth = rowWidth - buttonsWidth - titleWidth - 16; // 16px pour les marges
+
+    console.log('Row width:', rowWidth, 'Buttons width:', buttonsWidth, 'Title width:', titleWidth, 'Available width:', availableWidth);
+
+    // Utiliser tout l'espace disponible
+    const newWidth = Math.max(120, availableWidth);
+
+    console.log('New width:', newWidth);
+    console.log('Setting input width to:', newWidth + 'px');
+    input.style.width = newWidth + 'px';
+    console.log('Input width after setting:', input.offsetWidth);
+    console.log('=== End auto-adjusting ===');
+}
+// Appliquer à tous les textarea existants au chargement
+document.querySelectorAll('textarea').forEach(function(textarea) {
+    textarea.addEventListener('input', function() {
+        autoResizeTextarea(textarea);
+    });
+    autoResizeTextarea(textarea);
+});
+// Dynamique ajout/suppression de variations
+let variationCount = 1;
+// Suppression de cette ligne qui cause l'erreur car l'élément n'existe pas
+// document.getElementById('add-variation-btn').onclick = function() {
+//     const container = document.getElementById('variations-container');
+//     const div = document.createElement('div');
+//     div.className = 'variation-fields';
+//     div.innerHTML = `
+//         <div class="form-group">
+//             <label>Variation Title</label>
+//             <input type="text" name="variation_title_${variationCount}" required>
+//         </div>
+//         <div class="form-group">
+//             <label>PGN</label>
+//             <textarea name="variation_pgn_${variationCount}" rows="2" required></textarea>
+//         </div>
+//         <button type="button" class="remove-variation-btn">Remove</button>
+//     `;
+//     div.querySelector('.remove-variation-btn').onclick = function() {
+//         div.remove();
+//     };
+//     // Appliquer l'autoresize au nouveau textarea
+//     const newTextarea = div.querySelector('textarea');
+//     if (newTextarea) {
+//         newTextarea.addEventListener('input', function() {
+//             autoResizeTextarea(newTextarea);
+//         });
+//         autoResizeTextarea(newTextarea);
+//     }
+//     container.appendChild(div);
+//     variationCount++;
+// };
+// Délégation d'événement pour le bouton edit (fonctionne même après modification du DOM)
+document.querySelectorAll('.variation-list').forEach(function(list) {
+    list.addEventListener('click', function(e) {
+        if (e.target.classList.contains('edit-btn')) {
+            playButtonSound();
+            const btn = e.target;
+            const item = btn.closest('.variation-item');
+            if (!item) return;
+
+            // Annuler l'édition en cours si une autre ligne est en cours d'édition
+            if (currentlyEditingItem && currentlyEditingItem !== item) {
+                cancelCurrentEdit();
+            }
+
+            // Calculer et stocker l'index de la variation
+            const block = item.closest('.opening-block');
+            const allItems = Array.from(block.querySelectorAll('.variation-item'));
+            const idx = allItems.indexOf(item);
+            item.setAttribute('data-variation-index', idx);
+
+            // Retirer le préfixe #n si présent pour l'édition
+            let title = item.querySelector('.var-title').textContent;
+            let titleNoNum = title.replace(/^#\d+\s*/, '');
+            const pgn = item.querySelector('.var-pgn').textContent;
+
+            // Stocker les valeurs originales pour pouvoir les restaurer
+            item.setAttribute('data-original-title', title);
+            item.setAttribute('data-original-pgn', pgn);
+
+            // Marquer cet élément comme étant en cours d'édition
+            currentlyEditingItem = item;
+            item.innerHTML = `
+                <div class="variation-edit-row">
+                    <input type="text" class="edit-title" value="${titleNoNum}" style="min-width:120px;max-width:100%;">
+                    <span class="edit-title-measure" style="position:absolute;visibility:hidden;white-space:pre;"></span>
+                    <input type="text" class="edit-pgn" value="${pgn}" style="min-width:120px;">
+                    <button type="button" class="save-btn">💾</button>
+                    <button type="button" class="cancel-btn">✖️</button>
+                    <button type="button" class="delete-btn">🗑️</button>
+                </div>
+            `;
+            // Auto-ajustement de la largeur de l'input titre
+            const editTitle = item.querySelector('.edit-title');
+            const editPgn = item.querySelector('.edit-pgn');
+            const measureSpan = item.querySelector('.edit-title-measure');
+            function adjustInputWidth() {
+                measureSpan.textContent = editTitle.value || editTitle.placeholder || '';
+                measureSpan.style.font = window.getComputedStyle(editTitle).font;
+                editTitle.style.width = Math.max(120, measureSpan.offsetWidth + 20) + 'px';
+            }
+            editTitle.addEventListener('input', adjustInputWidth);
+            adjustInputWidth();
+
+            // Auto-ajustement de la largeur de l'input PGN
+            editPgn.addEventListener('input', function() {
+                autoAdjustPgnWidth(this);
+            });
+            autoAdjustPgnWidth(editPgn);
+            setTimeout(() => autoAdjustPgnWidth(editPgn), 10);
+
+            // Enter key management to navigate between fields
+            function handleEnterKey(e) {
+                if (e.key === 'Enter') {
+                    e.preventDefault();
+                    if (e.target === editTitle) {
+                        // Si on est dans le titre, passer au PGN
+                        editPgn.focus();
+                    } else if (e.target === editPgn) {
+                        // If in PGN, save
+                        const saveBtn = item.querySelector('.save-btn');
+                        if (saveBtn) saveBtn.click();
+                    }
+                }
+            }
+            editTitle.addEventListener('keydown', handleEnterKey);
+            editPgn.addEventListener('keydown', handleEnterKey);
+            // Inline button management
+            item.querySelector('.cancel-btn').onclick = function() {
+                playButtonSound();
+                cancelCurrentEdit();
+            };
+            // Sauvegarde AJAX
+            item.querySelector('.save-btn').onclick = function() {
+                playButtonSound();
+                let newTitle = item.querySelector('.edit-title').value;
+                const newPgn = item.querySelector('.edit-pgn').value;
+                // Trouver le nom de l'ouverture et la catégorie
+                const block = item.closest('.opening-block');
+                const openingName = block.querySelector('.opening-title').textContent.trim();
+                // Déterminer la catégorie en regardant si le bloc a la classe 'defense'
+                const category = block.classList.contains('defense') ? 'Defense' : 'Attack';
+                // Utiliser l'index stocké dans l'attribut data
+                const idx = parseInt(item.getAttribute('data-variation-index'));
+                // Préfixe automatique #N si absent
+                if (!newTitle.trim().startsWith('#')) {
+                    newTitle = `#${idx+1} ${newTitle.trim()}`;
+                    item.querySelector('.edit-title').value = newTitle;
+                }
+                // Affichage d'un message d'erreur si besoin
+                let errorDiv = item.querySelector('.edit-error');
+                if (!errorDiv) {
+                    errorDiv = document.createElement('div');
+                    errorDiv.className = 'edit-error';
+                    errorDiv.style.color = '#dc3545';
+                    errorDiv.style.marginTop = '6px';
+                    item.appendChild(errorDiv);
+                }
+                errorDiv.textContent = '';
+                fetch('/openings/settings/edit_variation', {
+                    method: 'POST',
+                    headers: {'Content-Type': 'application/json'},
+                    body: JSON.stringify({
+                        category: category,
+                        opening: openingName,
+                        variation_index: idx,
+                        new_title: newTitle,
+                        new_pgn: newPgn
+                    })
+                }).then(async r => {
+                    if (r.ok) {
+                        // Signaler les transpositions avant de recharger
+                        const data = await r.json();
+                        if (data.warnings) alert(data.warnings.map(w => w.message).join('\n'));
+                        // Réinitialiser la variable d'édition en cours
+                        currentlyEditingItem = null;
+                        location.reload();
+                    } else {
+                        let msg = 'Error during save';
+                        try {
+                            const data = await r.json();
+                            if (data.error) msg = data.error;
+                        } catch {}
+                        // Temporary display in PGN field
+                        const pgnInput = item.querySelector('.edit-pgn');
+                        const oldValue = pgnInput.value;
+                        const oldColor = pgnInput.style.color;
+                        const oldBorder = pgnInput.style.borderColor;
+                        const oldBg = pgnInput.style.background;
+                        pgnInput.value = msg;
+                        pgnInput.disabled = true;
+                        pgnInput.style.color = '#dc3545';
+                        pgnInput.style.borderColor = '#dc3545';
+                        pgnInput.style.background = '#fff0f0';
+                        setTimeout(() => {
+                            pgnInput.value = oldValue;
+                            pgnInput.disabled = false;
+                            pgnInput.style.color = oldColor;
+                            pgnInput.style.borderColor = oldBorder;
+                            pgnInput.style.background = oldBg;
+                            autoAdjustPgnWidth(pgnInput);
+                            pgnInput.focus();
+                            pgnInput.setSelectionRange(pgnInput.value.length, pgnInput.value.length);
+                        }, 500);
+                    }
+                }).catch(err => {
+                    errorDiv.textContent = 'Network error during save';
+                });
+            };
+            // Gestion du bouton de suppression
+            item.querySelector('.delete-btn').onclick = function() {
+                playButtonSound();
+                // Trouver le nom de l'ouverture et la catégorie
+                const block = item.closest('.opening-block');
+                const openingName = block.querySelector('.opening-title').textContent.trim();
+                const category = block.classList.contains('defense') ? 'Defense' : 'Attack';
+                const idx = parseInt(item.getAttribute('data-variation-index'));
+
+                fetch('/openings/settings/delete_variation', {
+                    method: 'POST',
+                    headers: {'Content-Type': 'application/json'},
+                    body: JSON.stringify({
+                        category: category,
+                        opening: openingName,
+                        variation_index: idx
+                    })
+                }).then(async r => {
+                    if (r.ok) {
+                        // Réinitialiser la variable d'édition en cours si c'était l'élément en cours d'édition
+                        if (currentlyEditingItem === item) {
+                            currentlyEditingItem = null;
+                        }
+                        // Supprimer l'élément du DOM
+                        item.remove();
+                        // Actualiser les hashtags des variations restantes
+                        updateVariationHashtags();
+                    } else {
+                        let msg = 'Error during deletion';
+                        try {
+                            const data = await r.json();
+                            if (data.error) msg = data.error;
+                        } catch {}
+                        alert(msg);
+                    }
+                }).catch(err => {
+                    alert('Network error during deletion');
+                });
+            };
+        }
+    });
+});
+// Ajout d'une variation inline (bouton + en bas)
+document.querySelectorAll('.variation-list').forEach(function(list) {
+    list.addEventListener('click', function(e) {
+        if (e.target.classList.contains('add-variation-btn')) {
+            playButtonSound();
+            // Annuler l'édition en cours si une ligne est en cours d'édition
+            if (currentlyEditingItem) {
+                cancelCurrentEdit();
+            }
+
+            const addRow = list.querySelector('.add-variation-row');
+            if (!addRow) return;
+            // Si déjà ouvert, ne rien faire
+            if (addRow.innerHTML.trim() !== '') return;
+            // Trouver le nom et la catégorie
+            const block = list.closest('.opening-block');
+            // Déterminer la catégorie en fonction de la classe du bloc et de l'icône
+            let category = 'Attack'; // par défaut
+            if (block.classList.contains('defense')) {
+                category = 'Defense';
+            } else {
+
+                }
+            const name = block.querySelector('.opening-title').textContent.trim();
+            console.log('DEBUG Frontend - Category:', category);
+            console.log('DEBUG Frontend - Name:', name);
+            console.log('DEBUG Frontend - Full title text:', block.querySelector('.opening-title').textContent);
+            console.log('DEBUG Frontend - Block classes:', block.className);
+            console.log('DEBUG Frontend - Has defense class:', block.classList.contains('defense'));
+            // Déterminer le numéro de la prochaine variation
+            const n = list.querySelectorAll('.variation-item').length + 1;
+            addRow.innerHTML = `
+                <div class="variation-edit-row" style="margin-top:8px;">
+                        <input type="text" class="edit-title" name="variation_title" placeholder="Variation title" required style="min-width:120px;max-width:100%;">
+                        <span class="edit-title-measure" style="position:absolute;visibility:hidden;white-space:pre;"></span>
+                    <input type="text" class="edit-pgn" name="variation_pgn" placeholder="PGN" required style="min-width:120px;">
+                    <button type="button" class="save-btn">💾</button>
+                        <button type="button" class="cancel-btn">✖️</button>
+                    </div>
+            `;
+            // Auto-ajustement titre
+            const editTitle = addRow.querySelector('.edit-title');
+            const editPgn = addRow.querySelector('.edit-pgn');
+            const measureSpan = addRow.querySelector('.edit-title-measure');
+            function adjustInputWidth() {
+                measureSpan.textContent = editTitle.value || editTitle.placeholder || '';
+                measureSpan.style.font = window.getComputedStyle(editTitle).font;
+                editTitle.style.width = Math.max(120, measureSpan.offsetWidth + 20) + 'px';
+            }
+            editTitle.addEventListener('input', adjustInputWidth);
+            adjustInputWidth();
+
+            // Auto-ajustement de la largeur de l'input PGN
+            editPgn.addEventListener('input', function() {
+                autoAdjustPgnWidth(this);
+            });
+            // Appliquer immédiatement et après un petit délai pour s'assurer que l'élément est bien créé
+            autoAdjustPgnWidth(editPgn);
+            setTimeout(() => autoAdjustPgnWidth(editPgn), 10);
+            // Cancel
+            addRow.querySelector('.cancel-btn').onclick = function() {
+                playButtonSound();
+                addRow.innerHTML = '';
+            };
+            // Gestion de la touche Entrée pour naviguer entre les champs
+            function handleEnterKeyAdd(e) {
+                if (e.key === 'Enter') {
+                    e.preventDefault();
+                    if (e.target === editTitle) {
+                        // Si on est dans le titre, passer au PGN
+                        editPgn.focus();
+                    } else if (e.target === editPgn) {
+                        // Si on est dans le PGN, sauvegarder
+                        const saveBtn = addRow.querySelector('.save-btn');
+                        if (saveBtn) saveBtn.click();
+                    }
+                }
+            }
+            editTitle.addEventListener('keydown', handleEnterKeyAdd);
+            editPgn.addEventListener('keydown', handleEnterKeyAdd);
+            // Sauvegarde AJAX pour l'ajout de variation
+            addRow.querySelector('.save-btn').onclick = function() {
+                playButtonSound();
+                let varTitle = editTitle.value;
+                const varPgn = editPgn.value;
+                // Préfixe automatique #n si absent
+                if (!varTitle.trim().startsWith('#')) {
+                    varTitle = `#${n} ${varTitle.trim()}`;
+                    editTitle.value = varTitle;
+                }
+                // Affichage d'un message d'erreur si besoin
+                let errorDiv = addRow.querySelector('.edit-error');
+                if (!errorDiv) {
+                    errorDiv = document.createElement('div');
+                    errorDiv.className = 'edit-error';
+                    errorDiv.style.color = '#dc3545';
+                    errorDiv.style.marginTop = '6px';
+                    addRow.appendChild(errorDiv);
+                }
+                errorDiv.textContent = '';
+                const requestData = {
+                    category: category,
+                    name: name,
+                    variation_title: varTitle,
+                    variation_pgn: varPgn
+                };
+                console.log('DEBUG Frontend - Sending data:', requestData);
+                fetch('/openings/settings/add_variation', {
+                    method: 'POST',
+                    headers: {'Content-Type': 'application/json'},
+                    body: JSON.stringify(requestData)
+                }).then(async r => {
+                    if (r.ok) {
+                        // Signaler les transpositions avant de recharger
+                        const data = await r.json();
+                        if (data.warnings) alert(data.warnings.map(w => w.message).join('\n'));
+                        // Attendre un peu avant de recharger pour s'assurer que les données sont synchronisées
+                        setTimeout(() => {
+                            // Stocker le nom de l'ouverture dans sessionStorage pour le retrouver après rechargement
+                            sessionStorage.setItem('scrollToOpening', name);
+                            location.reload();
+                        }, 100);
+                    } else {
+                        let msg = 'Error during save';
+                        try {
+                            const data = await r.json();
+                            if (data.error) msg = data.error;
+                        } catch {}
+                        // Temporary display in PGN field
+                        const pgnInput = addRow.querySelector('.edit-pgn');
+                        const oldValue = pgnInput.value;
+                        const oldColor = pgnInput.style.color;
+                        const oldBorder = pgnInput.style.borderColor;
+                        const oldBg = pgnInput.style.background;
+                        pgnInput.value = msg;
+                        pgnInput.disabled = true;
+                        pgnInput.style.color = '#dc3545';
+                        pgnInput.style.borderColor = '#dc3545';
+                        pgnInput.style.background = '#fff0f0';
+                        setTimeout(() => {
+                            pgnInput.value = oldValue;
+                            pgnInput.disabled = false;
+                            pgnInput.style.color = oldColor;
+                            pgnInput.style.borderColor = oldBorder;
+                            pgnInput.style.background = oldBg;
+                            autoAdjustPgnWidth(pgnInput);
+                            pgnInput.focus();
+                            pgnInput.setSelectionRange(pgnInput.value.length, pgnInput.value.length);
+                        }, 500);
+                    }
+                }).catch(err => {
+                    errorDiv.textContent = 'Network error during save';
+                });
+            };
+        }
+    });
+});
+// Ajout d'une nouvelle ouverture (Attack/Defense)
+document.querySelectorAll('.add-opening-btn').forEach(function(btn) {
+    btn.onclick = function() {
+        playButtonSound();
+        // Annuler l'édition en cours si une ligne est en cours d'édition
+        if (currentlyEditingItem) {
+            cancelCurrentEdit();
+        }
+
+        const cat = btn.getAttribute('data-category');
+        const newOpeningZone = document.getElementById('new-opening-zone');
+
+        // Retirer la classe active de tous les boutons
+        document.querySelectorAll('.add-opening-btn').forEach(b => b.classList.remove('active'));
+
+        // Si déjà ouvert, vider la zone
+        if (newOpeningZone.innerHTML.trim() !== '') {
+            newOpeningZone.innerHTML = '';
+        }
+
+        // Ajouter la classe active au bouton cliqué
+        btn.classList.add('active');
+
+        // Créer le formulaire inline
+        const isDefense = cat === 'Defense';
+        const defenseClass = isDefense ? 'defense' : '';
+        newOpeningZone.innerHTML = `
+            <div class="opening-block opening-form ${defenseClass}" style="margin-top: 20px; padding: 20px; border: 2px solid #F47C20; border-radius: 8px; background: #fff; max-width: 400px; margin-left: auto; margin-right: auto;">
+                <h3 style="margin-top: 0; color: #145334;">Add a new opening</h3>
+                <div style="margin-bottom: 15px;">
+                    <label style="display: block; margin-bottom: 5px; font-weight: bold; color: #145334;">Opening name:</label>
+                    <input type="text" id="new-opening-name" placeholder="Opening name" style="width: 100%; padding: 8px; border: 1px solid #ccc; border-radius: 4px; box-sizing: border-box;">
+                </div>
+                <div style="text-align: center; display: flex; justify-content: center; gap: 8px;">
+                    <button type="button" id="save-opening-btn" class="save-btn">💾 Save</button>
+                    <button type="button" id="cancel-opening-btn" class="cancel-btn">✖️ Cancel</button>
+                </div>
+            </div>
+        `;
+
+        // Ajouter la classe show après un petit délai pour déclencher l'animation
+        setTimeout(() => {
+            const form = newOpeningZone.querySelector('.opening-form');
+            if (form) form.classList.add('show');
+        }, 10);
+
+        // Focus sur le champ de nom et faire défiler vers lui
+        const nameInput = document.getElementById('new-opening-name');
+        nameInput.focus();
+
+        // Faire défiler vers le formulaire avec un petit délai pour s'assurer qu'il est rendu
+        setTimeout(() => {
+            const form = newOpeningZone.querySelector('.opening-form');
+            if (form) {
+                form.scrollIntoView({ 
+                    behavior: 'smooth', 
+                    block: 'center' 
+                });
+            }
+        }, 100);
+
+        // Gestion de la touche Entrée
+        nameInput.addEventListener('keydown', function(e) {
+            if (e.key === 'Enter') {
+                e.preventDefault();
+                document.getElementById('save-opening-btn').click();
+            }
+        });
+
+        // Bouton Annuler
+        document.getElementById('cancel-opening-btn').onclick = function() {
+            playButtonSound();
+            newOpeningZone.innerHTML = '';
+            // Retirer la classe active du bouton
+            btn.classList.remove('active');
+        };
+
+        // Bouton Sauvegarder
+        document.getElementById('save-opening-btn').onclick = function() {
+            playButtonSound();
+            const openingName = nameInput.value.trim();
+            if (!openingName) {
+                // Afficher l'erreur dans le champ
+                const oldValue = nameInput.value;
+                const oldColor = nameInput.style.color;
+                const oldBorder = nameInput.style.borderColor;
+                const oldBg = nameInput.style.background;
+
+                nameInput.value = 'Please enter an opening name';
+                nameInput.disabled = true;
+                nameInput.style.color = '#dc3545';
+                nameInput.style.borderColor = '#dc3545';
+                nameInput.style.background = '#fff0f0';
+
+                setTimeout(() => {
+                    nameInput.value = oldValue;
+                    nameInput.disabled = false;
+                    nameInput.style.color = oldColor;
+                    nameInput.style.borderColor = oldBorder;
+                    nameInput.style.background = oldBg;
+                    nameInput.focus();
+                }, 500);
+                return;
+            }
+
+            fetch('/openings/settings/add', {
+                method: 'POST',
+                headers: {'Content-Type': 'application/json'},
+                body: JSON.stringify({category: cat, name: openingName})
+            }).then(async r => {
+                if (r.ok) {
+                    btn.classList.remove('active');
+                    // Au lieu de recharger, vider le formulaire et rafraîchir la liste
+                    newOpeningZone.innerHTML = '';
+                    // Attendre un peu puis rafraîchir la page pour s'assurer que les données sont synchronisées
+                    setTimeout(() => {
+                        // Stocker le nom de l'ouverture dans sessionStorage pour le retrouver après rechargement
+                        sessionStorage.setItem('scrollToOpening', openingName);
+                        location.reload();
+                    }, 100);
+                } else {
+                                                    let msg = 'Name already exists or error';
+                    try {
+                        const data = await r.json();
+                        if (data.error) msg = data.error;
+                    } catch {}
+
+                    // Afficher l'erreur dans le champ
+                    const oldValue = nameInput.value;
+                    const oldColor = nameInput.style.color;
+                    const oldBorder = nameInput.style.borderColor;
+                    const oldBg = nameInput.style.background;
+
+                    nameInput.value = msg;
+                    nameInput.disabled = true;
+                    nameInput.style.color = '#dc3545';
+                    nameInput.style.borderColor = '#dc3545';
+                    nameInput.style.background = '#fff0f0';
+
+                    setTimeout(() => {
+                        nameInput.value = oldValue;
+                        nameInput.disabled = false;
+                        nameInput.style.color = oldColor;
+                        nameInput.style.borderColor = oldBorder;
+                        nameInput.style.background = oldBg;
+                        nameInput.focus();
+                    }, 500);
+                }
+            });
+        };
+    };
+});
+
+// Fonctions pour le modal personnalisé
+function showCustomConfirm(message, onConfirm) {
+    const modal = document.getElementById('custom-modal');
+    const modalMessage = document.getElementById('modal-message');
+    const confirmBtn = document.getElementById('modal-confirm');
+    const cancelBtn = document.getElementById('modal-cancel');
+
+    modalMessage.textContent = message;
+
+    // Afficher le modal
+    modal.classList.add('show');
+
+    // Gestion du bouton Confirmer
+    const handleConfirm = () => {
+        playButtonSound();
+        modal.classList.remove('show');
+        onConfirm();
+        // Nettoyer les event listeners
+        confirmBtn.removeEventListener('click', handleConfirm);
+        cancelBtn.removeEventListener('click', handleCancel);
+    };
+
+    // Gestion du bouton Annuler
+    const handleCancel = () => {
+        playButtonSound();
+        modal.classList.remove('show');
+        // Nettoyer les event listeners
+        confirmBtn.removeEventListener('click', handleConfirm);
+        cancelBtn.removeEventListener('click', handleCancel);
+    };
+
+    // Ajouter les event listeners
+    confirmBtn.addEventListener('click', handleConfirm);
+    cancelBtn.addEventListener('click', handleCancel);
+
+    // Fermer avec Escape (gestion spécifique pour le modal)
+    const handleEscape = (e) => {
+        if (e.key === 'Escape') {
+            handleCancel();
+            document.removeEventListener('keydown', handleEscape);
+            e.stopPropagation(); // Empêcher la propagation vers handleEscapeKey global
+        }
+    };
+    document.addEventListener('keydown', handleEscape);
+}
+
+// Gestion de la suppression d'ouvertures
+document.addEventListener('click', function(e) {
+    if (e.target.classList.contains('delete-opening-btn')) {
+        playButtonSound();
+        const btn = e.target;
+        const category = btn.getAttribute('data-category');
+        const name = btn.getAttribute('data-name');
+
+        showCustomConfirm(
+            `Are you sure you want to delete the opening "${name}"?\n\nThis action will also delete all its variations.`,
+            () => {
+                fetch('/openings/settings/delete_opening', {
+                    method: 'POST',
+                    headers: {'Content-Type': 'application/json'},
+                    body: JSON.stringify({
+                        category: category,
+                        name: name
+                    })
+                }).then(async r => {
+                    if (r.ok) {
+                        location.reload();
+                    } else {
+                        let msg = 'Erreur lors de la suppression';
+                        try {
+                            const data = await r.json();
+                            if (data.error) msg = data.error;
+                        } catch {}
+                        alert(msg);
+                    }
+                }).catch(err => {
+                    alert('Erreur réseau lors de la suppression');
+                });
+            }
+        );
+    }
+});
+
+
+
+// Fonction globale pour gérer la touche Escape sur les boutons d'annulation
+function handleEscapeKey(e) {
+    if (e.key === 'Escape') {
+        // Chercher les boutons d'annulation visibles
+        const cancelButtons = document.querySelectorAll('.cancel-btn:not([style*="display: none"]), #modal-cancel:not([style*="display: none"]), #cancel-opening-btn:not([style*="display: none"])');
+
+        // Si on trouve un bouton d'annulation visible, le cliquer
+        if (cancelButtons.length > 0) {
+            // Prendre le premier bouton d'annulation visible
+            const cancelBtn = cancelButtons[0];
+            cancelBtn.click();
+            e.preventDefault();
+            return;
+        }
+
+        // Si aucun bouton d'annulation visible, vérifier s'il y a des zones d'édition actives
+        const editRows = document.querySelectorAll('.variation-item:has(.edit-title), .variation-item:has(.edit-pgn)');
+        if (editRows.length > 0) {
+            // Annuler l'édition en cours
+            const editRow = editRows[0];
+            const cancelBtn = editRow.querySelector('.cancel-btn');
+            if (cancelBtn) {
+                cancelBtn.click();
+                e.preventDefault();
+                return;
+            }
+        }
+
+        // Vérifier s'il y a une zone d'ajout d'ouverture active
+        const newOpeningZones = document.querySelectorAll('.new-opening-zone:not(:empty)');
+        if (newOpeningZones.length > 0) {
+            const cancelBtn = document.getElementById('cancel-opening-btn');
+            if (cancelBtn) {
+                cancelBtn.click();
+                e.preventDefault();
+                return;
+            }
+        }
+    }
+}
+
+// Fonction pour actualiser les hashtags des variations après suppression
+function updateVariationHashtags() {
+    document.querySelectorAll('.variation-list').forEach(function(list) {
+        const variations = list.querySelectorAll('.variation-item');
+        variations.forEach(function(variation, index) {
+            // Mettre à jour l'index de la variation
+            variation.setAttribute('data-variation-index', index);
+
+            // Mettre à jour le hashtag dans le titre affiché
+            const titleElement = variation.querySelector('.var-title');
+            if (titleElement) {
+                const currentText = titleElement.textContent;
+                // Remplacer le hashtag existant par le nouveau
+                const newText = currentText.replace(/^#\d+\s*/, `#${index + 1} `);
+                titleElement.textContent = newText;
+            }
+        });
+    });
+}
+
+// Fonction pour annuler l'édition en cours
+function cancelCurrentEdit() {
+    if (currentlyEditingItem) {
+        // Récupérer les valeurs originales
+        const originalTitle = currentlyEditingItem.getAttribute('data-original-title');
+        const originalPgn = currentlyEditingItem.getAttribute('data-original-pgn');
+
+        // Restaurer l'affichage original
+        currentlyEditingItem.innerHTML = `• <b class="var-title">${originalTitle}</b> : <code class="var-pgn">${originalPgn}</code> <button type="button" class="edit-btn" title="Edit">✏️</button>`;
+
+        // Réinitialiser la variable
+        currentlyEditingItem = null;
+    }
+}
+
+// === SYSTÈME DE SONS ===
+var audioContext = null;
+var soundEnabled = true;
+
+// Initialiser l'API Web Audio
+function initAudio() {
+    try {
+        audioContext = new (window.AudioContext || window.webkitAudioContext)();
+        console.log('Audio context initialized');
+    } catch (e) {
+        console.warn('Web Audio API not supported:', e);
+        soundEnabled = false;
+    }
+}
+
+// Fonction pour jouer un son synthétique (pour les boutons)
+function playButtonSound() {
+    if (!soundEnabled || !audioContext) return;
+
+    try {
+        const oscillator = audioContext.createOscillator();
+        const gainNode = audioContext.createGain();
+
+        oscillator.connect(gainNode);
+        gainNode.connect(audioContext.destination);
+
+        oscillator.frequency.setValueAtTime(600, audioContext.currentTime);
+        oscillator.type = 'triangle';
+        gainNode.gain.setValueAtTime(0.2, audioContext.currentTime);
+        gainNode.gain.exponentialRampToValueAtTime(0.01, audioContext.currentTime + 0.05);
+        oscillator.start(audioContext.currentTime);
+        oscillator.stop(audioContext.currentTime + 0.05);
+    } catch (e) {
+        console.warn('Error playing button sound:', e);
+    }
+}
+
+// === VARIABLES GLOBALES ===
+let currentlyEditingItem = null; // Variable pour suivre l'élément en cours d'édition
+
+// Detect if coming from index and modify return link
+document.addEventListener('DOMContentLoaded', function() {
+    // Initialiser l'audio
+    initAudio();
+
+    // Ajouter l'event listener pour la touche Escape
+    document.addEventListener('keydown', handleEscapeKey);
+
+    console.log('DOMContentLoaded - Initializing system in settings');
+
+    // Initialiser la synchronisation GitHub
+    initGitHubSync();
+
+
+
+    const urlParams = new URLSearchParams(window.location.search);
+    if (urlParams.get('from') === 'index') {
+        const backLink = document.querySelector('.backbtn');
+        if (backLink) {
+            backLink.href = '/?refresh=true';
+        }
+    }
+
+    // Ajouter le son au bouton back
+    const backBtn = document.querySelector('.backbtn');
+    if (backBtn) {
+        backBtn.addEventListener('click', function(e) {
+            e.preventDefault();
+            playButtonSound();
+            // Attendre un peu que le son soit joué avant de changer de page
+            setTimeout(() => {
+                window.location.href = this.href;
+            }, 100);
+        });
+    }
+
+    // Vérifier s'il faut faire défiler vers un opening block après rechargement
+    const scrollToOpening = sessionStorage.getItem('scrollToOpening');
+    if (scrollToOpening) {
+        // Nettoyer le sessionStorage
+        sessionStorage.removeItem('scrollToOpening');
+
+        // Attendre un peu que la page soit complètement chargée
+        setTimeout(() => {
+            const openingId = 'opening-' + scrollToOpening.replace(/ /g, '_');
+            const openingElement = document.getElementById(openingId);
+            if (openingElement) {
+                openingElement.scrollIntoView({ 
+                    behavior: 'smooth', 
+                    block: 'center' 
+                });
+                // Ajouter un effet de surbrillance temporaire
+                openingElement.style.transition = 'box-shadow 0.3s ease';
+                openingElement.style.boxShadow = '0 0 20px rgba(244, 124, 32, 0.6)';
+                setTimeout(() => {
+                    openingElement.style.boxShadow = '';
+                }, 2000);
+            }
+        }, 300);
+    }
+});
+
+// === FONCTIONS DE SYNCHRONISATION GITHUB ===
+function initGitHubSync() {
+    // Ajouter les event listeners pour les boutons de synchronisation
+    document.getElementById('sync-to-github').addEventListener('click', function() {
+        playButtonSound();
+        syncToGitHub(this);
+    });
+
+    document.getElementById('sync-from-github').addEventListener('click', function() {
+        playButtonSound();
+        syncFromGitHub(this);
+    });
+
+
+}
+
+function showLoadingState(button) {
+    button.classList.add('loading');
+    button.querySelector('.btn-text').style.display = 'none';
+    button.querySelector('.loading-spinner').style.display = 'inline';
+
+    // Désactiver l'autre bouton GitHub
+    const otherButton = button.id === 'sync-to-github' ? 
+        document.getElementById('sync-from-github') : 
+        document.getElementById('sync-to-github');
+    otherButton.disabled = true;
+    otherButton.style.opacity = '0.5';
+    otherButton.style.cursor = 'not-allowed';
+}
+
+function hideLoadingState(button) {
+    button.classList.remove('loading');
+    button.querySelector('.btn-text').style.display = 'inline';
+    button.querySelector('.loading-spinner').style.display = 'none';
+
+    // Réactiver l'autre bouton GitHub
+    const otherButton = button.id === 'sync-to-github' ? 
+        document.getElementById('sync-from-github') : 
+        document.getElementById('sync-to-github');
+    otherButton.disabled = false;
+    otherButton.style.opacity = '1';
+    otherButton.style.cursor = 'pointer';
+}
+
+function showSuccessState(button) {
+    console.log('✅ GitHub sync successful');
+    button.classList.remove('error');
+    button.classList.add('success');
+    setTimeout(() => {
+        button.classList.remove('success');
+    }, 2000);
+}
+
+function showErrorState(button) {
+    console.log('❌ GitHub sync failed');
+    button.classList.remove('success');
+    button.classList.add('error');
+    setTimeout(() => {
+        button.classList.remove('error');
+    }, 2000);
+}
+
+function syncToGitHub(button) {
+    showLoadingState(button);
+
+    fetch('/openings/settings/sync_to_github', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json'
+        }
+    })
+    .then(response => response.json())
+    .then(data => {
+        hideLoadingState(button);
+        if (data.success) {
+            showSuccessState(button);
+            console.log('✅ Sync to GitHub successful:', data);
+
+            // Afficher les détails de la synchronisation
+            if (data.backup_created) {
+                console.log('📁 Backup créé:', data.backup_created);
+            }
+            if (data.local_hash && data.github_hash) {
+                console.log('🔗 Hash local:', data.local_hash, 'Hash GitHub:', data.github_hash);
+            }
+
+            // Recharger les données sans recharger la page
+            refreshOpeningsList();
+            showNotification('Synchronisation vers GitHub réussie', 'sync');
+        } else {
+            showErrorState(button);
+            console.error('❌ Sync to GitHub failed:', data.error);
+            showNotification('Erreur de synchronisation vers GitHub', 'sync_error');
+        }
+    })
+    .catch(error => {
+        console.error('Erreur lors de la synchronisation:', error);
+        hideLoadingState(button);
+        showErrorState(button);
+    });
+}
+
+function syncFromGitHub(button) {
+    showLoadingState(button);
+
+    fetch('/openings/settings/sync_from_github', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json'
+        }
+    })
+    .then(response => response.json())
+    .then(data => {
+        hideLoadingState(button);
+        if (data.success) {
+            showSuccessState(button);
+            console.log('✅ Sync from GitHub successful:', data);
+
+            // Afficher les détails de la synchronisation
+            if (data.backup_created) {
+                console.log('📁 Backup des modifications locales créé:', data.backup_created);
+            }
+            if (data.local_hash && data.github_hash) {
+                console.log('🔗 Hash local:', data.local_hash, 'Hash GitHub:', data.github_hash);
+            }
+
+            // Recharger la page après importation
+            window.location.reload();
+        } else {
+            showErrorState(button);
+            console.error('❌ Sync from GitHub failed:', data.error);
+            showNotification('Erreur de synchronisation depuis GitHub', 'sync_error');
+        }
+    })
+    .catch(error => {
+        console.error('Erreur lors de la synchronisation:', error);
+        hideLoadingState(button);
+        showErrorState(button);
+    });
+}
+
+// Fonction pour recharger la liste des ouvertures sans recharger la page
+function refreshOpeningsList() {
+    console.log('🔄 Rechargement de la liste des ouvertures...');
+
+    // Recharger les données depuis le serveur
+    fetch('/openings/settings/get_openings', {
+        method: 'GET',
+        headers: {
+            'Content-Type': 'application/json'
+        }
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            // Mettre à jour l'affichage des ouvertures
+            updateOpeningsDisplay(data.openings);
+        } else {
+            console.error('Erreur lors du rechargement:', data.error);
+        }
+    })
+    .catch(error => {
+        console.error('Erreur lors du rechargement:', error);
+    });
+}
+
+// Fonction pour mettre à jour l'affichage des ouvertures
+function updateOpeningsDisplay(openings) {
+    const container = document.querySelector('.openings-container');
+    if (!container) return;
+
+    // Vider le conteneur
+    container.innerHTML = '';
+
+    // Recréer l'affichage des ouvertures
+    Object.keys(openings).forEach(category => {
+        const categoryDiv = document.createElement('div');
+        categoryDiv.className = 'category-section';
+        categoryDiv.innerHTML = `
+            <h3>${category}</h3>
+            <div class="openings-list">
+                ${openings[category].map(opening => `
+                    <div class="opening-item">
+                        <span class="opening-name">${opening.name}</span>
+                        <div class="opening-actions">
+                            <button class="btn btn-edit" onclick="editOpening('${category}', '${opening.name}')">Modifier</button>
+                            <button class="btn btn-delete" onclick="deleteOpening('${category}', '${opening.name}')">Supprimer</button>
+                        </div>
+                    </div>
+                `).join('')}
+            </div>
+        `;
+        container.appendChild(categoryDiv);
+    });
+}
+
+
+
+// Fonction pour afficher des notifications
+function showNotification(message, type = 'info') {
+    console.log(`📢 Notification [${type}]: ${message}`);
+
+    // Afficher seulement les notifications de synchronisation
+    if (type === 'sync' || type === 'sync_error') {
+        // Créer l'élément de notification
+        const notification = document.createElement('div');
+        notification.className = `notification notification-${type}`;
+        notification.innerHTML = `
+            <span class="notification-message">${message}</span>
+        `;
+
+        // Ajouter les styles
+        notification.style.cssText = `
+            position: fixed;
+            top: 20px;
+            right: 20px;
+            background: #F47C20;
+            color: white;
+            padding: 12px 20px;
+            border-radius: 8px;
+            box-shadow: 0 4px 12px rgba(244, 124, 32, 0.3);
+            z-index: 10000;
+            max-width: 300px;
+            word-wrap: break-word;
+            animation: slideIn 0.3s ease-out;
+            font-weight: 500;
+        `;
+
+        // Ajouter l'animation CSS
+        const style = document.createElement('style');
+        style.textContent = `
+            @keyframes slideIn {
+                from { transform: translateX(100%); opacity: 0; }
+                to { transform: translateX(0); opacity: 1; }
+            }
+        `;
+        document.head.appendChild(style);
+
+        // Ajouter à la page
+        document.body.appendChild(notification);
+
+        // Supprimer après 1 seconde
+        setTimeout(() => {
+            if (notification.parentElement) {
+                notification.style.animation = 'slideOut 0.3s ease-in';
+                notification.style.transform = 'translateX(100%)';
+                notification.style.opacity = '0';
+                setTimeout(() => {
+                    if (notification.parentElement) {
+                        notification.parentElement.removeChild(notification);
+                    }
+                }, 300);
+            }
+        }, 1000);
+    }
+}
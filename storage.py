@@ -0,0 +1,148 @@
+# Persistance sûre des fichiers de données : écriture atomique, verrou inter-processus
+# et numéro de version monotone
+
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class StaleWriteError(Exception):
+    """Le fichier a été modifié par un autre processus depuis sa lecture"""
+
+
+class FileLock:
+    """Verrou exclusif sur un fichier, partagé entre processus et réentrant dans le
+    processus : un thread qui le détient déjà peut le reprendre sans se bloquer."""
+
+    def __init__(self, path):
+        self.path = path
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._fd = None
+
+    def acquire(self):
+        self._thread_lock.acquire()
+        if self._depth == 0:
+            try:
+                os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+                fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+                try:
+                    if fcntl is not None:
+                        fcntl.flock(fd, fcntl.LOCK_EX)
+                    else:
+                        msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+                except BaseException:
+                    os.close(fd)
+                    raise
+            except BaseException:
+                self._thread_lock.release()
+                raise
+            self._fd = fd
+        self._depth += 1
+
+    def release(self):
+        self._depth -= 1
+        if self._depth == 0:
+            fd, self._fd = self._fd, None
+            try:
+                if fcntl is not None:
+                    fcntl.flock(fd, fcntl.LOCK_UN)
+                else:
+                    os.lseek(fd, 0, os.SEEK_SET)
+                    msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+            finally:
+                os.close(fd)
+        self._thread_lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+
+def _fsync_directory(directory):
+    """Rend le renommage durable (sans effet sous Windows, qui ne l'autorise pas)"""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def atomic_write_bytes(path, data):
+    """Écrit data dans path sans qu'un lecteur puisse voir un fichier tronqué :
+    fichier temporaire dans le même dossier, fsync, puis renommage atomique."""
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(path) + '-', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    _fsync_directory(directory)
+
+
+def atomic_write_json(path, obj):
+    """Sérialise obj dans le format historique des fichiers de données (indent=4, UTF-8)
+    et retourne les octets écrits"""
+    data = json.dumps(obj, indent=4, ensure_ascii=False).encode('utf-8')
+    atomic_write_bytes(path, data)
+    return data
+
+
+def read_version(path):
+    """Version courante du fichier de données (0 s'il n'a jamais été écrit par l'application)"""
+    try:
+        with open(path, 'r', encoding='ascii') as f:
+            return int(f.read().strip() or 0)
+    except (OSError, ValueError):
+        return 0
+
+
+def write_version(path, version):
+    atomic_write_bytes(path, str(version).encode('ascii'))
+
+
+@contextmanager
+def versioned_write(lock, version_path, expected_version=None):
+    """Encadre l'écriture d'un fichier de données versionné.
+
+    Prend le verrou, vérifie (si expected_version est fourni) que personne n'a
+    écrit depuis la lecture, puis publie la version suivante une fois le bloc
+    terminé sans erreur. Le bloc reçoit le nouveau numéro de version.
+    """
+    with lock:
+        current = read_version(version_path)
+        if expected_version is not None and current != expected_version:
+            raise StaleWriteError(
+                f"version {current} sur disque, {expected_version} attendue"
+            )
+        new_version = current + 1
+        yield new_version
+        # Le contenu est écrit avant la version : un lecteur sans verrou peut au pire
+        # associer un contenu récent à l'ancienne version, ce qui fait échouer
+        # prudemment l'écriture suivante au lieu d'écraser des données
+        write_version(version_path, new_version)
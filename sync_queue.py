@@ -0,0 +1,137 @@
+# File de synchronisation en arrière-plan : regroupe les éditions rapprochées en un seul envoi
+
+import atexit
+import itertools
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+
+class SyncQueue:
+    """Exécute sync_func dans un thread de fond, après un délai d'inactivité.
+
+    Chaque appel à request() repousse l'échéance de `debounce` secondes, sans
+    dépasser `max_delay` secondes après la première demande en attente : cinq
+    éditions rapprochées produisent un seul appel à sync_func (donc un seul
+    commit), qui envoie l'état du fichier à ce moment-là.
+    """
+
+    def __init__(self, sync_func, debounce=5.0, max_delay=60.0):
+        self.sync_func = sync_func
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self._job_ids = itertools.count(1)
+        self._reset()
+        atexit.register(self.flush)
+
+    def _reset(self):
+        # État propre au processus : appelé à la création et après un fork
+        self._pid = os.getpid()
+        self._cond = threading.Condition()
+        self._run_lock = threading.Lock()
+        self._thread = None
+        self._pending = 0
+        self._first_request = None
+        self._deadline = None
+        self._running = False
+        self._job_id = None
+        self._last_job = None
+
+    def _check_fork(self):
+        # Les threads ne survivent pas au fork des workers gunicorn
+        if self._pid != os.getpid():
+            self._reset()
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._worker, name='github-sync', daemon=True)
+            self._thread.start()
+
+    def request(self, reason=None):
+        """Programme une synchronisation et retourne l'état de la file"""
+        self._check_fork()
+        with self._cond:
+            now = time.monotonic()
+            if self._pending == 0:
+                self._first_request = now
+                self._job_id = next(self._job_ids)
+            self._pending += 1
+            self._deadline = min(now + self.debounce, self._first_request + self.max_delay)
+            self._ensure_thread()
+            self._cond.notify_all()
+        return self.status()
+
+    def run_now(self):
+        """Synchronise immédiatement (bouton admin) et annule l'envoi en attente"""
+        self._check_fork()
+        with self._cond:
+            job_id = self._job_id if self._pending else next(self._job_ids)
+            pending, self._pending = self._pending, 0
+            self._deadline = None
+        return self._run(job_id, pending)
+
+    def flush(self):
+        """Exécute tout de suite l'envoi en attente (arrêt du processus)"""
+        if self._pid != os.getpid() or not self._pending:
+            return None
+        return self.run_now()
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while not self._pending or time.monotonic() < self._deadline:
+                    if not self._pending:
+                        self._cond.wait()
+                    else:
+                        self._cond.wait(max(0.0, self._deadline - time.monotonic()))
+                job_id, pending = self._job_id, self._pending
+                self._pending = 0
+                self._deadline = None
+            self._run(job_id, pending)
+
+    def _run(self, job_id, pending):
+        with self._run_lock:
+            with self._cond:
+                self._running = True
+            started = time.time()
+            try:
+                result = self.sync_func()
+            except Exception as e:
+                result = {'success': False, 'error': str(e), 'status': 'error'}
+            finished = time.time()
+            with self._cond:
+                self._running = False
+                self._last_job = {
+                    'job_id': job_id,
+                    'coalesced_edits': pending,
+                    'started_at': datetime.fromtimestamp(started).isoformat(),
+                    'finished_at': datetime.fromtimestamp(finished).isoformat(),
+                    'duration_ms': round((finished - started) * 1000, 1),
+                    'result': result,
+                }
+            logger.info("Synchronisation GitHub #%d (%d édition(s)): %s", job_id, pending, result)
+            return result
+
+    def status(self):
+        """État de la file pour ce processus"""
+        self._check_fork()
+        with self._cond:
+            if self._running:
+                state = 'running'
+            elif self._pending:
+                state = 'pending'
+            else:
+                state = 'idle'
+            return {
+                'state': state,
+                'job_id': self._job_id if self._pending else None,
+                'pending_edits': self._pending,
+                'runs_in_s': round(max(0.0, self._deadline - time.monotonic()), 2) if self._deadline else None,
+                'debounce_s': self.debounce,
+                'last_job': self._last_job,
+                'worker_pid': self._pid,
+            }
@@ -1,52 +1,72 @@
 #!/usr/bin/env python3
 """
-Script de test pour vérifier que les pièces d'échecs se chargent correctement depuis le CDN
+Script de test pour vérifier que les pièces d'échecs et les bibliothèques du plateau
+sont servies depuis static/ (aucune requête vers un CDN)
 """
 
-import requests
+import os
 import sys
 
-def test_piece_url(piece):
-    """Teste si une pièce d'échecs se charge correctement depuis le CDN"""
-    url = f"https://cdn.jsdelivr.net/npm/chessboardjs@1.0.0/img/chesspieces/wikipedia/{piece}.png"
+from assets import AssetManifest
+from vendor import VENDOR_LIBRARIES
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+def test_piece_file(piece, assets):
+    """Teste si une pièce d'échecs est présente dans static/ et résolue par le manifeste"""
+    path = f"img/chesspieces/wikipedia/{piece}.png"
     try:
-        response = requests.get(url, timeout=10)
-        if response.status_code == 200:
-            print(f"✅ {piece}.png - OK ({len(response.content)} bytes)")
-            return True
-        else:
-            print(f"❌ {piece}.png - Erreur HTTP {response.status_code}")
-            return False
-    except Exception as e:
+        with open(os.path.join(STATIC_DIR, path), 'rb') as f:
+            content = f.read()
+    except OSError as e:
         print(f"❌ {piece}.png - Erreur: {e}")
         return False
+    if not content.startswith(PNG_SIGNATURE):
+        print(f"❌ {piece}.png - Fichier PNG invalide")
+        return False
+    print(f"✅ {piece}.png - OK ({len(content)} bytes) -> {assets.url(path)}")
+    return True
+
+def test_vendor_file(name, library, assets):
+    """Teste si une bibliothèque de vendor.py est présente dans static/vendor"""
+    path = library['path']
+    if not os.path.isfile(os.path.join(STATIC_DIR, path)):
+        print(f"❌ {name} - {path} absent (lancer python build_assets.py --fetch-vendor)")
+        return False
+    print(f"✅ {name} - OK -> {assets.url(path)} {assets.integrity(path) or '(sans build : pas de SRI)'}")
+    return True
 
 def main():
-    """Teste toutes les pièces d'échecs"""
-    print("🧪 Test des pièces d'échecs depuis le CDN...")
+    """Teste toutes les pièces d'échecs et les bibliothèques du plateau"""
+    print("🧪 Test des pièces d'échecs et des bibliothèques dans static/...")
     print("=" * 50)
-    
+    assets = AssetManifest(STATIC_DIR)
+
     # Liste de toutes les pièces d'échecs
     pieces = [
         'wp', 'wr', 'wn', 'wb', 'wq', 'wk',  # Pièces blanches
         'bp', 'br', 'bn', 'bb', 'bq', 'bk'   # Pièces noires
     ]
-    
+
     success_count = 0
-    total_count = len(pieces)
-    
+    total_count = len(pieces) + len(VENDOR_LIBRARIES)
+
     for piece in pieces:
-        if test_piece_url(piece):
+        if test_piece_file(piece, assets):
+            success_count += 1
+    for name, library in VENDOR_LIBRARIES.items():
+        if test_vendor_file(name, library, assets):
             success_count += 1
-    
+
     print("=" * 50)
-    print(f"📊 Résultats: {success_count}/{total_count} pièces chargées avec succès")
-    
+    print(f"📊 Résultats: {success_count}/{total_count} fichiers disponibles localement")
+
     if success_count == total_count:
-        print("🎉 Toutes les pièces se chargent correctement !")
+        print("🎉 Toutes les pièces et bibliothèques sont servies localement !")
         return 0
     else:
-        print("⚠️  Certaines pièces ne se chargent pas correctement.")
+        print("⚠️  Certains fichiers manquent dans static/.")
         return 1
 
 if __name__ == "__main__":
@@ -0,0 +1,39 @@
+# Les tests tournent sur une copie de data/openings.json, sans synchronisation GitHub
+
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Avant tout import de config/app : DATA_DIR est lu au chargement du module
+_DATA_DIR = tempfile.mkdtemp(prefix='sacthebook-tests-')
+shutil.copy(os.path.join(ROOT, 'data', 'openings.json'), _DATA_DIR)
+os.environ['DATA_DIR'] = _DATA_DIR
+os.environ['GITHUB_TOKEN'] = ''
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(_DATA_DIR, ignore_errors=True)
+
+
+@pytest.fixture(scope='session')
+def app_module():
+    import app
+    return app
+
+
+@pytest.fixture
+def client(app_module):
+    return app_module.app.test_client()
+
+
+@pytest.fixture
+def admin_client(client):
+    with client.session_transaction() as session:
+        session['admin_authenticated'] = True
+    return client
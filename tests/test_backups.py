@@ -0,0 +1,34 @@
+import time
+
+from backups import BackupStore
+
+DAY = 86400
+
+
+def test_max_age_applies_without_count_limit(tmp_path):
+    store = BackupStore(str(tmp_path), keep=0, max_age_days=1)
+    now = time.time()
+    old = store.add(b'{"old": true}', 'before_restore', created_at=now - 10 * DAY)
+    recent = store.add(b'{"recent": true}', 'before_restore', created_at=now - 3600)
+
+    assert [entry['id'] for entry in store.list()] == [recent['id']]
+    assert store.read(old['id']) is None
+    assert store.read(recent['id']) == b'{"recent": true}'
+
+
+def test_max_age_applies_to_backups_kept_by_count(tmp_path):
+    store = BackupStore(str(tmp_path), keep=2, max_age_days=1)
+    now = time.time()
+    ids = [store.add(f'{{"n": {n}}}'.encode(), 'before_restore', created_at=now - age)['id']
+           for n, age in enumerate((10 * DAY, 5 * DAY, 3600, 60))]
+
+    assert [entry['id'] for entry in store.list()] == [ids[3], ids[2]]
+
+
+def test_keep_zero_without_max_age_keeps_everything(tmp_path):
+    store = BackupStore(str(tmp_path), keep=0)
+    now = time.time()
+    for n in range(3):
+        store.add(f'{{"n": {n}}}'.encode(), 'before_restore', created_at=now - (n + 1) * 30 * DAY)
+
+    assert len(store.list()) == 3
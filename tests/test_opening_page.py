@@ -0,0 +1,26 @@
+import re
+
+from markupsafe import escape
+
+
+def test_line_selector_has_one_option_per_line(app_module, client):
+    trainer = app_module.repository.get_trainer()
+    for openings in trainer.get_openings_by_category().values():
+        name = openings[0]['name']
+        lines, _ = trainer.get_opening_details(name)
+        html = client.get(f'/opening/{name}').get_data(as_text=True)
+        select = html[html.index('<select id="line-select">'):html.index('</select>')]
+        assert select.count('<option') == len(lines) > 0
+        for index, line in enumerate(lines):
+            assert f'<option value="{index}">{escape(line["name"])}</option>' in select
+
+
+def test_page_scripts_and_stylesheets_are_served(app_module, client):
+    trainer = app_module.repository.get_trainer()
+    name = next(iter(trainer.get_openings_by_category().values()))[0]['name']
+    html = client.get(f'/opening/{name}').get_data(as_text=True)
+    urls = re.findall(r'<script src="([^"]+)"', html) + re.findall(r'<link rel="stylesheet" href="([^"]+)"', html)
+    assert any('chess' in url for url in urls)
+    for url in urls:
+        assert url.startswith('/static/'), url
+        assert client.get(url).status_code == 200, url
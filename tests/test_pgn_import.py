@@ -0,0 +1,50 @@
+from pgn_import import merge_games, parse_game
+from trainer import OpeningIndex, VariationIndex
+
+
+def _game(number, opening, pgn, color='black'):
+    text = f'[Opening "{opening}"]\n[Variation "Ligne {number}"]\n\n{pgn} *\n'
+    result = parse_game(number, text, color)
+    assert not result['errors']
+    return result
+
+
+def _catalog():
+    return {
+        'Attack': [{'name': 'Italian Game', 'variations': []}],
+        'Defense': [{'name': 'Sicilian Defense', 'variations': [{'name': '#1 Najdorf', 'pgn': '1. e4 c5 2. Nf3 d6'}]}],
+    }
+
+
+def _merge(results, category, catalog):
+    index = OpeningIndex(catalog)
+    return merge_games(results, category, catalog[category], index.find, index.find_folded, VariationIndex())
+
+
+def test_name_differing_by_case_joins_existing_opening():
+    catalog = _catalog()
+    report, changes = _merge([_game(1, 'sicilian defense', '1. e4 c5 2. Nc3 Nc6'),
+                              _game(2, 'SICILIAN DEFENSE', '1. e4 c5 2. c3 d5')], 'Defense', catalog)
+
+    assert [opening['name'] for opening in catalog['Defense']] == ['Sicilian Defense']
+    sicilian = catalog['Defense'][0]
+    assert [variation['name'] for variation in sicilian['variations']] == ['#1 Najdorf', '#2 Ligne 1', '#3 Ligne 2']
+    assert report['imported'] == 2
+    assert report['created_openings'] == []
+    assert report['updated_openings'] == ['Sicilian Defense']
+    assert [(category, opening['name']) for category, opening, _ in changes] == [('Defense', 'Sicilian Defense')]
+
+
+def test_name_from_other_category_is_reported_not_duplicated():
+    catalog = _catalog()
+    report, changes = _merge([_game(1, 'Sicilian Defense', '1. e4 c5 2. Nf3', color='white'),
+                              _game(2, 'italian game', '1. e4 e5 2. Nf3 Nc6 3. Bc4', color='white')],
+                             'Attack', catalog)
+
+    assert [opening['name'] for opening in catalog['Attack']] == ['Italian Game']
+    assert len(catalog['Defense'][0]['variations']) == 1
+    assert report['imported'] == 1
+    assert report['created_openings'] == []
+    assert [(entry['game'], entry['reason']) for entry in report['skipped']] == [(1, 'opening_in_other_category')]
+    assert 'Defense' in report['skipped'][0]['errors'][0]['message']
+    assert [(category, opening['name']) for category, opening, _ in changes] == [('Attack', 'Italian Game')]
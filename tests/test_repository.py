@@ -0,0 +1,30 @@
+import hashlib
+
+import config
+
+
+def test_edit_hashes_saved_bytes_and_writes_snapshot_in_background(app_module, monkeypatch):
+    repository = app_module.repository
+    opening = {'name': 'Snapshot Test', 'variations': [{'name': '#1 Main', 'pgn': '1. e4 e5 2. Nf3 *'}]}
+    with repository.mutation():
+        config.OPENINGS['Attack'].append(opening)
+        assert config.save_openings_to_json()
+        written = []
+        monkeypatch.setattr(repository, '_write_snapshot', lambda *args: written.append(args))
+        repository.commit_opening('Attack', opening)
+        # Ni relecture du fichier ni snapshot dans la requête : seulement l'ancien supprimé
+        assert written == []
+        monkeypatch.undo()
+
+    with open(config.OPENINGS_FILE, 'rb') as f:
+        assert repository.content_hash == hashlib.sha256(f.read()).hexdigest()
+    repository.flush_snapshot()
+    snapshot = repository._load_snapshot(repository.content_hash)
+    assert snapshot is not None
+    assert snapshot.get_opening_details('Snapshot Test')[0]
+
+    with repository.mutation():
+        config.OPENINGS['Attack'].remove(opening)
+        assert config.save_openings_to_json()
+        repository.commit_opening('Attack', opening, removed=True)
+    repository.flush_snapshot()
@@ -0,0 +1,35 @@
+import os
+
+import build_assets
+from vendor import VENDOR_LIBRARIES
+
+
+def test_pinned_vendor_files_match_their_integrity():
+    for name, library in VENDOR_LIBRARIES.items():
+        path = os.path.join(build_assets.STATIC_DIR, library['path'])
+        if 'integrity' in library:
+            with open(path, 'rb') as f:
+                assert build_assets.integrity(f.read()) == library['integrity'], name
+
+
+def test_check_vendor_reports_missing_and_altered_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(build_assets, 'VENDOR_LIBRARIES', {
+        'pinned': {'path': 'vendor/pinned.js', 'source': 'https://example.invalid/pinned.js',
+                   'integrity': build_assets.integrity(b'original')},
+        'missing': {'path': 'vendor/missing.js', 'source': 'https://example.invalid/missing.js'},
+    })
+    (tmp_path / 'vendor').mkdir()
+    (tmp_path / 'vendor' / 'pinned.js').write_bytes(b'original')
+    assert build_assets.check_vendor(str(tmp_path))[0].startswith('missing : vendor/missing.js absent')
+    assert len(build_assets.check_vendor(str(tmp_path))) == 1
+
+    (tmp_path / 'vendor' / 'pinned.js').write_bytes(b'altered')
+    (tmp_path / 'vendor' / 'missing.js').write_bytes(b'fetched')
+    problems = build_assets.check_vendor(str(tmp_path))
+    assert problems[0].startswith('pinned : vendor/pinned.js a l\'empreinte')
+    assert problems[1] == f"missing : empreinte {build_assets.integrity(b'fetched')} à reporter dans vendor.py"
+
+
+def test_vendor_asset_never_points_to_a_cdn(app_module):
+    for name, library in VENDOR_LIBRARIES.items():
+        assert app_module.vendor_asset(name)['url'].startswith(('/static/vendor/', '/static/dist/vendor/')), name
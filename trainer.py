@@ -0,0 +1,374 @@
+# Compilation des ouvertures (PGN -> lignes jouables) pour l'entraîneur
+
+import logging
+
+import chess
+import chess.pgn
+import chess.polyglot
+from io import StringIO
+import config
+
+logger = logging.getLogger(__name__)
+
+def fold_name(name):
+    """Normalize an opening name for case-insensitive comparisons"""
+    return name.strip().casefold()
+
+class OpeningIndex:
+    """Hash indexes over a {category: [opening, ...]} catalog.
+
+    Works on both the raw catalog (config.OPENINGS) and the compiled one;
+    the first opening with a given name wins, like the old linear scans.
+    Each key maps to a short list so that entries can be removed in O(1)
+    when an opening is deleted.
+    """
+
+    def __init__(self, openings_by_category):
+        self.by_name = {}  # name -> [(category, opening), ...]
+        self.by_category_name = {}  # (category, name) -> [opening, ...]
+        self.by_folded_name = {}  # fold_name(name) -> [(category, opening), ...]
+        for category, openings_list in openings_by_category.items():
+            for opening in openings_list:
+                self.add(category, opening)
+
+    def add(self, category, opening):
+        name = opening['name']
+        self.by_name.setdefault(name, []).append((category, opening))
+        self.by_category_name.setdefault((category, name), []).append(opening)
+        self.by_folded_name.setdefault(fold_name(name), []).append((category, opening))
+
+    def remove(self, category, opening):
+        name = opening['name']
+        _discard(self.by_name, name, lambda entry: entry[1] is opening)
+        _discard(self.by_category_name, (category, name), lambda entry: entry is opening)
+        _discard(self.by_folded_name, fold_name(name), lambda entry: entry[1] is opening)
+
+    def find(self, name, category=None):
+        """Return (category, opening) by exact name, optionally within a category"""
+        if category is not None:
+            entries = self.by_category_name.get((category, name))
+            return (category, entries[0]) if entries else (None, None)
+        entries = self.by_name.get(name)
+        return entries[0] if entries else (None, None)
+
+    def find_folded(self, name):
+        """Return (category, opening) whose name matches case-insensitively"""
+        entries = self.by_folded_name.get(fold_name(name))
+        return entries[0] if entries else (None, None)
+
+def _discard(index, key, match):
+    """Remove the first entry matching `match` from index[key]"""
+    entries = index.get(key)
+    if not entries:
+        return
+    for i, entry in enumerate(entries):
+        if match(entry):
+            del entries[i]
+            break
+    if not entries:
+        del index[key]
+
+def sequence_key(moves):
+    """Normalized move sequence of a line, independent of PGN spacing, numbering or annotations"""
+    return ' '.join(move['uci'] for move in moves)
+
+class VariationIndex:
+    """Variations indexed by final position (Zobrist hash) and by move sequence.
+
+    Entries are (category, opening name, variation index, variation name), so
+    an add or edit can be checked for duplicates and transpositions in O(1)
+    instead of scanning every PGN of the corpus.
+    """
+
+    def __init__(self):
+        self.by_position = {}  # zobrist hash -> [entry, ...]
+        self.by_sequence = {}  # sequence_key -> [entry, ...]
+        self.keys_by_opening = {}  # (category, name) -> [(zobrist, sequence, entry), ...]
+
+    def replace_opening(self, category, opening_name, keyed_variations):
+        """Re-index an opening from its [(index, name, zobrist, sequence), ...]"""
+        self.remove_opening(category, opening_name)
+        keys = []
+        for variation_index, variation_name, zobrist, sequence in keyed_variations:
+            entry = (category, opening_name, variation_index, variation_name)
+            self.by_position.setdefault(zobrist, []).append(entry)
+            self.by_sequence.setdefault(sequence, []).append(entry)
+            keys.append((zobrist, sequence, entry))
+        self.keys_by_opening[(category, opening_name)] = keys
+
+    def remove_opening(self, category, opening_name):
+        for zobrist, sequence, entry in self.keys_by_opening.pop((category, opening_name), []):
+            _discard(self.by_position, zobrist, lambda other: other is entry)
+            _discard(self.by_sequence, sequence, lambda other: other is entry)
+
+    def find(self, sequence, zobrist, exclude=None):
+        """Return (duplicate entry or None, [entries transposing into the same final position]).
+
+        `exclude` is the (category, opening name, variation index) being edited.
+        """
+        def kept(entry):
+            return entry[:3] != exclude
+        duplicate = next(filter(kept, self.by_sequence.get(sequence, ())), None)
+        duplicates = set(self.by_sequence.get(sequence, ()))
+        transpositions = [entry for entry in self.by_position.get(zobrist, ())
+                          if kept(entry) and entry not in duplicates]
+        return duplicate, transpositions
+
+class MoveNode:
+    """A position in an opening's move tree, reached by playing `uci` (`san`)"""
+    __slots__ = ('uci', 'san', 'ply', 'children', 'lines', 'fen', 'white_to_move', 'legal_moves', 'zobrist')
+
+    def __init__(self, uci=None, san=None, ply=0, board=None):
+        self.uci = uci
+        self.san = san
+        self.ply = ply
+        self.children = {}  # uci -> MoveNode
+        self.lines = set()  # indexes of the lines passing through this position
+        # Position precomputed at compile time so that requests never touch python-chess
+        board = board or chess.Board()
+        self.fen = board.fen()
+        self.white_to_move = board.turn == chess.WHITE
+        self.legal_moves = tuple(move.uci() for move in board.legal_moves)
+        self.zobrist = chess.polyglot.zobrist_hash(board)
+
+    def move(self):
+        """Return the move leading to this node in the same shape as a line move"""
+        return {'san': self.san, 'uci': self.uci}
+
+    def position(self):
+        """Return the position in the shape served by /api/get_position"""
+        return {
+            'fen': self.fen,
+            'is_white_turn': self.white_to_move,
+            'legal_moves': list(self.legal_moves)
+        }
+
+class MoveTree:
+    """Prefix tree merging all the lines of an opening, keyed by UCI.
+
+    Shared prefixes are stored once; `paths[i]` holds the nodes of line i from
+    the root (ply 0) to its last move, so any lookup is a single hop.
+    """
+
+    def __init__(self, lines=()):
+        self.root = MoveNode()
+        self.paths = []
+        for line in lines:
+            self.add_line(line['moves'])
+
+    def add_line(self, moves):
+        """Insert a line and return its index"""
+        index = len(self.paths)
+        node = self.root
+        node.lines.add(index)
+        path = [node]
+        board = chess.Board()
+        for move in moves:
+            board.push_uci(move['uci'])
+            child = node.children.get(move['uci'])
+            if child is None:
+                child = MoveNode(move['uci'], move['san'], node.ply + 1, board)
+                node.children[move['uci']] = child
+            child.lines.add(index)
+            path.append(child)
+            node = child
+        self.paths.append(path)
+        return index
+
+    def __len__(self):
+        return len(self.paths)
+
+    def node_at(self, line_index, ply):
+        """Return the node of a line after `ply` half-moves, or None"""
+        if not 0 <= line_index < len(self.paths):
+            return None
+        path = self.paths[line_index]
+        if not 0 <= ply < len(path):
+            return None
+        return path[ply]
+
+    def position_at(self, line_index, ply):
+        """Return the node of a line after `ply` half-moves, clamped to the line's bounds"""
+        if not 0 <= line_index < len(self.paths):
+            return None
+        path = self.paths[line_index]
+        return path[max(0, min(ply, len(path) - 1))]
+
+    def expected_node(self, line_index, ply):
+        """Return the node of the move the line expects at `ply`, or None at the end of the line"""
+        return self.node_at(line_index, ply + 1)
+
+    def play(self, line_index, ply, uci):
+        """Return the node reached by playing `uci` at `ply` if the line continues with it"""
+        node = self.node_at(line_index, ply)
+        if node is None:
+            return None
+        child = node.children.get(uci)
+        if child is None or line_index not in child.lines:
+            return None
+        return child
+
+    def continuations(self, node):
+        """Return the sorted indexes of the lines continuing from a node"""
+        return sorted(node.lines)
+
+class OpeningTrainer:
+    def __init__(self, openings=None):
+        self.move_trees = {}  # (category, name) -> MoveTree
+        self.variation_lines = {}  # (category, name) -> compiled lines of each variation
+        self.variation_index = VariationIndex()
+        self.openings_by_category = self.load_openings(config.OPENINGS if openings is None else openings)
+        self.index = OpeningIndex(self.openings_by_category)
+    
+    def load_openings(self, openings):
+        """Load all openings from config.py, supporting multiple variations per opening"""
+        openings_by_cat = {}
+        for category, openings_list in openings.items():
+            openings_by_cat[category] = []
+            for opening_data in openings_list:
+                # Inclure toutes les ouvertures, même celles sans variations
+                openings_by_cat[category].append(self.compile_opening(category, opening_data))
+        return openings_by_cat
+    
+    def compile_opening(self, category, opening_data, previous=None, precompiled=None):
+        """Compile an opening, re-parsing only the variations not found in `previous`.
+
+        `previous` holds the (name, pgn, lines) of each variation from an
+        earlier compilation of the same opening; unchanged variations are
+        reused as-is. `precompiled` maps (name, pgn) to lines already built
+        elsewhere, such as by the PGN validator for the variation being saved.
+        """
+        reusable = {(name, pgn): lines for name, pgn, lines in previous or []}
+        reusable.update(precompiled or {})
+        opening_name = opening_data["name"]
+        # Chaque ouverture peut avoir plusieurs variations
+        variation_lines = []
+        for variation in opening_data.get("variations", []):
+            variation_key = (variation["name"], variation["pgn"])
+            lines = reusable.get(variation_key)
+            if lines is None:
+                lines = self.compile_variation(variation)
+            variation_lines.append(variation_key + (lines,))
+        self.variation_lines[(category, opening_name)] = variation_lines
+        
+        opening = {
+            "name": opening_name,
+            "lines": [line for _, _, lines in variation_lines for line in lines]
+        }
+        # Les variations partagent leurs préfixes dans un seul arbre
+        tree = MoveTree(opening["lines"])
+        self.move_trees[(category, opening_name)] = tree
+        
+        # Position finale et séquence de chaque ligne, pour la détection des doublons
+        keyed_variations = []
+        line_index = 0
+        for variation_index, (variation_name, _, lines) in enumerate(variation_lines):
+            for line in lines:
+                final_node = tree.paths[line_index][-1]
+                keyed_variations.append((variation_index, variation_name, final_node.zobrist, sequence_key(line["moves"])))
+                line_index += 1
+        self.variation_index.replace_opening(category, opening_name, keyed_variations)
+        return opening
+    
+    def compile_variation(self, variation):
+        """Parse the PGN of one variation into its lines"""
+        loaded_lines = self.load_opening_from_pgn_string(variation["pgn"])
+        # Ajoute chaque ligne avec le nom de la variation
+        for line in loaded_lines:
+            # On remplace le nom par le nom de la variation pour l'affichage
+            line["name"] = variation["name"]
+        return loaded_lines
+    
+    def update_opening(self, category, opening_data, precompiled=None):
+        """Recompile one opening in place after an admin edit.
+
+        Only the variations whose name or PGN changed, and that are not in
+        `precompiled`, are parsed again; the other openings, their lines and
+        their move trees are left untouched.
+        """
+        _, compiled = self.index.find(opening_data["name"], category)
+        if compiled is None:
+            compiled = self.compile_opening(category, opening_data, precompiled=precompiled)
+            self.openings_by_category.setdefault(category, []).append(compiled)
+            self.index.add(category, compiled)
+        else:
+            previous = self.variation_lines.get((category, compiled["name"]))
+            compiled["lines"] = self.compile_opening(category, opening_data, previous, precompiled)["lines"]
+        return compiled
+    
+    def remove_opening(self, category, opening_name):
+        """Drop a deleted opening from the compiled catalog and its indexes"""
+        _, compiled = self.index.find(opening_name, category)
+        if compiled is None:
+            return
+        self.index.remove(category, compiled)
+        self.openings_by_category.get(category, []).remove(compiled)
+        self.move_trees.pop((category, opening_name), None)
+        self.variation_lines.pop((category, opening_name), None)
+        self.variation_index.remove_opening(category, opening_name)
+    
+    def load_opening_from_pgn_string(self, pgn_content):
+        """Load an opening from a PGN string"""
+        lines = []
+        pgn_io = StringIO(pgn_content)
+        while True:
+            try:
+                game = chess.pgn.read_game(pgn_io)
+                if game is None:
+                    break
+                
+                board = game.board()
+                moves = []
+                
+                # Check that the initial position is valid
+                if not board.is_valid():
+                    logger.warning("Invalid initial position for game: %s", game.headers.get('Event', 'Unknown'))
+                    continue
+                
+                for move in game.mainline_moves():
+                    try:
+                        # Check that the move is legal
+                        if move in board.legal_moves:
+                            san_move = board.san(move)
+                            moves.append({
+                                "san": san_move,
+                                "uci": move.uci()
+                            })
+                            board.push(move)
+                        else:
+                            logger.warning("Illegal move detected: %s in %s", move.uci(), game.headers.get('Event', 'Unknown'))
+                            break
+                    except Exception as e:
+                        logger.warning("Error processing move %s: %s", move.uci(), e)
+                        break
+
+                if moves:
+                    lines.append({
+                        'name': game.headers.get('Event', 'Main Line'),
+                        'moves': moves,
+                    })
+            except Exception as e:
+                logger.exception("Error processing a PGN game: %s", e)
+                continue
+        return lines
+    
+    def get_openings_by_category(self):
+        """Return the openings grouped by category"""
+        return self.openings_by_category
+    
+    def get_opening_lines(self, opening_name):
+        """Return the lines of an opening"""
+        _, opening = self.index.find(opening_name)
+        return opening['lines'] if opening else []
+
+    def get_move_tree(self, opening_name):
+        """Return the merged move tree of an opening, or None"""
+        category, _ = self.index.find(opening_name)
+        return self.move_trees.get((category, opening_name))
+
+    def get_opening_details(self, opening_name):
+        """Return the lines and category of an opening"""
+        category, opening = self.index.find(opening_name)
+        if opening is None:
+            return None, None
+        return opening['lines'], category
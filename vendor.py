@@ -0,0 +1,30 @@
+# Bibliothèques front-end servies depuis static/vendor (même origine, versionnées
+# par build_assets.py) au lieu d'être chargées depuis trois CDN à chaque page.
+#
+# Les fichiers de static/vendor sont versionnés dans le dépôt : les ajouter ou
+# les mettre à jour avec `python build_assets.py --fetch-vendor`, puis les committer
+# en reportant ici l'empreinte affichée ('integrity'). Aucun repli sur le CDN :
+# build_assets.py échoue tant qu'un fichier manque ou ne correspond pas à son empreinte.
+
+VENDOR_LIBRARIES = {
+    'jquery': {
+        'path': 'vendor/jquery-3.6.0.min.js',
+        'source': 'https://code.jquery.com/jquery-3.6.0.min.js',
+        'integrity': 'sha384-vtXRMe3mGCbOeY7l30aIg8H9p3GdeSe4IFlP6G8JMa7o7lXvnz3GFKzPxzJdPfGK',
+    },
+    'chess': {
+        'path': 'vendor/chess-0.10.2.min.js',
+        'source': 'https://cdnjs.cloudflare.com/ajax/libs/chess.js/0.10.2/chess.min.js',
+        'integrity': 'sha384-2Bp+c7rBuHdaAd5sDwCNNZWAF+T98qsUsjYyfY1jXpECN7VltqPebyYZdzc37sFe',
+    },
+    'chessboard': {
+        'path': 'vendor/chessboard-1.0.0.min.js',
+        'source': 'https://cdnjs.cloudflare.com/ajax/libs/chessboard-js/1.0.0/chessboard-1.0.0.min.js',
+        'integrity': 'sha384-8Vi8VHwn3vjQ9eUHUxex3JSN/NFqUg3QbPyX8kWyb93+8AC/pPWTzj+nHtbC5bxD',
+    },
+    'chessboard-css': {
+        'path': 'vendor/chessboard-1.0.0.min.css',
+        'source': 'https://cdnjs.cloudflare.com/ajax/libs/chessboard-js/1.0.0/chessboard-1.0.0.min.css',
+        'integrity': 'sha384-q94+BZtLrkL1/ohfjR8c6L+A6qzNH9R2hBLwyoAfu3i/WCvQjzL2RQJ3uNHDISdU',
+    },
+}